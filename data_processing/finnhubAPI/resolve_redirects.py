@@ -7,19 +7,32 @@ y añade una nueva columna 'url_original' con la URL final del medio (publisher)
 
 Uso:
     python resolve_redirects.py --input ticker_news.csv --output ticker_news_with_original.csv --workers 12 --sleep-min 0.2 --sleep-max 0.8
+    python resolve_redirects.py --input ticker_news.csv --output ticker_news_with_original.csv --engine async --max-inflight 2000 --per-host 6 --host-delay 0.25
 
 Requisitos:
     pip install requests pandas tqdm
+    pip install aiohttp          # solo para --engine async
 
 Notas:
     - Respeta límites: pausas aleatorias y concurrencia moderada.
+    - Con --engine async no hay pausa global: cada host de destino (finnhub.io incluido)
+      tiene su propio límite de conexiones y un intervalo mínimo entre peticiones, y las
+      filas se escriben en el CSV según van terminando (el orden de salida puede variar).
+      Un 429/503 con Retry-After pausa ese host el tiempo indicado.
     - Guarda también el status y el HTTP code para depuración.
+    - Antes de ir a la red consulta la caché compartida con modificarURLs.py
+      (crearDatasets/cacheURLs.py); --no-cache la desactiva.
 """
 import argparse
+import asyncio
+import email.utils
+import pathlib
 import random
+import sys
 import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from urllib.parse import urlparse
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse, urljoin
 
 import pandas as pd
 import requests
@@ -27,6 +40,9 @@ from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 from tqdm import tqdm
 
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1] / "procesamiento" / "crearDatasets"))
+from cacheURLs import CacheURLs, DEFAULT_PATH as CACHE_PATH
+
 
 def build_session(timeout: int = 15) -> requests.Session:
     session = requests.Session()
@@ -83,6 +99,216 @@ def resolve_one(url: str, session: requests.Session, sleep_min: float, sleep_max
         return {"url": url, "url_original": None, "status": f"error:{type(e).__name__}", "http_code": None}
 
 
+def result_from_cache(url: str, entry: dict) -> dict:
+    if entry["tipo"] == "ok":
+        return {"url": url, "url_original": entry["url_final"], "status": "ok", "http_code": entry["http_status"]}
+    if entry["tipo"] == "timeout":
+        return {"url": url, "url_original": None, "status": "timeout", "http_code": None}
+    return {"url": url, "url_original": None, "status": "http_error", "http_code": entry["http_status"]}
+
+
+def store_in_cache(cache, res: dict):
+    tipo = CacheURLs.tipo_de(res["http_code"], timeout=res["status"] == "timeout")
+    if tipo:
+        cache.put(res["url"], url_final=res["url_original"], http_status=res["http_code"], tipo=tipo)
+
+
+def resolve_cached(url: str, session: requests.Session, sleep_min: float, sleep_max: float, cache) -> dict:
+    """resolve_one pasando antes por la caché (un acierto no duerme ni toca la red)."""
+    if cache is not None:
+        entry = cache.get(url)
+        if entry is not None:
+            return result_from_cache(url, entry)
+    res = resolve_one(url, session, sleep_min, sleep_max)
+    if cache is not None:
+        store_in_cache(cache, res)
+    return res
+
+
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+RETRY_CODES = (429, 500, 502, 503, 504)
+MAX_REDIRECTS = 10
+MAX_RETRY_AFTER = 120   # tope (s) para un Retry-After desmesurado
+
+
+class TooManyRedirects(Exception):
+    pass
+
+
+class HostPolicy:
+    """Concurrencia e intervalo mínimo entre peticiones por host de destino."""
+
+    def __init__(self, per_host: int, delay: float):
+        self.per_host = per_host
+        self.delay = delay
+        self._sems = {}
+        self._next = {}
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        host = urlparse(url).netloc.lower()
+        sem = self._sems.setdefault(host, asyncio.Semaphore(self.per_host))
+        async with sem:
+            now = asyncio.get_running_loop().time()
+            start = max(now, self._next.get(host, now))
+            self._next[host] = start + self.delay
+            if start > now:
+                await asyncio.sleep(start - now)
+            yield
+
+    def pause(self, url: str, seconds: float):
+        """Ninguna petición nueva a este host hasta dentro de `seconds` (Retry-After)."""
+        host = urlparse(url).netloc.lower()
+        now = asyncio.get_running_loop().time()
+        self._next[host] = max(self._next.get(host, now), now + seconds)
+
+
+def retry_after(value):
+    """Segundos de una cabecera Retry-After (número o fecha HTTP); None si no se entiende."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return min(float(value), MAX_RETRY_AFTER)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return min(max(when.timestamp() - time.time(), 0.0), MAX_RETRY_AFTER)
+
+
+async def _follow(session, method: str, url: str, policy: HostPolicy, timeout):
+    """Sigue las redirecciones a mano para aplicar la política del host en cada salto,
+    también en el primero (finnhub.io)."""
+    for hop in range(MAX_REDIRECTS):
+        for attempt in range(3):
+            async with policy.slot(url):
+                async with session.request(method, url, allow_redirects=False, timeout=timeout) as r:
+                    code, loc = r.status, r.headers.get("Location")
+                    wait = retry_after(r.headers.get("Retry-After")) if code in (429, 503) else None
+            if code not in RETRY_CODES or attempt == 2:
+                break
+            if wait is not None:
+                # el host pide esperar: se pausa para todas las peticiones a él, no solo esta
+                policy.pause(url, wait)
+            else:
+                await asyncio.sleep(0.5 * 2 ** attempt)
+        if code in REDIRECT_CODES and loc:
+            url = urljoin(url, loc)
+            continue
+        return url, code
+    raise TooManyRedirects()
+
+
+async def resolve_one_async(url: str, session, policy: HostPolicy, timeout) -> dict:
+    """Versión asíncrona de resolve_one: mismos estados y mismo criterio HEAD → GET."""
+    import aiohttp
+    try:
+        try:
+            final_url, code = await _follow(session, "HEAD", url, policy, timeout)
+            if final_url and final_url != url and code < 400:
+                return {"url": url, "url_original": final_url, "status": "ok", "http_code": code}
+        except TooManyRedirects:
+            raise
+        except Exception:
+            pass
+
+        # El cuerpo no se lee: al salir del contexto se descarta la respuesta
+        final_url, code = await _follow(session, "GET", url, policy, timeout)
+        if final_url and code < 400:
+            return {"url": url, "url_original": final_url, "status": "ok", "http_code": code}
+        return {"url": url, "url_original": None, "status": "http_error", "http_code": code}
+    except TooManyRedirects:
+        return {"url": url, "url_original": None, "status": "too_many_redirects", "http_code": None}
+    except asyncio.TimeoutError:
+        return {"url": url, "url_original": None, "status": "timeout", "http_code": None}
+    except aiohttp.ClientError as e:
+        return {"url": url, "url_original": None, "status": f"request_error:{type(e).__name__}", "http_code": None}
+    except Exception as e:
+        return {"url": url, "url_original": None, "status": f"error:{type(e).__name__}", "http_code": None}
+
+
+class StreamingWriter:
+    """Escribe en el CSV de salida las filas de entrada de cada URL en cuanto se resuelve,
+    con las mismas columnas que el merge del motor por hilos."""
+    RESULT_COLS = ["url_original", "status", "http_code"]
+
+    def __init__(self, df: pd.DataFrame, path: str, flush_every: int = 200):
+        self.df = df
+        self.rows_by_url = df.groupby(df["url"].astype(str)).indices if len(df) else {}
+        self.f = open(path, "w", encoding="utf-8", newline="")
+        self.flush_every = flush_every
+        self.pending = []
+        cols = list(df.columns) + [c for c in self.RESULT_COLS if c not in df.columns]
+        pd.DataFrame(columns=cols).to_csv(self.f, index=False, lineterminator="\n")
+        # filas sin URL: van directamente, sin resultado
+        missing = df[df["url"].isna()]
+        if len(missing):
+            self._write(missing.assign(**{c: None for c in self.RESULT_COLS}))
+
+    def _write(self, chunk: pd.DataFrame):
+        chunk["http_code"] = chunk["http_code"].astype("Int64")
+        chunk.to_csv(self.f, header=False, index=False, lineterminator="\n")
+
+    def add(self, res: dict):
+        self.pending.append(res)
+        if len(self.pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        parts = []
+        for res in self.pending:
+            rows = self.df.iloc[self.rows_by_url[res["url"]]]
+            parts.append(rows.assign(**{c: res[c] for c in self.RESULT_COLS}))
+        self._write(pd.concat(parts))
+        self.f.flush()
+        self.pending = []
+
+    def close(self):
+        self.flush()
+        self.f.close()
+
+
+async def run_async(urls, writer: StreamingWriter, max_inflight: int, per_host: int,
+                    host_delay: float, timeout: int = 15, cache=None):
+    try:
+        import aiohttp
+    except ImportError:
+        raise SystemExit("--engine async necesita aiohttp (pip install aiohttp)")
+
+    policy = HostPolicy(per_host, host_delay)
+    queue = asyncio.Queue()
+    bar = tqdm(total=len(set(urls)), desc="Resolviendo redirecciones (async)")
+    for u in dict.fromkeys(urls):
+        entry = cache.get(u) if cache is not None else None
+        if entry is not None:
+            writer.add(result_from_cache(u, entry))
+            bar.update(1)
+        else:
+            queue.put_nowait(u)
+
+    connector = aiohttp.TCPConnector(limit=max_inflight, limit_per_host=0, ttl_dns_cache=300)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    headers = {"User-Agent": "PLN-EventCrawler/1.0 (+your_email@example.com)"}
+    async with aiohttp.ClientSession(connector=connector, headers=headers) as session:
+        async def worker():
+            while True:
+                try:
+                    u = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                res = await resolve_one_async(u, session, policy, client_timeout)
+                if cache is not None:
+                    store_in_cache(cache, res)
+                writer.add(res)
+                bar.update(1)
+
+        await asyncio.gather(*(worker() for _ in range(min(max_inflight, queue.qsize()) or 1)))
+    bar.close()
+
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--input", required=True, help="Ruta al CSV de entrada con columna 'url'")
@@ -90,6 +316,13 @@ def main():
     parser.add_argument("--workers", type=int, default=12, help="Número de hilos en paralelo")
     parser.add_argument("--sleep-min", type=float, default=0.2, help="Pausa mínima entre peticiones (s)")
     parser.add_argument("--sleep-max", type=float, default=0.8, help="Pausa máxima entre peticiones (s)")
+    parser.add_argument("--engine", choices=["threads", "async"], default="threads",
+                        help="threads: ThreadPoolExecutor (por defecto); async: aiohttp con límites por host")
+    parser.add_argument("--max-inflight", type=int, default=1000, help="[async] Peticiones simultáneas en total")
+    parser.add_argument("--per-host", type=int, default=4, help="[async] Conexiones simultáneas por host de destino")
+    parser.add_argument("--host-delay", type=float, default=0.2, help="[async] Intervalo mínimo entre peticiones al mismo host (s)")
+    parser.add_argument("--cache", default=str(CACHE_PATH), help="Ruta a la caché SQLite de URLs resueltas")
+    parser.add_argument("--no-cache", action="store_true", help="No consultar ni actualizar la caché")
     args = parser.parse_args()
 
     df = pd.read_csv(args.input)
@@ -97,15 +330,32 @@ def main():
         raise ValueError("El CSV debe contener una columna llamada 'url'")
 
     urls = df["url"].dropna().astype(str).tolist()
+    cache = None if args.no_cache else CacheURLs(args.cache)
+
+    if args.engine == "async":
+        writer = StreamingWriter(df, args.output)
+        try:
+            asyncio.run(run_async(urls, writer, args.max_inflight, args.per_host, args.host_delay, cache=cache))
+        finally:
+            writer.close()
+            if cache is not None:
+                print(cache.stats())
+                cache.close()
+        print(f"Listo. Salida en: {args.output}")
+        return
 
     session = build_session()
 
     results = []
     with ThreadPoolExecutor(max_workers=args.workers) as ex:
-        futures = [ex.submit(resolve_one, u, session, args.sleep_min, args.sleep_max) for u in urls]
+        futures = [ex.submit(resolve_cached, u, session, args.sleep_min, args.sleep_max, cache) for u in urls]
         for fut in tqdm(as_completed(futures), total=len(futures), desc="Resolviendo redirecciones"):
             results.append(fut.result())
 
+    if cache is not None:
+        print(cache.stats())
+        cache.close()
+
     res_df = pd.DataFrame(results)
 
     # Unimos por 'url' para añadir 'url_original', 'status', 'http_code'
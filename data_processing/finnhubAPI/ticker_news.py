@@ -1,16 +1,45 @@
 import os
+import sys
+import argparse
+import pathlib
 import finnhub
 import pandas as pd
 from datetime import date, timedelta
 
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1] / "procesamiento" / "crearDatasets"))
+from ingestaIncremental import EstadoIngesta, claves_guardadas, append_dedup
+
+TICKERS = ['AAPL', 'NVDA', 'MSFT', 'AMZN', 'GOOGL', 'TSLA', 'META']
+LOOKBACK_DAYS = 120
+WINDOW_DAYS = 7
+OUT_PATH = pathlib.Path(os.path.join(os.path.dirname(__file__), '../data_processing/ticker_news.csv'))
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--incremental", action="store_true",
+                    help="solo descarga lo posterior al último artículo guardado de cada ticker y lo añade al CSV")
+args = parser.parse_args()
+
 # API key ya verificada
 with open("api_key.txt", "r") as f:
     api_key = f.read().strip().split(" = ")[1]
 
 finnhub_client = finnhub.Client(api_key=api_key)
 
+if args.incremental:
+    estado = EstadoIngesta(OUT_PATH.with_name("_estado_ticker_news.json"))
+    seen = claves_guardadas(OUT_PATH, "id")
+    for t in TICKERS:
+        added = 0
+        for from_, to_ in estado.ventanas_pendientes(t, LOOKBACK_DAYS, WINDOW_DAYS):
+            batch = finnhub_client.company_news(t, _from=from_, to=to_)
+            added += append_dedup(batch, OUT_PATH, "id", seen)
+            estado.completar_ventana(t, to_, batch)
+        print(f"{t}: +{added}")
+    print(len(seen))
+    sys.exit()
+
 to_ = date.today()
-from_ = to_ - timedelta(days=120)
+from_ = to_ - timedelta(days=LOOKBACK_DAYS)
 
 appl = finnhub_client.company_news('AAPL', _from=from_.isoformat(), to=to_.isoformat())
 nvda = finnhub_client.company_news('NVDA', _from=from_.isoformat(), to=to_.isoformat())
@@ -26,7 +55,7 @@ df = pd.DataFrame(news).drop_duplicates(subset=['id']).reset_index(drop=True)
 pd.set_option("display.width", None)
 pd.set_option("display.max_colwidth", None)
 
-with open(os.path.join(os.path.dirname(__file__), '../data_processing/ticker_news.csv'), 'w', encoding='utf-8', newline='') as f:
+with open(OUT_PATH, 'w', encoding='utf-8', newline='') as f:
     df.to_csv(f, index=False)
 
-print(len(df))
\ No newline at end of file
+print(len(df))
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Estadísticas por dominio de la cascada de extractores de sraper.extract_best.
+
+Para cada dominio se guarda, por extractor, cuántas veces se ha probado, cuántas ha
+funcionado y cuánto ha tardado. Con eso se reordena la cascada (primero el que más
+acierta y, a igualdad, el más rápido) y se saltan los extractores que nunca funcionan
+en ese dominio. Se persiste en JSON entre ejecuciones.
+"""
+import os, json, random
+from urllib.parse import urlparse
+import pandas as pd
+
+
+def domain_key(url):
+    try:
+        d = urlparse(url).netloc.lower()
+    except Exception:
+        return ""
+    return d[4:] if d.startswith("www.") else d
+
+
+class EstadisticasExtractores:
+    def __init__(self, path, min_intentos=5, exploracion=0.05, seed=None):
+        """
+        min_intentos: pruebas necesarias antes de reordenar o descartar un extractor.
+        exploracion: probabilidad de usar el orden por defecto aunque haya estadísticas,
+                     para que un extractor descartado pueda recuperarse.
+        """
+        self.path = path
+        self.min_intentos = min_intentos
+        self.exploracion = exploracion
+        self.rng = random.Random(seed)
+        self.data = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.data = json.load(f)
+
+    def _stat(self, dominio, extractor):
+        d = self.data.setdefault(dominio, {"extractores": {}, "urls": 0, "ahorro_s": 0.0})
+        return d["extractores"].setdefault(extractor, {"intentos": 0, "exitos": 0, "segundos": 0.0})
+
+    def tiempo_medio(self, dominio, extractor):
+        st = self.data.get(dominio, {}).get("extractores", {}).get(extractor)
+        return st["segundos"] / st["intentos"] if st and st["intentos"] else 0.0
+
+    def orden(self, dominio, por_defecto):
+        """Orden de la cascada para el dominio. Los extractores sin datos suficientes
+        conservan su posición relativa detrás de los que ya han demostrado funcionar."""
+        stats = self.data.get(dominio, {}).get("extractores", {})
+        if not stats or self.rng.random() < self.exploracion:
+            return list(por_defecto)
+
+        def conocido(e):
+            return stats.get(e, {}).get("intentos", 0) >= self.min_intentos
+
+        def clave(e):
+            st = stats[e]
+            return (-st["exitos"] / st["intentos"], st["segundos"] / st["intentos"])
+
+        utiles = sorted((e for e in por_defecto if conocido(e) and stats[e]["exitos"] > 0), key=clave)
+        sin_datos = [e for e in por_defecto if not conocido(e)]
+        return utiles + sin_datos
+
+    def registrar(self, dominio, extractor, ok, segundos):
+        st = self._stat(dominio, extractor)
+        st["intentos"] += 1
+        st["exitos"] += int(bool(ok))
+        st["segundos"] += segundos
+
+    def registrar_url(self, dominio, por_defecto, ejecutados, ganador):
+        """Estima el tiempo ahorrado frente a la cascada fija: lo que habrían tardado
+        (según su media) los extractores que esta habría ejecutado y que nos saltamos."""
+        d = self.data.setdefault(dominio, {"extractores": {}, "urls": 0, "ahorro_s": 0.0})
+        d["urls"] += 1
+        hasta = por_defecto.index(ganador) + 1 if ganador in por_defecto else len(por_defecto)
+        d["ahorro_s"] += sum(self.tiempo_medio(dominio, e) for e in por_defecto[:hasta] if e not in ejecutados)
+
+    def guardar(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def informe(self):
+        """DataFrame por dominio: URLs, mejor extractor, tasa de acierto y segundos ahorrados."""
+        filas = []
+        for dominio, d in self.data.items():
+            ex = d["extractores"]
+            mejor = max(ex, key=lambda e: (ex[e]["exitos"] / max(ex[e]["intentos"], 1), -ex[e]["segundos"]), default=None)
+            filas.append({
+                "dominio": dominio,
+                "urls": d["urls"],
+                "mejor_extractor": mejor,
+                "acierto_mejor": ex[mejor]["exitos"] / max(ex[mejor]["intentos"], 1) if mejor else 0.0,
+                "ahorro_s": round(d["ahorro_s"], 2),
+            })
+        return pd.DataFrame(filas, columns=["dominio", "urls", "mejor_extractor", "acierto_mejor", "ahorro_s"]) \
+                 .sort_values("ahorro_s", ascending=False, ignore_index=True)
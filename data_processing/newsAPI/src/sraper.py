@@ -5,11 +5,12 @@ Entrada: PRUEBAAPINUEVA/news_finance_en.csv
 Salida:  PRUEBAAPINUEVA/news_finance_full.csv
 """
 
-import os, time, re, sys, requests, pandas as pd
+import os, time, re, sys, json, requests, pandas as pd
 from urllib.parse import urlparse
 from bs4 import BeautifulSoup
 from datetime import datetime
 from requests.adapters import HTTPAdapter, Retry
+from estadisticasExtractores import EstadisticasExtractores, domain_key
 
 import trafilatura
 from readability import Document as ReadDoc
@@ -23,6 +24,10 @@ except Exception:
 BASE_DIR = r"C:\Users\mpsua\OneDrive\Escritorio\ud\CUARTO\Primer_Cuatri\PLN\pruebaProyecto\Bloomberg-scraper\PRUEBAAPINUEVA"
 INPUT_FILE = os.path.join(BASE_DIR, "news_finance_en.csv")
 OUTPUT_FILE = os.path.join(BASE_DIR, "news_finance_full.csv")
+# Journal fila a fila: si el proceso se corta, al relanzarlo se saltan las URLs ya hechas
+JOURNAL_FILE = os.path.join(BASE_DIR, "news_finance_full.journal.jsonl")
+# Qué extractor funciona en cada dominio (persistente entre ejecuciones)
+STATS_FILE = os.path.join(BASE_DIR, "extractor_stats.json")
 
 # --- Configuración general ---
 DEFAULT_TIMEOUT = 20
@@ -126,69 +131,119 @@ def light_clean(text):
     txt = "\n".join(out)
     return re.sub(r"\n{3,}", "\n\n", txt).strip()
 
-def extract_best(session, url):
+# Cascada por defecto: (nombre, función(html, url))
+EXTRACTORS = [
+    ("trafilatura", lambda html, url: extract_trafilatura(html, url)),
+    ("readability", lambda html, url: extract_readability(html)),
+    ("newspaper3k", lambda html, url: extract_newspaper(url)),
+    ("trafilatura(fetch_url_2)", lambda html, url: extract_trafilatura(None, url)),
+]
+DEFAULT_ORDER = [name for name, _ in EXTRACTORS]
+
+def extract_best(session, url, stats=None):
     status, final_url, html, err = fetch_html(session, url)
     if status and status != 200:
         txt = extract_trafilatura(None, final_url)
         return txt, "trafilatura(fetch_url)", status, err, final_url
-    # 1) trafilatura
-    txt = extract_trafilatura(html, final_url)
-    if txt and len(txt) > 200:
-        return txt, "trafilatura", status, err, final_url
-    # 2) readability
-    txt = extract_readability(html)
-    if txt and len(txt) > 200:
-        return txt, "readability", status, err, final_url
-    # 3) newspaper
-    txt = extract_newspaper(final_url)
-    if txt and len(txt) > 200:
-        return txt, "newspaper3k", status, err, final_url
-    # fallback fetch_url directo
-    txt = extract_trafilatura(None, final_url)
-    if txt and len(txt) > 200:
-        return txt, "trafilatura(fetch_url_2)", status, err, final_url
-    return None, None, status, err, final_url
+    # Con estadísticas, la cascada se reordena (o se acorta) según el dominio
+    domain = domain_key(final_url)
+    order = stats.orden(domain, DEFAULT_ORDER) if stats else DEFAULT_ORDER
+    funcs = dict(EXTRACTORS)
+    executed, winner, result = [], None, None
+    for name in order:
+        t0 = time.perf_counter()
+        txt = funcs[name](html, final_url)
+        ok = bool(txt and len(txt) > 200)
+        if stats:
+            stats.registrar(domain, name, ok, time.perf_counter() - t0)
+        executed.append(name)
+        if ok:
+            winner, result = name, txt
+            break
+    if stats:
+        stats.registrar_url(domain, DEFAULT_ORDER, executed, winner)
+    return result, winner, status, err, final_url
+
+# --- JOURNAL ---
+RESULT_COLS = ["full_text", "extractor_used", "status", "error", "final_url", "text_length"]
+
+def load_journal(path):
+    """Resultados ya guardados: {url_original: {columna: valor}}."""
+    done = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # línea a medio escribir por un corte
+                done[rec["url"]] = rec
+    return done
+
+def append_journal(f, url, result):
+    f.write(json.dumps({"url": url, **result}, ensure_ascii=False) + "\n")
+    f.flush()
 
 # --- MAIN ---
 def main():
     print(f"📂 Leyendo: {INPUT_FILE}")
     df = pd.read_csv(INPUT_FILE)
     session = mk_session()
-
-    df["full_text"] = None
-    df["extractor_used"] = None
-    df["status"] = None
-    df["error"] = None
-    df["final_url"] = None
-    df["text_length"] = 0
-
-    for i, row in enumerate(df.itertuples(index=False), start=1):
-        url = getattr(row, "url_original", None)
-        if not isinstance(url, str) or not url.startswith("http"):
-            df.loc[i-1, "error"] = "invalid_url"
-            continue
-        if is_blacklisted(url):
-            df.loc[i-1, "error"] = "blacklisted_domain"
-            continue
-
-        txt, extractor, status, err, final_url = extract_best(session, url)
-        clean_txt = light_clean(txt)
-        df.loc[i-1, "full_text"] = clean_txt
-        df.loc[i-1, "extractor_used"] = extractor
-        df.loc[i-1, "status"] = status
-        df.loc[i-1, "error"] = err
-        df.loc[i-1, "final_url"] = final_url
-        df.loc[i-1, "text_length"] = len(clean_txt) if clean_txt else 0
-
-        if i % 20 == 0:
-            print(f"[{i}/{len(df)}] {urlparse(url).netloc} → len={len(clean_txt) if clean_txt else 0}")
-        time.sleep(SLEEP_BETWEEN)
-
+    stats = EstadisticasExtractores(STATS_FILE)
+
+    done = load_journal(JOURNAL_FILE)
+    if done:
+        print(f"↻ Retomando: {len(done)} URLs ya procesadas en {JOURNAL_FILE}")
+
+    if os.path.exists(JOURNAL_FILE) and os.path.getsize(JOURNAL_FILE):
+        with open(JOURNAL_FILE, "rb+") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")  # cierra la línea que quedó a medias al cortarse
+
+    results = []
+    with open(JOURNAL_FILE, "a", encoding="utf-8") as journal:
+        for i, row in enumerate(df.itertuples(index=False), start=1):
+            url = getattr(row, "url_original", None)
+            res = dict.fromkeys(RESULT_COLS)
+            res["text_length"] = 0
+            if not isinstance(url, str) or not url.startswith("http"):
+                res["error"] = "invalid_url"
+                results.append(res)
+                continue
+            if is_blacklisted(url):
+                res["error"] = "blacklisted_domain"
+                results.append(res)
+                continue
+            if url in done:
+                results.append({c: done[url].get(c) for c in RESULT_COLS})
+                continue
+
+            txt, extractor, status, err, final_url = extract_best(session, url, stats)
+            clean_txt = light_clean(txt)
+            res.update(full_text=clean_txt, extractor_used=extractor, status=status, error=err,
+                       final_url=final_url, text_length=len(clean_txt) if clean_txt else 0)
+            append_journal(journal, url, res)
+            done[url] = res
+            results.append(res)
+
+            if i % 20 == 0:
+                print(f"[{i}/{len(df)}] {urlparse(url).netloc} → len={len(clean_txt) if clean_txt else 0}")
+                stats.guardar()
+            time.sleep(SLEEP_BETWEEN)
+    stats.guardar()
+
+    # El DataFrame final se monta una sola vez al terminar
+    res_df = pd.DataFrame(results, columns=RESULT_COLS, index=df.index, dtype=object)
+    res_df["text_length"] = res_df["text_length"].astype(int)
+    df = pd.concat([df.drop(columns=RESULT_COLS, errors="ignore"), res_df], axis=1)
     df.to_csv(OUTPUT_FILE, index=False)
+    os.remove(JOURNAL_FILE)
     print(f"\n✅ Guardado: {OUTPUT_FILE}")
     print(df["extractor_used"].value_counts(dropna=False))
     print(df["error"].value_counts(dropna=False).head(10))
+    print("\n⏱️ Tiempo ahorrado por dominio (estimado):")
+    print(stats.informe().head(20).to_string(index=False))
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,243 @@
+# Almacén de artículos indexado por ticker y fecha, para consultas del tipo "todos los artículos
+# de AAPL entre dos instantes" sin cargar el dataset entero ni comparar published_utc como texto.
+#
+# Se construye a partir de una etapa de almacenDatasets (<root>/_articulos/<etapa>/):
+#   - articulos.arrow: las filas de la etapa ordenadas por published_utc, en Arrow IPC sin
+#     comprimir, que se abre con mmap: leer unas filas solo toca las páginas de esas filas.
+#   - epoch.npy: published_utc en segundos (int64), ordenado, una entrada por fila.
+#   - Por cada índice (ticker, domain, source): <índice>_epoch.npy y <índice>_fila.npy, las
+#     (fecha, fila) de todos sus valores agrupadas por valor y ordenadas por fecha dentro de
+#     cada grupo, y en indice.json el tramo [inicio, fin) de cada valor. Una consulta por rango
+#     son dos búsquedas binarias en el tramo del valor, O(log n). Con la etapa
+#     "<etapa>_tickers" (fusionIndices.py) un artículo entra en todos sus tickers.
+#   - indice.json guarda además una huella de los ficheros de la etapa (ruta, tamaño y fecha de
+#     modificación): si la etapa cambia, el almacén se reconstruye solo al abrirlo.
+# Las filas sin fecha no entran en los índices (no salen en las consultas).
+#
+#   almacen = AlmacenArticulos("definitivos_index")
+#   almacen.consultar(tickers=["AAPL"], desde="2025-10-01", hasta="2025-10-08",
+#                     columnas=["published_utc", "headline", "domain"])
+#   almacen.fechas(dominios=["reuters.com"])          # solo los epoch, sin leer filas
+#
+#   python data_processing/procesamiento/crearDatasets/almacenArticulos.py construir definitivos_index
+#   python data_processing/procesamiento/crearDatasets/almacenArticulos.py consultar definitivos_index --ticker AAPL --desde 2025-10-01
+import os, json, shutil, hashlib, pathlib, argparse
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+import almacenDatasets
+
+DEFAULT_PATH = almacenDatasets.DEFAULT_ROOT / "_articulos"
+INDICES = {"ticker": "ticker", "dominio": "domain", "fuente": "source"}
+SIN_FECHA = np.iinfo(np.int64).min
+
+
+def a_epoch(fechas) -> np.ndarray:
+    """published_utc (texto ISO de iso_from_epoch, naive = UTC) en segundos; sin fecha → SIN_FECHA."""
+    t = pd.to_datetime(pd.Series(fechas, dtype=object), errors="coerce", utc=True, format="ISO8601")
+    segundos = t.dt.tz_localize(None).to_numpy(dtype="datetime64[s]").astype(np.int64)
+    return np.where(t.isna().to_numpy(), SIN_FECHA, segundos)
+
+def _segundos(fecha) -> int:
+    ts = pd.Timestamp(fecha)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert("UTC").tz_localize(None)
+    return ts.value // 10 ** 9
+
+def huella(etapa, root=almacenDatasets.DEFAULT_ROOT) -> str:
+    """Digest de los ficheros (ruta, tamaño y mtime en ns) de la etapa y de su relación de
+    tickers. Con el mtime, reescribir una partición con el mismo tamaño también cuenta."""
+    h = hashlib.blake2b(digest_size=16)
+    for e in (etapa, f"{etapa}_tickers"):
+        if almacenDatasets.existe(e, root):
+            ficheros = sorted((pathlib.Path(root) / e).rglob("*.parquet"))
+        elif e in almacenDatasets.ETAPAS:
+            ficheros = [p for _, p in almacenDatasets._ficheros_csv(e)]
+        else:
+            continue
+        for f in ficheros:
+            st = f.stat()
+            nombre = f.relative_to(root).as_posix() if f.is_relative_to(root) else f.name
+            h.update(f"{e}|{nombre}|{st.st_size}|{st.st_mtime_ns}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+def construir(df, path, pares=None, huella_etapa=None):
+    """Escribe el almacén de `df` en `path`. pares: DataFrame (fila, ticker) con tickers
+    adicionales de cada fila de df (además de su columna ticker)."""
+    path = pathlib.Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    epoch = a_epoch(df[almacenDatasets.DATE_COLUMN]) if almacenDatasets.DATE_COLUMN in df else \
+        np.full(len(df), SIN_FECHA, dtype=np.int64)
+    orden = np.argsort(epoch, kind="stable")
+    posicion = np.empty(len(df), dtype=np.int64)
+    posicion[orden] = np.arange(len(df))
+    tabla = pa.Table.from_pandas(df.iloc[orden].reset_index(drop=True), preserve_index=False)
+    with pa.OSFile(str(tmp / "articulos.arrow"), "wb") as f, pa.ipc.new_file(f, tabla.schema) as w:
+        w.write_table(tabla, max_chunksize=64 * 1024)
+    epoch = epoch[orden]
+    np.save(tmp / "epoch.npy", epoch)
+
+    tramos = {}
+    for nombre, columna in INDICES.items():
+        if columna not in df:
+            continue
+        valores = df[columna].astype(object).to_numpy()[orden]
+        filas = np.arange(len(df))
+        if nombre == "ticker" and pares is not None and len(pares):
+            valores = np.concatenate([valores, pares["ticker"].astype(object).to_numpy()])
+            filas = np.concatenate([filas, posicion[pares["fila"].to_numpy(dtype=np.int64)]])
+        ok = pd.notna(valores) & (epoch[filas] != SIN_FECHA)
+        claves = pd.Series(valores[ok]).astype(str)
+        tabla_idx = pd.DataFrame({"clave": claves.to_numpy(), "fila": filas[ok]}).drop_duplicates()
+        # agrupado por valor y, dentro, por fecha (= por fila, que ya va en orden de fecha)
+        tabla_idx = tabla_idx.sort_values(["clave", "fila"], kind="stable")
+        np.save(tmp / f"{nombre}_fila.npy", tabla_idx["fila"].to_numpy(dtype=np.int64))
+        np.save(tmp / f"{nombre}_epoch.npy", epoch[tabla_idx["fila"].to_numpy()])
+        grupos = tabla_idx.groupby("clave", sort=False).size()
+        fin = np.cumsum(grupos.to_numpy())
+        tramos[nombre] = {k: [int(f - n), int(f)] for k, n, f in zip(grupos.index, grupos.to_numpy(), fin)}
+
+    (tmp / "indice.json").write_text(json.dumps({"filas": len(df), "huella": huella_etapa, "tramos": tramos},
+                                                ensure_ascii=False), encoding="utf-8")
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp, path)
+
+
+class AlmacenArticulos:
+    def __init__(self, etapa="definitivos_index", path=None, root=almacenDatasets.DEFAULT_ROOT, actualizar=True):
+        """Abre el almacén de la etapa; con actualizar=True lo (re)construye si no existe o si la
+        etapa ha cambiado desde la última vez."""
+        self.etapa = etapa
+        self.path = pathlib.Path(path) if path is not None else DEFAULT_PATH / etapa
+        if actualizar:
+            h = huella(etapa, root)
+            meta = self.path / "indice.json"
+            if not meta.exists() or json.loads(meta.read_text(encoding="utf-8")).get("huella") != h:
+                df = almacenDatasets.leer(etapa, root=root)
+                pares = None
+                if almacenDatasets.existe(f"{etapa}_tickers", root) and "article_id" in df:
+                    rel = almacenDatasets.leer(f"{etapa}_tickers", columnas=["article_id", "ticker"], root=root)
+                    fila = pd.Series(np.arange(len(df)), index=df["article_id"])
+                    fila = fila[~fila.index.duplicated()]
+                    rel = rel[rel["article_id"].isin(fila.index)]
+                    pares = pd.DataFrame({"fila": fila.loc[rel["article_id"]].to_numpy(),
+                                          "ticker": rel["ticker"].astype(str).to_numpy()})
+                construir(df, self.path, pares, h)
+        self._abrir()
+
+    def _abrir(self):
+        meta = json.loads((self.path / "indice.json").read_text(encoding="utf-8"))
+        self.n_filas, self.tramos = meta["filas"], meta["tramos"]
+        lector = pa.ipc.open_file(pa.memory_map(str(self.path / "articulos.arrow")))
+        self.lotes = [lector.get_batch(i) for i in range(lector.num_record_batches)]
+        self.schema = lector.schema
+        self._inicio_lote = np.cumsum([0] + [b.num_rows for b in self.lotes])
+        self.epoch = np.load(self.path / "epoch.npy", mmap_mode="r")
+        self._idx = {n: (np.load(self.path / f"{n}_epoch.npy", mmap_mode="r"),
+                         np.load(self.path / f"{n}_fila.npy", mmap_mode="r")) for n in self.tramos}
+
+    def __len__(self):
+        return self.n_filas
+
+    def valores(self, indice="ticker") -> list:
+        """Valores de un índice ("ticker", "dominio" o "fuente")."""
+        return sorted(self.tramos[indice])
+
+    # -------------------------------------------------------------- consultas
+
+    def _rango(self, epoch, desde, hasta):
+        ini = np.searchsorted(epoch, SIN_FECHA + 1 if desde is None else _segundos(desde), side="left")
+        fin = len(epoch) if hasta is None else np.searchsorted(epoch, _segundos(hasta), side="left")
+        return ini, max(ini, fin)
+
+    def _filas_indice(self, nombre, valores, desde, hasta):
+        epochs, filas = self._idx[nombre]
+        partes = []
+        for v in valores:
+            tramo = self.tramos[nombre].get(str(v))
+            if tramo is None:
+                continue
+            a, b = tramo
+            ini, fin = self._rango(epochs[a:b], desde, hasta)
+            partes.append(filas[a + ini:a + fin])
+        return np.unique(np.concatenate(partes)) if partes else np.empty(0, dtype=np.int64)
+
+    def filas(self, tickers=None, dominios=None, fuentes=None, desde=None, hasta=None) -> np.ndarray:
+        """Filas (en orden de fecha) de los artículos con published_utc en [desde, hasta) y, si
+        se dan, de alguno de los tickers Y alguno de los dominios Y alguna de las fuentes."""
+        filtros = [(n, v) for n, v in (("ticker", tickers), ("dominio", dominios), ("fuente", fuentes))
+                   if v is not None]
+        if not filtros:
+            ini, fin = self._rango(self.epoch, desde, hasta)
+            return np.arange(ini, fin, dtype=np.int64)
+        out = None
+        for nombre, valores in filtros:
+            if nombre not in self._idx:
+                raise KeyError(f"la etapa '{self.etapa}' no tiene la columna {INDICES[nombre]!r}")
+            valores = [valores] if isinstance(valores, str) else valores
+            f = self._filas_indice(nombre, valores, desde, hasta)
+            out = f if out is None else np.intersect1d(out, f, assume_unique=True)
+        return out
+
+    def contar(self, **filtros) -> int:
+        return len(self.filas(**filtros))
+
+    def fechas(self, **filtros) -> np.ndarray:
+        """published_utc (segundos) de los artículos que cumplen los filtros, sin leer filas."""
+        return np.asarray(self.epoch[self.filas(**filtros)])
+
+    def consultar(self, columnas=None, **filtros) -> pd.DataFrame:
+        """DataFrame con las filas que cumplen los filtros (ver filas()), en orden de fecha. Solo
+        se leen del mmap las columnas pedidas de esas filas."""
+        filas = self.filas(**filtros)
+        columnas = self.schema.names if columnas is None else list(columnas)
+        # take lote a lote: Table.take concatenaría antes los trozos enteros (copia todo el mmap)
+        trozos = []
+        cortes = np.searchsorted(filas, self._inicio_lote)
+        for lote, inicio, a, b in zip(self.lotes, self._inicio_lote, cortes[:-1], cortes[1:]):
+            if b > a:
+                trozos.append(lote.select(columnas).take(pa.array(filas[a:b] - inicio, type=pa.int64())))
+        if not trozos:
+            return almacenDatasets._a_categorias(pa.Table.from_batches([], self.schema).select(columnas).to_pandas())
+        return almacenDatasets._a_categorias(pa.Table.from_batches(trozos).to_pandas())
+
+    def resumen(self) -> str:
+        desde, hasta = (self.epoch[np.searchsorted(self.epoch, SIN_FECHA + 1)], self.epoch[-1]) if len(self) else (0, 0)
+        indices = ", ".join(f"{len(t)} {n}s" for n, t in self.tramos.items())
+        return (f"{self.etapa}: {len(self)} artículos de {pd.Timestamp(desde, unit='s'):%Y-%m-%d} "
+                f"a {pd.Timestamp(hasta, unit='s'):%Y-%m-%d}; {indices}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Almacén de artículos indexado por ticker y fecha")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("construir", help="(re)construye el almacén de una etapa")
+    p.add_argument("etapa", nargs="?", default="definitivos_index")
+    p = sub.add_parser("consultar", help="artículos de un rango")
+    p.add_argument("etapa", nargs="?", default="definitivos_index")
+    p.add_argument("--ticker", nargs="*")
+    p.add_argument("--dominio", nargs="*")
+    p.add_argument("--fuente", nargs="*")
+    p.add_argument("--desde")
+    p.add_argument("--hasta")
+    p.add_argument("--columnas", nargs="*", default=["published_utc", "ticker", "domain", "headline"])
+    args = parser.parse_args()
+
+    if args.cmd == "construir":
+        shutil.rmtree(DEFAULT_PATH / args.etapa, ignore_errors=True)
+        print(f"✓ {AlmacenArticulos(args.etapa).resumen()}")
+    else:
+        almacen = AlmacenArticulos(args.etapa)
+        df = almacen.consultar(columnas=args.columnas, tickers=args.ticker, dominios=args.dominio,
+                               fuentes=args.fuente, desde=args.desde, hasta=args.hasta)
+        with pd.option_context("display.max_rows", 50, "display.width", 200, "display.max_colwidth", 80):
+            print(df)
+        print(f"{len(df)} artículos")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+# Almacén en Parquet de los datasets de porEmpresas (raw, urlsFinales, definitivos e INDEX_ALL).
+# Lo usan finnhub.py, modificarURLs.py, scrapperTextos.py, unirFinales.py, pruebaFiltro.py,
+# tagClassification.py y los notebooks de preprocesamiento, en lugar de los CSV.
+#
+# Cada etapa es un dataset Parquet particionado por ticker y mes de publicación:
+#   <root>/<etapa>/ticker=AAPL/mes=2025-10/part-….parquet
+#   <root>/<etapa>/_esquema.json          orden de columnas y contador de escrituras
+# ticker, source y domain se leen como categorías (diccionario), y al leer se puede pedir
+# solo algunas columnas y filtrar por ticker / fecha / cualquier expresión de pyarrow: los
+# filtros se aplican sobre las particiones y las estadísticas de cada fichero, sin cargar
+# el resto. Las filas se devuelven en el orden en que se escribieron.
+# Los índices (raw_index, definitivos_index) y su relación artículo↔ticker
+# (<índice>_tickers) los escribe fusionIndices.py.
+#
+# Si una etapa todavía no se ha migrado, leer() cae a los CSV de siempre (mismo resultado).
+# Migración y utilidades:
+#   python data_processing/procesamiento/crearDatasets/almacenDatasets.py migrar
+#   python data_processing/procesamiento/crearDatasets/almacenDatasets.py info
+#   python data_processing/procesamiento/crearDatasets/almacenDatasets.py compactar raw raw_index
+#   python data_processing/procesamiento/crearDatasets/almacenDatasets.py exportar definitivos_index salida.csv
+import re, json, uuid, shutil, pathlib, argparse
+from urllib.parse import quote, unquote
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+POR_EMPRESAS = pathlib.Path(__file__).resolve().parents[2] / "finnhubAPI" / "data" / "porEmpresas"
+DEFAULT_ROOT = POR_EMPRESAS / "parquet"
+
+# etapa -> (carpeta, nombre del CSV antiguo) para leer los CSV sin migrar y para migrarlos
+ETAPAS = {
+    "raw": ("raw", "{ticker}.csv"),
+    "raw_index": ("raw", "INDEX_ALL.csv"),
+    "urlsFinales": ("urlsFinales", "{ticker}_orig.csv"),
+    "definitivos": ("definitivos", "{ticker}_scrapped_filtrado.csv"),
+    "definitivos_index": ("definitivos", "INDEX_ALL_scrapped_filtrado.csv"),
+}
+
+DATE_COLUMN = "published_utc"
+DICT_COLUMNS = ["ticker", "source", "domain"]
+ORDER_COLUMN = "_orden"         # posición de escritura (lote << 32 | fila), no se devuelve
+PARTITIONING = ds.partitioning(pa.schema([("ticker", pa.string()), ("mes", pa.string())]), flavor="hive")
+WRITE_OPTIONS = ds.ParquetFileFormat().make_write_options(compression="zstd")
+
+
+def _esquema_path(base):
+    return base / "_esquema.json"
+
+def _leer_esquema(base):
+    p = _esquema_path(base)
+    return json.loads(p.read_text(encoding="utf-8")) if p.exists() else {"columnas": [], "lotes": 0}
+
+def existe(etapa, root=DEFAULT_ROOT) -> bool:
+    return _esquema_path(pathlib.Path(root) / etapa).exists()
+
+
+# ---------------------------------------------------------------- escritura
+
+def _preparar(df, lote):
+    out = df.reset_index(drop=True).copy()
+    for c in ["ticker", "source", "domain"]:
+        if c in out:
+            out[c] = out[c].astype(object).where(out[c].notna(), None)
+    for c in out.columns:
+        # columnas vacías (p.ej. `error` sin ningún error): tipo nulo, compatible con cualquiera
+        if out[c].dtype != object and out[c].isna().all():
+            out[c] = pd.Series([None] * len(out), dtype=object)
+    if DATE_COLUMN in out:
+        fechas = out[DATE_COLUMN].astype(object)
+        out["mes"] = fechas.where(fechas.isna(), fechas.astype(str).str[:7])
+    else:
+        out["mes"] = None
+    out[ORDER_COLUMN] = (lote << 32) + pd.RangeIndex(len(out)).to_numpy(dtype="int64")
+    return out
+
+def _escribir(df, base):
+    if "ticker" not in df:
+        raise ValueError("el DataFrame necesita la columna 'ticker' para particionar")
+    base.mkdir(parents=True, exist_ok=True)
+    esquema = _leer_esquema(base)
+    esquema["columnas"] += [c for c in df.columns if c not in esquema["columnas"]]
+    lote = esquema["lotes"]
+    esquema["lotes"] = lote + 1
+    if len(df):
+        table = pa.Table.from_pandas(_preparar(df, lote), preserve_index=False)
+        table = table.replace_schema_metadata(None)
+        ds.write_dataset(table, base, format="parquet", partitioning=PARTITIONING,
+                         basename_template=f"part-{uuid.uuid4().hex[:12]}-{{i}}.parquet",
+                         existing_data_behavior="overwrite_or_ignore", file_options=WRITE_OPTIONS,
+                         max_rows_per_group=64 * 1024)
+    _esquema_path(base).write_text(json.dumps(esquema, indent=2, ensure_ascii=False), encoding="utf-8")
+
+def _dir_ticker(base, ticker):
+    if ticker is None or pd.isna(ticker):
+        return base / "ticker=__HIVE_DEFAULT_PARTITION__"
+    return base / f"ticker={quote(str(ticker), safe='')}"
+
+def guardar(df, etapa, completo=False, root=DEFAULT_ROOT):
+    """Guarda `df` en la etapa. Sustituye por completo las particiones de los tickers
+    que aparecen en `df` (el resto de tickers se conserva); con completo=True sustituye
+    la etapa entera."""
+    base = pathlib.Path(root) / etapa
+    if completo:
+        shutil.rmtree(base, ignore_errors=True)
+    elif "ticker" in df:
+        for t in df["ticker"].astype(object).unique():
+            shutil.rmtree(_dir_ticker(base, t), ignore_errors=True)
+    _escribir(df, base)
+
+def anadir(df, etapa, root=DEFAULT_ROOT):
+    """Añade las filas de `df` a la etapa sin tocar lo que ya había (ingesta incremental)."""
+    _escribir(df, pathlib.Path(root) / etapa)
+
+
+# ---------------------------------------------------------------- lectura
+
+def _iso(x):
+    return x if isinstance(x, str) else pd.Timestamp(x).isoformat()
+
+def _expresion(tickers=None, desde=None, hasta=None, filtro=None, particiones=True):
+    """Filtro de pyarrow. Fechas: desde inclusive, hasta exclusive (texto ISO o fecha)."""
+    expr = None
+    def y(e):
+        nonlocal expr
+        expr = e if expr is None else expr & e
+    if tickers is not None:
+        y(ds.field("ticker").isin([str(t) for t in tickers]))
+    if desde is not None:
+        if particiones:
+            y(ds.field("mes") >= _iso(desde)[:7])
+        y(ds.field(DATE_COLUMN) >= _iso(desde))
+    if hasta is not None:
+        if particiones:
+            y(ds.field("mes") <= _iso(hasta)[:7])
+        y(ds.field(DATE_COLUMN) < _iso(hasta))
+    if filtro is not None:
+        y(filtro)
+    return expr
+
+def _unificar(schemas):
+    """Esquema común de todos los ficheros; si dos escrituras guardaron una columna con
+    tipos incompatibles (número en una, texto en otra) esa columna se lee como texto."""
+    try:
+        return pa.unify_schemas(schemas, promote_options="permissive")
+    except (pa.ArrowTypeError, pa.ArrowInvalid):
+        fields = {}
+        for schema in schemas:
+            for f in schema:
+                prev = fields.get(f.name)
+                if prev is None:
+                    fields[f.name] = f
+                    continue
+                try:
+                    fields[f.name] = pa.unify_schemas([pa.schema([prev]), pa.schema([f])],
+                                                      promote_options="permissive").field(0)
+                except (pa.ArrowTypeError, pa.ArrowInvalid):
+                    fields[f.name] = pa.field(f.name, pa.string())
+        return pa.schema(list(fields.values()))
+
+def _dataset(base):
+    files = sorted(base.rglob("*.parquet"))
+    if not files:
+        return None
+    schemas = [pq.read_schema(f).remove_metadata() for f in files] + [PARTITIONING.schema]
+    schema = _unificar(schemas)
+    dict_cols = [c for c in DICT_COLUMNS if c in schema.names and c != "ticker"]
+    for c in dict_cols:
+        schema = schema.set(schema.get_field_index(c), pa.field(c, pa.dictionary(pa.int32(), pa.string())))
+    fmt = ds.ParquetFileFormat(read_options=ds.ParquetReadOptions(dictionary_columns=dict_cols))
+    return ds.dataset([str(f) for f in files], schema=schema, format=fmt,
+                      partitioning=PARTITIONING, partition_base_dir=str(base))
+
+def _a_categorias(df):
+    for c in DICT_COLUMNS:
+        if c in df and not isinstance(df[c].dtype, pd.CategoricalDtype):
+            df[c] = df[c].astype("category")
+    return df
+
+def leer(etapa, columnas=None, tickers=None, desde=None, hasta=None, filtro=None,
+         root=DEFAULT_ROOT, csv_root=POR_EMPRESAS) -> pd.DataFrame:
+    """
+    Lee una etapa. columnas: solo esas columnas (proyección); tickers: lista de tickers;
+    desde/hasta: rango de published_utc [desde, hasta); filtro: expresión de
+    pyarrow.dataset (p.ej. ds.field("source") == "Yahoo"). Todo se empuja al lector.
+    """
+    base = pathlib.Path(root) / etapa
+    if not existe(etapa, root):
+        return _leer_csv(etapa, columnas, tickers, desde, hasta, filtro, csv_root)
+    orden_cols = _leer_esquema(base)["columnas"]
+    wanted = list(columnas) if columnas is not None else orden_cols
+    dataset = _dataset(base)
+    if dataset is None:
+        return pd.DataFrame(columns=wanted)
+    missing = [c for c in wanted if c not in dataset.schema.names]
+    if missing:
+        raise KeyError(f"columnas inexistentes en '{etapa}': {missing}")
+    table = dataset.to_table(columns=wanted + [ORDER_COLUMN],
+                             filter=_expresion(tickers, desde, hasta, filtro))
+    df = table.to_pandas()
+    df = df.sort_values(ORDER_COLUMN, kind="stable").drop(columns=ORDER_COLUMN).reset_index(drop=True)
+    return _a_categorias(df)
+
+def _ficheros_csv(etapa, csv_root=POR_EMPRESAS):
+    """[(ticker del nombre o None, ruta)] de los CSV antiguos de la etapa, por nombre."""
+    carpeta, patron = ETAPAS[etapa]
+    regex = re.compile(re.escape(patron).replace(r"\{ticker\}", r"(?P<ticker>[^_]+)") + "$")
+    out = []
+    for p in sorted((pathlib.Path(csv_root) / carpeta).glob("*.csv")):
+        m = regex.match(p.name)
+        if m:
+            out.append((m.groupdict().get("ticker"), p))
+    return out
+
+def _filtrar(df, expr, columnas):
+    if expr is not None:
+        mask = ds.dataset(pa.Table.from_pandas(df, preserve_index=False)).to_table(
+            columns={"m": expr}).column("m").to_numpy(zero_copy_only=False)
+        df = df[mask.astype(bool)].reset_index(drop=True)
+    if columnas is not None:
+        df = df[list(columnas)]
+    return _a_categorias(df)
+
+def _ficheros_etapa(etapa, csv_root):
+    if etapa not in ETAPAS:
+        raise FileNotFoundError(f"no hay datos de '{etapa}' en Parquet (y no tiene CSV antiguo)")
+    files = _ficheros_csv(etapa, csv_root)
+    if not files:
+        raise FileNotFoundError(f"no hay datos de '{etapa}' ni en Parquet ni en CSV")
+    return files
+
+def _leer_csv(etapa, columnas, tickers, desde, hasta, filtro, csv_root):
+    frames = [pd.read_csv(p) for _, p in _ficheros_etapa(etapa, csv_root)]
+    df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+    return _filtrar(df, _expresion(tickers, desde, hasta, filtro, particiones=False), columnas)
+
+def leer_lotes(etapa, columnas=None, tickers=None, desde=None, hasta=None, filtro=None,
+               filas_por_lote=10_000, root=DEFAULT_ROOT, csv_root=POR_EMPRESAS):
+    """
+    Como leer(), pero va devolviendo DataFrames de como mucho `filas_por_lote` filas sin
+    cargar la etapa entera. El orden es el de los ficheros (ticker, mes), no el de escritura.
+    """
+    base = pathlib.Path(root) / etapa
+    if not existe(etapa, root):
+        expr = _expresion(tickers, desde, hasta, filtro, particiones=False)
+        for _, p in _ficheros_etapa(etapa, csv_root):
+            for chunk in pd.read_csv(p, chunksize=filas_por_lote):
+                chunk = _filtrar(chunk, expr, columnas)
+                if len(chunk):
+                    yield chunk
+        return
+    dataset = _dataset(base)
+    if dataset is None:
+        return
+    wanted = list(columnas) if columnas is not None else _leer_esquema(base)["columnas"]
+    for batch in dataset.to_batches(columns=wanted, filter=_expresion(tickers, desde, hasta, filtro),
+                                    batch_size=filas_por_lote):
+        if batch.num_rows:
+            yield _a_categorias(batch.to_pandas())
+
+def tickers(etapa, root=DEFAULT_ROOT, csv_root=POR_EMPRESAS) -> list:
+    """Tickers con datos en la etapa."""
+    base = pathlib.Path(root) / etapa
+    if existe(etapa, root):
+        names = [p.name.split("=", 1)[1] for p in base.glob("ticker=*")]
+        return sorted(unquote(n) for n in names if n != "__HIVE_DEFAULT_PARTITION__")
+    return sorted(leer(etapa, columnas=["ticker"], csv_root=csv_root)["ticker"].dropna().astype(str).unique())
+
+
+# ---------------------------------------------------------------- utilidades
+
+def compactar(etapa, tickers=None, root=DEFAULT_ROOT) -> int:
+    """Junta en un solo fichero los part-….parquet de cada partición (ticker, mes) que tenga
+    varios (cada anadir() escribe uno nuevo por partición). Se conserva _orden, así que leer()
+    devuelve lo mismo. Devuelve cuántos ficheros se han quitado."""
+    base = pathlib.Path(root) / etapa
+    if not existe(etapa, root):
+        return 0
+    dirs = [_dir_ticker(base, t) for t in tickers] if tickers is not None else sorted(base.glob("ticker=*"))
+    quitados = 0
+    for d in dirs:
+        for hoja in sorted({f.parent for f in d.rglob("*.parquet")}):
+            files = sorted(hoja.glob("*.parquet"))
+            if len(files) < 2:
+                continue
+            try:
+                table = pa.concat_tables([pq.ParquetFile(f).read() for f in files], promote_options="permissive")
+            except (pa.ArrowTypeError, pa.ArrowInvalid):
+                continue    # tipos incompatibles entre escrituras: la partición se queda como está
+            table = table.sort_by(ORDER_COLUMN).replace_schema_metadata(None)
+            # se escribe con otra extensión y se renombra: si se corta, leer() no ve un fichero a medias
+            tmp = hoja / f"part-{uuid.uuid4().hex[:12]}-0.parquet.tmp"
+            pq.write_table(table, tmp, compression="zstd", row_group_size=64 * 1024)
+            tmp.rename(tmp.with_suffix(""))
+            for f in files:
+                f.unlink()
+            quitados += len(files) - 1
+    return quitados
+
+def migrar(etapas=None, root=DEFAULT_ROOT, csv_root=POR_EMPRESAS):
+    """Convierte los CSV antiguos a Parquet, un lote por fichero (mismo orden de filas)."""
+    for etapa in etapas or ETAPAS:
+        files = _ficheros_csv(etapa, csv_root)
+        if not files:
+            print(f"   - {etapa}: sin CSV, se omite")
+            continue
+        shutil.rmtree(pathlib.Path(root) / etapa, ignore_errors=True)
+        n = 0
+        for _, p in files:
+            df = pd.read_csv(p)
+            anadir(df, etapa, root)
+            n += len(df)
+        print(f"   ✓ {etapa}: {len(files)} CSV, {n} filas → {pathlib.Path(root) / etapa}")
+
+def exportar_csv(etapa, path, root=DEFAULT_ROOT):
+    leer(etapa, root=root).to_csv(path, index=False)
+
+def tamano(etapa, root=DEFAULT_ROOT) -> int:
+    return sum(f.stat().st_size for f in (pathlib.Path(root) / etapa).rglob("*.parquet"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("migrar", help="convierte los CSV de porEmpresas a Parquet")
+    p.add_argument("etapas", nargs="*", help=f"por defecto todas: {', '.join(ETAPAS)}")
+    sub.add_parser("info", help="filas y tamaño de cada etapa")
+    p = sub.add_parser("compactar", help="un fichero por partición (ticker, mes)")
+    p.add_argument("etapas", nargs="+")
+    p = sub.add_parser("exportar", help="vuelca una etapa a CSV")
+    p.add_argument("etapa", choices=list(ETAPAS))
+    p.add_argument("destino")
+    args = parser.parse_args()
+
+    if args.cmd == "migrar":
+        desconocidas = set(args.etapas) - set(ETAPAS)
+        if desconocidas:
+            parser.error(f"etapas desconocidas: {sorted(desconocidas)}")
+        migrar(args.etapas or None)
+    elif args.cmd == "info":
+        for etapa in ETAPAS:
+            if existe(etapa):
+                n = len(leer(etapa, columnas=["ticker"]))
+                print(f"{etapa:<20}{n:>8} filas{tamano(etapa) / 1e6:>10.1f} MB")
+            else:
+                print(f"{etapa:<20}  (sin migrar)")
+    elif args.cmd == "compactar":
+        for etapa in args.etapas:
+            print(f"✓ {etapa}: {compactar(etapa)} ficheros menos")
+    elif args.cmd == "exportar":
+        exportar_csv(args.etapa, args.destino)
+        print(f"✓ {args.etapa} → {args.destino}")
@@ -0,0 +1,70 @@
+# Almacén local de HTML crudo, direccionado por contenido.
+# modificarURLs.py guarda aquí cada página que descarga al resolver la URL original y
+# scrapperTextos.py extrae el texto desde aquí, sin volver a descargarla. Así se puede
+# repetir la extracción (otros ERROR_ARTIFACTS, otros parámetros de trafilatura) sin red.
+#
+# Estructura:
+#   <root>/objetos/ab/abcdef….html.gz   HTML comprimido, nombre = sha256 del contenido
+#   <root>/indice.sqlite                URL (final y original) → sha256
+import os, gzip, time, hashlib, pathlib, sqlite3, threading
+
+DEFAULT_ROOT = pathlib.Path(__file__).resolve().parents[2] / "finnhubAPI" / "data" / "html_raw"
+
+
+class AlmacenHTML:
+    def __init__(self, root=DEFAULT_ROOT, commit_every=50):
+        self.root = pathlib.Path(root)
+        (self.root / "objetos").mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.commit_every = commit_every
+        self.conn = sqlite3.connect(str(self.root / "indice.sqlite"), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, sha256 TEXT NOT NULL, ts REAL NOT NULL)")
+        self.conn.commit()
+
+    def _path(self, h: str) -> pathlib.Path:
+        return self.root / "objetos" / h[:2] / f"{h}.html.gz"
+
+    def put(self, html: bytes, urls) -> str:
+        """Guarda `html` (si no estaba ya) y lo asocia a cada URL de `urls`. Devuelve su sha256."""
+        h = hashlib.sha256(html).hexdigest()
+        path = self._path(h)
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(gzip.compress(html, compresslevel=6))
+            os.replace(tmp, path)
+        now = time.time()
+        with self._lock:
+            self.conn.executemany("INSERT OR REPLACE INTO urls VALUES (?, ?, ?)",
+                                  [(u, h, now) for u in dict.fromkeys(urls) if u])
+            self._pending += 1
+            if self._pending >= self.commit_every:
+                self.conn.commit()
+                self._pending = 0
+        return h
+
+    def _hash_of(self, url: str):
+        with self._lock:
+            row = self.conn.execute("SELECT sha256 FROM urls WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def has(self, url: str) -> bool:
+        h = self._hash_of(url)
+        return h is not None and self._path(h).exists()
+
+    def get(self, url: str):
+        """HTML (bytes) guardado para `url`, o None."""
+        h = self._hash_of(url)
+        if h is None:
+            return None
+        try:
+            return gzip.decompress(self._path(h).read_bytes())
+        except FileNotFoundError:
+            return None
+
+    def close(self):
+        with self._lock:
+            self.conn.commit()
+            self.conn.close()
@@ -0,0 +1,88 @@
+# Benchmark del almacén Parquet frente a los CSV de porEmpresas: tamaño en disco y tiempo
+# de carga (todo, solo las columnas que usa el EDA, y un ticker + rango de fechas).
+# Migra las etapas a un directorio temporal, así que no toca el almacén real. Se repite con
+# los CSV replicados ESCALA veces para ver cómo crece cada formato (las filas repetidas
+# comprimen mejor que las reales, así que el tamaño en Parquet a escala sale optimista).
+# Ejecuta desde la raíz del repo:
+#   python data_processing/procesamiento/crearDatasets/benchmarkAlmacen.py
+import time, tempfile
+import pandas as pd
+
+import almacenDatasets as ad
+
+# ============ CONFIG ============
+REPETICIONES = 5
+COLUMNAS_EDA = ["ticker", "headline", "summary", "article_text"]
+TICKER, DESDE, HASTA = "AAPL", "2025-10-01", "2025-10-08"
+ESCALAS = [1, 10]
+# =================================
+
+def best_of(fn):
+    best = float("inf")
+    for _ in range(REPETICIONES):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+def csv_completo(etapa, csv_root):
+    return pd.concat([pd.read_csv(p) for _, p in ad._ficheros_csv(etapa, csv_root)], ignore_index=True)
+
+def csv_columnas(etapa, cols, csv_root):
+    return pd.concat([pd.read_csv(p, usecols=cols) for _, p in ad._ficheros_csv(etapa, csv_root)],
+                     ignore_index=True)
+
+def csv_filtrado(etapa, csv_root):
+    df = csv_completo(etapa, csv_root)
+    return df[(df["ticker"] == TICKER) & (df["published_utc"] >= DESDE) & (df["published_utc"] < HASTA)]
+
+def replicar(etapas, escala, destino):
+    """Copia los CSV de las etapas con cada fila repetida `escala` veces."""
+    for etapa in etapas:
+        for _, p in ad._ficheros_csv(etapa):
+            out = destino / p.parent.name / p.name
+            out.parent.mkdir(parents=True, exist_ok=True)
+            df = pd.read_csv(p)
+            pd.concat([df] * escala, ignore_index=True).to_csv(out, index=False)
+
+def run(etapas, escala, tmp):
+    csv_root = ad.POR_EMPRESAS
+    if escala > 1:
+        csv_root = tmp / f"csv_x{escala}"
+        replicar(etapas, escala, csv_root)
+    root = tmp / f"parquet_x{escala}"
+    ad.migrar(etapas, root=root, csv_root=csv_root)
+
+    print(f"\n=== escala x{escala} ===")
+    print(f"{'etapa':<14}{'consulta':<20}{'CSV (s)':>10}{'Parquet (s)':>13}{'x':>7}")
+    for etapa in etapas:
+        cols = [c for c in COLUMNAS_EDA if c in ad._leer_esquema(root / etapa)["columnas"]]
+        consultas = [
+            ("completa", lambda: csv_completo(etapa, csv_root), lambda: ad.leer(etapa, root=root)),
+            (f"{len(cols)} columnas", lambda: csv_columnas(etapa, cols, csv_root),
+             lambda: ad.leer(etapa, columnas=cols, root=root)),
+            (f"{TICKER} {DESDE[5:]}→{HASTA[5:]}", lambda: csv_filtrado(etapa, csv_root),
+             lambda: ad.leer(etapa, tickers=[TICKER], desde=DESDE, hasta=HASTA, root=root)),
+        ]
+        for nombre, f_csv, f_pq in consultas:
+            t_csv, a = best_of(f_csv)
+            t_pq, b = best_of(f_pq)
+            assert len(a) == len(b), f"{etapa}/{nombre}: {len(a)} vs {len(b)} filas"
+            print(f"{etapa:<14}{nombre:<20}{t_csv:>10.3f}{t_pq:>13.3f}{t_csv / t_pq:>7.1f}")
+
+    print(f"{'etapa':<14}{'CSV (MB)':>10}{'Parquet (MB)':>14}")
+    for etapa in etapas:
+        csv_mb = sum(p.stat().st_size for _, p in ad._ficheros_csv(etapa, csv_root)) / 1e6
+        print(f"{etapa:<14}{csv_mb:>10.1f}{ad.tamano(etapa, root) / 1e6:>14.1f}")
+
+def main():
+    tmp = ad.pathlib.Path(tempfile.mkdtemp(prefix="almacen_bench_"))
+    etapas = [e for e in ad.ETAPAS if ad._ficheros_csv(e)]
+    try:
+        for escala in ESCALAS:
+            run(etapas, escala, tmp)
+    finally:
+        ad.shutil.rmtree(tmp, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
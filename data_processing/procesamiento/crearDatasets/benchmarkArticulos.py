@@ -0,0 +1,130 @@
+# Benchmark de almacenArticulos: "artículos de un ticker entre dos instantes" como se hacía
+# (pd.read_csv del CSV del ticker y comparar published_utc como texto), con almacenDatasets.leer
+# (Parquet con filtros de ticker / fecha empujados al lector) y con el almacén indexado (dos
+# búsquedas binarias + leer por mmap solo esas filas). Las tres dan las mismas filas.
+# Después, el almacén sobre un corpus sintético ESCALA veces mayor (copias con las fechas
+# desplazadas hacia atrás) frente a filtrar con máscaras de pandas el DataFrame en memoria: el
+# coste del almacén depende de las filas devueltas, no del tamaño del corpus.
+# Ejecuta desde la raíz del repo:
+#   python data_processing/procesamiento/crearDatasets/benchmarkArticulos.py
+import time, random, tempfile, pathlib
+import numpy as np
+import pandas as pd
+
+import almacenDatasets
+import almacenArticulos as aa
+
+# ============ CONFIG ============
+ETAPA = "definitivos"
+N_CONSULTAS = 200
+ESCALA = 50
+COLUMNAS = ["ticker", "published_utc", "headline", "domain", "url_final"]
+# =================================
+
+def ventanas(df, tickers, n, rng):
+    """(ticker, desde, hasta) al azar: uno de los tickers y de 1 a 14 días que acaban en una
+    fecha con artículos."""
+    fechas = pd.to_datetime(df["published_utc"]).dt.floor("D").drop_duplicates().tolist()
+    out = []
+    for _ in range(n):
+        fin = rng.choice(fechas) + pd.Timedelta(days=1)
+        out.append((rng.choice(tickers), (fin - pd.Timedelta(days=rng.randint(1, 14))).isoformat(), fin.isoformat()))
+    return out
+
+def percentiles(tiempos):
+    ms = np.array(tiempos) * 1000
+    return f"p50 {np.percentile(ms, 50):8.2f} ms  p99 {np.percentile(ms, 99):8.2f} ms"
+
+def medir(funcion, consultas):
+    t, out = [], []
+    for c in consultas:
+        t0 = time.perf_counter()
+        out.append(funcion(*c))
+        t.append(time.perf_counter() - t0)
+    return percentiles(t), out
+
+def claves(df):
+    return sorted(zip(df["url_final"].astype(str), df["published_utc"].astype(str)))
+
+def main():
+    rng = random.Random(0)
+    df = almacenDatasets.leer(ETAPA)
+    # los tickers con CSV propio (RANDOM_… mezcla varios)
+    csv = {t: p for t, p in almacenDatasets._ficheros_csv(ETAPA) if t in set(df["ticker"].astype(str))}
+    consultas = ventanas(df, sorted(csv), N_CONSULTAS, rng)
+
+    def con_csv(t, desde, hasta):
+        d = pd.read_csv(csv[t])
+        return d[(d["published_utc"] >= desde) & (d["published_utc"] < hasta)][COLUMNAS]
+
+    def con_parquet(t, desde, hasta):
+        return almacenDatasets.leer(ETAPA, columnas=COLUMNAS, tickers=[t], desde=desde, hasta=hasta)
+
+    directorio = pathlib.Path(tempfile.mkdtemp())
+    t0 = time.perf_counter()
+    almacen = aa.AlmacenArticulos(ETAPA, path=directorio / ETAPA)
+    print(f"construir: {time.perf_counter() - t0:.2f}s. {almacen.resumen()}")
+    t0 = time.perf_counter()
+    almacen = aa.AlmacenArticulos(ETAPA, path=directorio / ETAPA)
+    print(f"abrir (ya construido, comprobando la huella): {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+    def con_almacen(t, desde, hasta):
+        return almacen.consultar(columnas=COLUMNAS, tickers=[t], desde=desde, hasta=hasta)
+
+    resultados = {}
+    for nombre, funcion in (("CSV + texto", con_csv), ("almacenDatasets.leer", con_parquet),
+                            ("almacenArticulos", con_almacen)):
+        tiempos, resultados[nombre] = medir(funcion, consultas)
+        print(f"{nombre:<28}{tiempos}")
+    for a, b, c in zip(*resultados.values()):
+        assert claves(a) == claves(b) == claves(c)
+    print(f"✓ mismas filas en las {len(consultas)} consultas "
+          f"({np.mean([len(r) for r in resultados['almacenArticulos']]):.0f} filas de media)")
+    r = resultados["almacenArticulos"][0]
+    assert r["published_utc"].is_monotonic_increasing
+
+    # índice secundario por dominio / fuente
+    epoch = aa.a_epoch(df["published_utc"])
+    for dominio, fuente, desde in (("yahoo.com", None, "2025-10-01"), ("fool.com", "Yahoo", None), (None, "MarketWatch", None)):
+        mascara = np.ones(len(df), dtype=bool)
+        if dominio:
+            mascara &= (df["domain"] == dominio).to_numpy()
+        if fuente:
+            mascara &= (df["source"] == fuente).to_numpy()
+        if desde:
+            mascara &= epoch >= aa._segundos(desde)
+        obtenido = almacen.consultar(columnas=COLUMNAS, dominios=[dominio] if dominio else None,
+                                     fuentes=[fuente] if fuente else None, desde=desde)
+        assert claves(obtenido) == claves(df[mascara]), (dominio, fuente, desde)
+    print("✓ consultas por dominio / fuente iguales que con pandas")
+
+    # corpus sintético: el almacén frente a máscaras de pandas en memoria
+    span = int(epoch.max() - epoch.min()) + 86400
+    copias = []
+    for c in range(ESCALA):
+        copia = df.copy()
+        fechas = pd.to_datetime(df["published_utc"]) - pd.Timedelta(seconds=span * c)
+        copia["published_utc"] = fechas.dt.strftime("%Y-%m-%dT%H:%M:%S")
+        copias.append(copia)
+    grande = pd.concat(copias, ignore_index=True)
+    t0 = time.perf_counter()
+    aa.construir(grande, directorio / "sintetico")
+    print(f"\n=== sintético ×{ESCALA}: {len(grande)} filas (construir {time.perf_counter() - t0:.1f}s)")
+    sint = aa.AlmacenArticulos(ETAPA, path=directorio / "sintetico", actualizar=False)
+    tick = grande["ticker"].astype(str).to_numpy()
+
+    def con_pandas(t, desde, hasta):
+        f = grande["published_utc"]
+        return grande[(tick == t) & (f >= desde).to_numpy() & (f < hasta).to_numpy()][COLUMNAS]
+
+    t_pd, r_pd = medir(con_pandas, consultas)
+    t_al, r_al = medir(lambda t, d, h: sint.consultar(columnas=COLUMNAS, tickers=[t], desde=d, hasta=h), consultas)
+    t_fi, _ = medir(lambda t, d, h: sint.filas(tickers=[t], desde=d, hasta=h), consultas)
+    for a, b in zip(r_pd, r_al):
+        assert claves(a) == claves(b)
+    print(f"{'pandas en memoria':<28}{t_pd}")
+    print(f"{'almacenArticulos':<28}{t_al}")
+    print(f"{'  solo filas (búsqueda)':<28}{t_fi}")
+
+if __name__ == "__main__":
+    main()
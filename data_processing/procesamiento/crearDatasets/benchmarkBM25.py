@@ -0,0 +1,148 @@
+# Benchmark de indiceBM25: latencia de búsqueda frente a "grep" en pandas (str.contains de
+# todos los términos sobre headline + summary + article_text ya cargados), sobre el corpus de
+# definitivos y sobre uno sintético ESCALA veces mayor (cada copia pierde un 1% de palabras al
+# azar y cambia de clave). Comprueba además:
+#   - puntuaciones iguales que BM25 calculado a mano sobre la matriz documento × término;
+#   - filtros de ticker y fecha iguales que filtrar en pandas;
+#   - indexar en N_LOTES llamadas (con compactación) da lo mismo que en una sola.
+# Ejecuta desde la raíz del repo:
+#   python data_processing/procesamiento/crearDatasets/benchmarkBM25.py
+import time, random, tempfile, pathlib
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import CountVectorizer
+
+import almacenDatasets
+import indiceBM25 as ib
+
+# ============ CONFIG ============
+ETAPA = "definitivos"
+ESCALAS = [1, 10]
+N_CONSULTAS = 200
+N_LOTES = 5
+# =================================
+
+def consultas(df, n, rng):
+    """Consultas de 1 a 3 palabras sacadas de los titulares."""
+    out = []
+    while len(out) < n:
+        toks = ib.analizar(df["headline"].iloc[rng.randrange(len(df))] or "")
+        if toks:
+            out.append(" ".join(rng.sample(toks, min(len(toks), rng.randint(1, 3)))))
+    return out
+
+def sintetico(df, escala, rng):
+    copias = [df.assign(article_id=[f"{i}" for i in range(len(df))])]
+    for c in range(1, escala):
+        def perder(t):
+            if not isinstance(t, str):
+                return t
+            return " ".join(w for w in t.split() if rng.random() >= 0.01)
+        copias.append(df.assign(article_id=[f"{i}-{c}" for i in range(len(df))],
+                                article_text=df["article_text"].map(perder)))
+    return pd.concat(copias, ignore_index=True)
+
+def bm25_referencia(textos, consulta, k1=ib.K1, b=ib.B):
+    X = CountVectorizer(analyzer=ib.analizar).fit(textos)
+    M = X.transform(textos).tocsc().astype(np.float64)
+    dl = np.asarray(M.sum(axis=1)).ravel()
+    avgdl = dl.mean()
+    s = np.zeros(M.shape[0])
+    for t, veces in pd.Series(ib.analizar(consulta), dtype=object).value_counts().items():
+        j = X.vocabulary_.get(t)
+        if j is None:
+            continue
+        col = M[:, j].toarray().ravel()
+        n_t = (col > 0).sum()
+        idf = np.log1p((M.shape[0] - n_t + 0.5) / (n_t + 0.5))
+        s += veces * idf * col * (k1 + 1) / (col + k1 * (1 - b + b * dl / avgdl))
+    return s
+
+def percentiles(tiempos):
+    ms = np.array(tiempos) * 1000
+    return f"p50 {np.percentile(ms, 50):8.2f} ms  p99 {np.percentile(ms, 99):8.2f} ms"
+
+def medir(funcion, qs):
+    t = []
+    for q in qs:
+        t0 = time.perf_counter()
+        funcion(q)
+        t.append(time.perf_counter() - t0)
+    return percentiles(t)
+
+def main():
+    rng = random.Random(0)
+    columnas = ["ticker", "published_utc", *ib.CAMPOS, *ib.URL_COLS_DEFINITIVOS]
+    base = almacenDatasets.leer(ETAPA, columnas=columnas)
+    directorio = pathlib.Path(tempfile.mkdtemp())
+
+    # --- exactitud (escala 1)
+    idx = ib.IndiceBM25(directorio / "uno", reset=True)
+    idx.anadir(base)
+    claves = [ib.IndiceBM25._clave(r) for r in base.to_dict("records")]
+    primeras = pd.Series(claves).drop_duplicates().index
+    assert list(idx.docs["clave"]) == [claves[i] for i in primeras]
+    textos = ["\n".join(r[c] for c in ib.CAMPOS if isinstance(r[c], str)) for r in base.iloc[primeras].to_dict("records")]
+    qs = consultas(base, 20, rng)
+    for q in qs:
+        assert np.allclose(idx.puntuaciones(q), bm25_referencia(textos, q), rtol=1e-4, atol=1e-4), q
+    print(f"✓ BM25 igual que la referencia en {len(qs)} consultas")
+
+    tickers_doc = pd.Series(claves).map(idx.claves).to_frame("doc").assign(ticker=base["ticker"].astype(str))
+    for t, desde, hasta in (("AAPL", None, None), ("NVDA", "2025-10-01", None), (None, "2025-09-20", "2025-10-05")):
+        esperado = np.ones(len(idx), dtype=bool)
+        if t:
+            esperado[:] = False
+            esperado[tickers_doc.loc[tickers_doc["ticker"] == t, "doc"]] = True
+        fechas = pd.to_datetime(idx.docs["published_utc"], errors="coerce")
+        if desde:
+            esperado &= (fechas >= desde).to_numpy()
+        if hasta:
+            esperado &= (fechas < hasta).to_numpy()
+        for q in qs[:5]:
+            todas = idx.puntuaciones(q)
+            filtradas = idx.puntuaciones(q, tickers=[t] if t else None, desde=desde, hasta=hasta)
+            assert np.array_equal(filtradas, np.where(esperado, todas, 0)), (q, t, desde, hasta)
+    print("✓ filtros de ticker y fecha iguales que en pandas")
+
+    inc = ib.IndiceBM25(directorio / "lotes", reset=True, max_segmentos=2)
+    for trozo in np.array_split(np.arange(len(base)), N_LOTES):
+        inc.anadir(base.iloc[trozo])
+    assert list(inc.docs["clave"]) == list(idx.docs["clave"])
+    for q in qs:
+        assert np.allclose(inc.puntuaciones(q), idx.puntuaciones(q), rtol=1e-6), q
+    print(f"✓ {N_LOTES} lotes incrementales ({len(inc.segmentos)} segmentos tras compactar) = una sola vez")
+
+    # --- latencia
+    for escala in ESCALAS:
+        df = sintetico(base, escala, rng) if escala > 1 else base
+        t0 = time.perf_counter()
+        idx = ib.IndiceBM25(directorio / f"x{escala}", reset=True)
+        for i in range(0, len(df), ib.LOTE):
+            idx.anadir(df.iloc[i:i + ib.LOTE])
+        idx.compactar()
+        t_indice = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        idx = ib.IndiceBM25(directorio / f"x{escala}")
+        t_carga = time.perf_counter() - t0
+        n_post = sum(int(s.df.sum()) for s in idx.segmentos)
+        binario = sum((s.path / f).stat().st_size for s in idx.segmentos for f in ("postings.bin", "tf.bin"))
+        print(f"\n=== escala {escala}: {len(df)} filas, {idx.resumen()}")
+        print(f"indexado {t_indice:.1f}s, carga {t_carga:.2f}s, postings {binario / n_post:.2f} bytes/posting "
+              f"({n_post} postings; 8 en int32 sin comprimir)")
+
+        qs = consultas(base, N_CONSULTAS, rng)
+        texto = (df["headline"].fillna("") + "\n" + df["summary"].fillna("") + "\n" + df["article_text"].fillna("")).str.lower()
+        def grep(q):
+            mascara = np.ones(len(texto), dtype=bool)
+            for t in q.split():
+                mascara &= texto.str.contains(t, regex=False).to_numpy()
+            return df[mascara]
+        print(f"{'grep pandas (todas las palabras)':<38}{medir(grep, qs[:50])}")
+        print(f"{'BM25 top 10':<38}{medir(lambda q: idx.buscar(q, k=10), qs)}")
+        print(f"{'BM25 top 10, ticker':<38}{medir(lambda q: idx.buscar(q, k=10, tickers=['AAPL']), qs)}")
+        print(f"{'BM25 top 10, ticker + fechas':<38}"
+              f"{medir(lambda q: idx.buscar(q, k=10, tickers=['NVDA'], desde='2025-10-01', hasta='2025-10-15'), qs)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# Benchmark de modificarURLs.py: descarga completa + BeautifulSoup (código anterior)
+# frente a lectura por trozos hasta </head> con parser incremental, en serie y en paralelo.
+# Mide el modo GUARDAR_HTML = False; con el almacén activo la página se descarga
+# entera, pero una sola vez (scrapperTextos.py ya no la vuelve a pedir).
+# Usa un servidor local con páginas de tamaño realista, así que no toca la red.
+# Ejecuta desde la raíz del repo:
+#   python data_processing/procesamiento/crearDatasets/benchmarkCanonical.py
+import time, threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import requests
+import modificarURLs as mu
+
+# ============ CONFIG ============
+N_URLS = 200
+BODY_KB = 300          # tamaño del <body> de cada página
+LATENCY = 0.02         # latencia simulada antes de responder (s)
+WORKERS = mu.MAX_WORKERS
+# =================================
+
+HEAD = ('<!doctype html><html><head><meta charset="utf-8"><title>Noticia {i}</title>'
+        + '<script>var x = "' + "a" * 20_000 + '";</script>'
+        + '<meta property="og:url" content="https://publisher.example/og/{i}">'
+        + '<link rel="canonical" href="/noticia/{i}"></head>')
+BODY = "<body>" + "<p>" + "lorem ipsum dolor sit amet " * (BODY_KB * 40) + "</p></body></html>"
+
+class Publisher(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        time.sleep(LATENCY)
+        if self.path.startswith("/api/news"):
+            i = self.path.split("=")[-1]
+            self.send_response(302)
+            self.send_header("Location", f"/articulo/{i}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        i = self.path.rsplit("/", 1)[-1]
+        data = (HEAD.format(i=i) + BODY).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        try:
+            for k in range(0, len(data), 64 * 1024):
+                self.wfile.write(data[k:k + 64 * 1024])
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # el cliente cortó al llegar a </head>
+
+class QuietServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        pass  # conexiones cortadas por el cliente a mitad de página
+
+def legacy(u):
+    r = requests.get(u, headers=mu.HEADERS, timeout=mu.TIMEOUT, allow_redirects=True)
+    return mu.extract_canonical(r.text, r.url), len(r.content)
+
+def streaming(u):
+    final_url, status, canon, err, n, _ = mu.fetch_canonical_streaming(u)
+    return canon, n
+
+def run(fn, urls, workers):
+    t0 = time.perf_counter()
+    if workers == 1:
+        out = [fn(u) for u in urls]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            out = list(ex.map(fn, urls))
+    dt = time.perf_counter() - t0
+    return [c for c, _ in out], sum(n for _, n in out), dt
+
+def main():
+    server = QuietServer(("127.0.0.1", 0), Publisher)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    urls = [f"http://127.0.0.1:{server.server_port}/api/news?id={i}" for i in range(N_URLS)]
+
+    print(f"{N_URLS} URLs · página ≈{len(HEAD) // 1024 + BODY_KB} KB · latencia {LATENCY}s")
+    print(f"{'modo':<34}{'MB leídos':>10}{'URLs/s':>10}")
+    ref = None
+    for name, fn, workers in [("completo + BeautifulSoup (serie)", legacy, 1),
+                              ("head por trozos + lxml (serie)", streaming, 1),
+                              (f"head por trozos + lxml ({WORKERS} hilos)", streaming, WORKERS)]:
+        canons, nbytes, dt = run(fn, urls, workers)
+        ref = ref or canons
+        assert canons == ref, f"{name}: canonicals distintas"
+        print(f"{name:<34}{nbytes / 1e6:>10.1f}{len(urls) / dt:>10.1f}")
+    server.shutdown()
+    print("mismas canonicals en los tres modos ✓")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# Benchmark del colector de finnhub.py: modo secuencial vs concurrente
+# contra un servidor Finnhub simulado en local (no consume cuota real).
+# Ejecuta desde la raíz del repo:
+#   python data_processing/procesamiento/crearDatasets/benchmarkColector.py
+import json, time, random, threading, hashlib
+from collections import deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import finnhub as fh
+
+# ============ CONFIG ============
+TICKERS = ["AAPL", "MSFT", "TSLA", "META"]
+TARGET = 120
+ITEMS_PER_WINDOW = 15           # noticias que devuelve el mock por ventana
+LATENCY = 0.08                  # latencia simulada por petición (s)
+MOCK_QUOTA_PER_MINUTE = 600     # cuota del mock; por encima responde 429 + Retry-After
+# =================================
+
+class MockFinnhub(BaseHTTPRequestHandler):
+    calls = deque()
+    lock = threading.Lock()
+    n_429 = 0
+
+    def log_message(self, *args):
+        pass
+
+    def _over_quota(self):
+        with MockFinnhub.lock:
+            now = time.monotonic()
+            while MockFinnhub.calls and now - MockFinnhub.calls[0] > 60:
+                MockFinnhub.calls.popleft()
+            if len(MockFinnhub.calls) >= MOCK_QUOTA_PER_MINUTE:
+                MockFinnhub.n_429 += 1
+                return True
+            MockFinnhub.calls.append(now)
+            return False
+
+    def do_GET(self):
+        if self._over_quota():
+            self.send_response(429)
+            self.send_header("Retry-After", "1")
+            self.end_headers()
+            return
+        time.sleep(LATENCY)
+        u = urlparse(self.path)
+        q = {k: v[0] for k, v in parse_qs(u.query).items()}
+        if u.path.endswith("/company-news"):
+            seed = int(hashlib.md5(f"{q['symbol']}{q['from']}".encode()).hexdigest()[:8], 16)
+            rnd = random.Random(seed)
+            body = [{
+                "datetime": 1_700_000_000 + rnd.randint(0, 10**6),
+                "headline": f"{q['symbol']} news {q['from']} #{k}",
+                "summary": "",
+                "url": f"https://finnhub.io/api/news?id={q['symbol']}-{q['from']}-{k}",
+                "image": "",
+                "source": "Mock",
+            } for k in range(ITEMS_PER_WINDOW)]
+        else:
+            body = [{"symbol": f"SYM{k}"} for k in range(200)]
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+def run_sequential():
+    fh.LIMITER = None
+    return {t: fh.collect_company(t, TARGET) for t in TICKERS}
+
+def run_concurrent():
+    fh.LIMITER = fh.TokenBucket(fh.CALLS_PER_MINUTE, fh.BURST)
+    try:
+        return fh.collect_many(TICKERS, TARGET)
+    finally:
+        fh.LIMITER = None
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockFinnhub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    fh.FINNHUB_BASE = f"http://127.0.0.1:{server.server_port}/api/v1"
+    fh.CALLS_PER_MINUTE = MOCK_QUOTA_PER_MINUTE
+
+    t0 = time.perf_counter()
+    seq = run_sequential()
+    t_seq = time.perf_counter() - t0
+    calls_seq = len(MockFinnhub.calls)
+
+    MockFinnhub.calls.clear()
+    t0 = time.perf_counter()
+    conc = run_concurrent()
+    t_conc = time.perf_counter() - t0
+    calls_conc = len(MockFinnhub.calls)
+    server.shutdown()
+
+    for t in TICKERS:
+        if isinstance(conc[t], Exception):
+            raise conc[t]
+        assert [a["url"] for a in conc[t]] == [a["url"] for a in seq[t]], f"{t}: resultados distintos"
+
+    print(f"Tickers: {len(TICKERS)} · objetivo {TARGET} · latencia {LATENCY}s · cuota {MOCK_QUOTA_PER_MINUTE}/min")
+    print(f"  secuencial : {t_seq:6.2f}s  ({calls_seq} peticiones)")
+    print(f"  concurrente: {t_conc:6.2f}s  ({calls_conc} peticiones, {MockFinnhub.n_429} respuestas 429)")
+    print(f"  speedup    : x{t_seq / t_conc:.1f}  · mismos artículos por ticker ✓")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# Benchmark del filtro de calidad: función por fila con .apply (código anterior de
+# pruebaFiltro.py / scrapperTextos.py) frente a FiltroCalidad.motivos (regex único evaluado
+# sobre la columna entera con pyarrow.compute). Usa los article_text de definitivos/, replicados
+# para tener un volumen parecido al de INDEX_ALL.
+# Ejecuta desde la raíz del repo:
+#   python data_processing/procesamiento/crearDatasets/benchmarkFiltro.py
+import glob, time
+import pandas as pd
+
+from filtroCalidad import FiltroCalidad, ERROR_ARTIFACTS, MIN_TEXT_LENGTH
+
+# ============ CONFIG ============
+INPUT_GLOB = 'data_processing/finnhubAPI/data/porEmpresas/definitivos/*_scrapped_filtrado.csv'
+REPLICAS = 10
+# =================================
+
+def check_text_quality(text):
+    """Versión anterior, fila a fila."""
+    if pd.isna(text):
+        return False
+    text = str(text)
+    if len(text) < MIN_TEXT_LENGTH:
+        return False
+    text_lower = text.lower()
+    for artifact in ERROR_ARTIFACTS:
+        if artifact in text_lower:
+            return False
+    return True
+
+def load_texts():
+    texts = pd.concat([pd.read_csv(p, usecols=["article_text"])["article_text"]
+                       for p in sorted(glob.glob(INPUT_GLOB))], ignore_index=True)
+    # los definitivos ya están filtrados: añadimos casos que el filtro debe eliminar
+    extra = pd.Series([None, "demasiado corto", "Oops, something went wrong " + "x" * 200,
+                       "texto largo " * 20 + "Copyright 2025 Reuters"])
+    texts = pd.concat([texts, extra], ignore_index=True)
+    return pd.concat([texts] * REPLICAS, ignore_index=True)
+
+def main():
+    texts = load_texts()
+    print(f"{len(texts)} textos ({REPLICAS} réplicas de definitivos/)")
+    filtro = FiltroCalidad(ERROR_ARTIFACTS, MIN_TEXT_LENGTH)
+
+    t0 = time.perf_counter()
+    legacy = texts.apply(check_text_quality)
+    t_legacy = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    reasons = filtro.motivos(texts)
+    t_vec = time.perf_counter() - t0
+
+    assert (legacy.values == (reasons == "ok").values).all(), "máscaras distintas"
+    print(f"{'.apply fila a fila':<28}{t_legacy:>8.3f}s")
+    print(f"{'FiltroCalidad.motivos':<28}{t_vec:>8.3f}s  ({t_legacy / t_vec:.1f}x)")
+    print("mismo resultado que la versión anterior ✓")
+    print(reasons.value_counts().to_string())
+
+if __name__ == "__main__":
+    main()
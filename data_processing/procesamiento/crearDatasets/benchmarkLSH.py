@@ -0,0 +1,69 @@
+# Benchmark de duplicadosLSH: pares casi duplicados encontrados por MinHash + LSH frente al
+# cálculo exacto de Jaccard entre todos los pares (matriz dispersa documento × shingle,
+# coste cuadrático en número de documentos). Informa tiempo, recall y precisión, también con
+# un corpus sintético ESCALA veces mayor (cada copia pierde un 1% de palabras al azar, así
+# que son casi duplicados reales del original).
+# Ejecuta desde la raíz del repo:
+#   python data_processing/procesamiento/crearDatasets/benchmarkLSH.py
+import time, random, tempfile, pathlib
+import numpy as np
+from scipy import sparse
+
+import almacenDatasets
+import duplicadosLSH as dl
+
+# ============ CONFIG ============
+ETAPA = "definitivos"
+UMBRAL = dl.UMBRAL
+ESCALAS = [1, 4]
+# =================================
+
+def pares_exactos(textos, umbral):
+    filas = [dl.shingles(t) for t in textos]
+    vocab, inv = np.unique(np.concatenate(filas), return_inverse=True)
+    indptr = np.cumsum([0] + [len(f) for f in filas])
+    X = sparse.csr_matrix((np.ones(len(inv), dtype=np.float32), inv, indptr), shape=(len(filas), len(vocab)))
+    inter = (X @ X.T).tocoo()
+    tam = np.asarray(X.sum(axis=1)).ravel()
+    mask = inter.row < inter.col
+    i, j, v = inter.row[mask], inter.col[mask], inter.data[mask]
+    jac = v / (tam[i] + tam[j] - v)
+    return {(a, b) for a, b in zip(i[jac >= umbral], j[jac >= umbral])}
+
+def pares_lsh(textos, umbral):
+    idx = dl.IndiceLSH(pathlib.Path(tempfile.mkdtemp()) / "bench.sqlite", umbral=umbral)
+    pares = set()
+    for n, t in enumerate(textos):
+        _, similares = idx.anadir_con_similares(str(n), t)
+        pares.update((int(aid), n) for aid, _, _ in similares)
+    idx.close()
+    return pares
+
+def perturbar(texto, rng, p=0.01):
+    if not isinstance(texto, str):
+        return texto
+    return " ".join(w for w in texto.split() if rng.random() >= p)
+
+def main():
+    base = almacenDatasets.leer(ETAPA, columnas=["article_text"])["article_text"].tolist()
+    rng = random.Random(0)
+    for escala in ESCALAS:
+        textos = base + [perturbar(t, rng) for _ in range(escala - 1) for t in base]
+        print(f"\n{len(textos)} artículos ('{ETAPA}' x{escala}), umbral Jaccard {UMBRAL}")
+
+        t0 = time.perf_counter()
+        exactos = pares_exactos(textos, UMBRAL)
+        t_exacto = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        lsh = pares_lsh(textos, UMBRAL)
+        t_lsh = time.perf_counter() - t0
+
+        acierto = len(exactos & lsh)
+        print(f"{'exacto (todos los pares)':<28}{t_exacto:>8.2f}s  {len(exactos)} pares")
+        print(f"{'MinHash + LSH (incremental)':<28}{t_lsh:>8.2f}s  {len(lsh)} pares"
+              f"  ({t_lsh / len(textos) * 1e3:.2f} ms por artículo añadido)")
+        print(f"recall {acierto / max(len(exactos), 1):.3f} · precisión {acierto / max(len(lsh), 1):.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+# Caché persistente (SQLite) de artefactos de preprocesamiento por artículo, para no volver a
+# derivarlo todo desde el texto crudo en cada ejecución de los notebooks y tagClassification.py.
+#
+# Cada entrada se identifica por el hash del texto de entrada (exacto, sin normalizar) y vive
+# en un `espacio` = nombre + hash de la configuración (p.ej. el contenido de tfidf_config.json)
+# y, opcionalmente, del código fuente de las funciones que lo generan: si cambia la config o
+# ese código, el espacio es otro y todo se recalcula; si cambia un artículo, solo ese.
+#
+# Se guardan dos tipos de artefacto:
+#   - textos(serie, funcion): texto procesado por artículo (text_nc_step1, text_nc…). `funcion`
+#     recibe solo los textos que faltan, en lote, y devuelve sus resultados en el mismo orden.
+#   - filas dispersas: la salida del analizador de un CountVectorizer / TfidfVectorizer para
+#     cada artículo (términos ya tokenizados, lematizados, sin stopwords y con n-gramas), como
+#     ids de término + cuentas. Dentro de `with cache.usando(vectorizador):` el vectorizador
+#     analiza a través de la caché: la matriz sale idéntica (vocabulario, min_df, idf… se
+#     calculan después del analizador), pero cada artículo se tokeniza una sola vez en total.
+#     matriz(serie, analyzer) da directamente las cuentas en el espacio de todos los términos.
+#
+# La tabla de términos es común a todos los espacios y procesos que usan el mismo fichero (el
+# notebook 02 y tagClassification.py a la vez): el id de un término nuevo lo asigna SQLite
+# (INSERT OR IGNORE sobre termino UNIQUE) y después se leen los términos que otros hayan añadido.
+#
+#   cache = CacheArtefactos("tfidf", TFIDF_CFG)
+#   with cache.usando(vec):
+#       X = vec.fit_transform(textos)
+import json, pathlib, sqlite3, hashlib, inspect, marshal, warnings
+from contextlib import contextmanager
+from collections import Counter
+import numpy as np
+import pandas as pd
+
+DEFAULT_PATH = pathlib.Path(__file__).resolve().parents[2] / "finnhubAPI" / "data" / "cache_artefactos.sqlite"
+
+
+def hash_config(config, codigo=()) -> str:
+    """Hash corto de la configuración (dict serializable a JSON) y del código fuente de `codigo`."""
+    h = hashlib.blake2b(json.dumps(config, sort_keys=True, default=str).encode("utf-8"), digest_size=8)
+    for obj in codigo:
+        try:
+            h.update(inspect.getsource(obj).encode("utf-8"))
+        except (OSError, TypeError):    # sin fuente accesible (p.ej. definida en un intérprete)
+            h.update(marshal.dumps(obj.__code__))
+    return h.hexdigest()
+
+def _clave(texto):
+    texto = texto if isinstance(texto, str) else ""
+    return hashlib.blake2b(texto.encode("utf-8"), digest_size=16).digest()
+
+def _serializar(ids, cuentas):
+    return np.concatenate([ids, cuentas]).astype(np.int32).tobytes()
+
+def _deserializar(blob):
+    a = np.frombuffer(blob, dtype=np.int32)
+    return a[:len(a) // 2], a[len(a) // 2:]
+
+
+class CacheArtefactos:
+    def __init__(self, nombre, config, codigo=(), path=DEFAULT_PATH, commit_every=500):
+        """
+        nombre: qué se guarda ("text_nc", "tfidf"…).
+        config: dict con todo lo que cambia el resultado (parámetros del vectorizador…).
+        codigo: funciones o módulos cuyo código fuente también invalida la caché al cambiar.
+        """
+        self.espacio = f"{nombre}:{hash_config(config, codigo)}"
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path), timeout=60)   # espera si otro proceso está escribiendo
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS textos (espacio TEXT NOT NULL, clave BLOB NOT NULL, valor TEXT,
+                                               PRIMARY KEY (espacio, clave)) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS filas (espacio TEXT NOT NULL, clave BLOB NOT NULL, fila BLOB NOT NULL,
+                                              PRIMARY KEY (espacio, clave)) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS terminos (id INTEGER PRIMARY KEY, termino TEXT NOT NULL);
+            CREATE UNIQUE INDEX IF NOT EXISTS terminos_termino ON terminos (termino);""")
+        self.terminos = []           # id → término (los ids son 0, 1, 2… sin huecos)
+        self.ids = {}
+        self._sincronizar()
+        self.filas = {}              # clave → (ids, cuentas) ya leídas o calculadas
+        self.reutilizados = self.calculados = 0
+        self.commit_every = commit_every
+        self._pendientes = []        # filas calculadas aún sin escribir (ver _volcar)
+
+    def _leer(self, tabla, columna, claves):
+        claves = list(claves)
+        out = {}
+        for i in range(0, len(claves), 500):
+            chunk = claves[i:i + 500]
+            out.update(self.conn.execute(
+                f"SELECT clave, {columna} FROM {tabla} WHERE espacio = ? AND clave IN ({','.join('?' * len(chunk))})",
+                [self.espacio, *chunk]))
+        return out
+
+    def _sincronizar(self):
+        """Añade los términos con id posterior a los ya conocidos (de este u otro proceso)."""
+        for i, t in self.conn.execute("SELECT id, termino FROM terminos WHERE id >= ? ORDER BY id",
+                                      (len(self.terminos),)):
+            self.ids[t] = i
+            self.terminos.append(t)
+
+    def _volcar(self):
+        """Escribe las filas pendientes en una transacción corta: mientras se acumulan no se
+        tiene el bloqueo de escritura, y otro proceso con el mismo fichero puede escribir."""
+        if self._pendientes:
+            self.conn.executemany("INSERT OR REPLACE INTO filas VALUES (?, ?, ?)", self._pendientes)
+            self._pendientes = []
+        self.conn.commit()
+
+    # -------------------------------------------------------------- textos
+
+    def textos(self, serie, funcion) -> pd.Series:
+        """funcion(textos que faltan) para los artículos nuevos o cambiados; el resto, de caché."""
+        serie = serie if isinstance(serie, pd.Series) else pd.Series(list(serie), dtype=object)
+        claves = [_clave(t) for t in serie]
+        guardados = self._leer("textos", "valor", set(claves))
+        faltan = {}
+        for pos, k in enumerate(claves):
+            if k not in guardados and k not in faltan:
+                faltan[k] = pos
+        if faltan:
+            nuevos = list(funcion(serie.iloc[list(faltan.values())]))
+            assert len(nuevos) == len(faltan), "funcion tiene que devolver un resultado por texto"
+            self.conn.executemany("INSERT OR REPLACE INTO textos VALUES (?, ?, ?)",
+                                  [(self.espacio, k, v) for k, v in zip(faltan, nuevos)])
+            self.conn.commit()
+            guardados.update(zip(faltan, nuevos))
+        self.calculados += len(faltan)
+        self.reutilizados += len(serie) - len(faltan)
+        return pd.Series([guardados[k] for k in claves], index=serie.index, dtype=object)
+
+    # -------------------------------------------------------------- filas dispersas
+
+    def precargar(self, serie):
+        """Lee de una vez las filas guardadas de estos artículos (evita una consulta por artículo)."""
+        claves = {_clave(t) for t in serie} - self.filas.keys()
+        for k, blob in self._leer("filas", "fila", claves).items():
+            self.filas[k] = _deserializar(blob)
+
+    def _fila(self, doc, analyzer):
+        k = _clave(doc)
+        fila = self.filas.get(k)
+        if fila is None:
+            row = self.conn.execute("SELECT fila FROM filas WHERE espacio = ? AND clave = ?",
+                                    (self.espacio, k)).fetchone()
+            if row is not None:
+                fila = self.filas[k] = _deserializar(row[0])
+        if fila is not None:
+            self.reutilizados += 1
+            return fila
+        cuentas = Counter(analyzer(doc))
+        ids = self.ids
+        nuevos = [t for t in cuentas if t not in ids]
+        if nuevos:
+            # id = el siguiente al mayor, calculado dentro de la sentencia; si otro proceso ya lo
+            # había añadido, se ignora y su id llega con _sincronizar
+            self.conn.executemany("INSERT OR IGNORE INTO terminos (id, termino) "
+                                  "SELECT COALESCE(MAX(id) + 1, 0), ? FROM terminos", ((t,) for t in nuevos))
+            self._sincronizar()
+            self.conn.commit()
+        fila = self.filas[k] = (np.array([ids[t] for t in cuentas], dtype=np.int32),
+                                np.array(list(cuentas.values()), dtype=np.int32))
+        self._pendientes.append((self.espacio, k, _serializar(*fila)))
+        if len(self._pendientes) >= self.commit_every:
+            self._volcar()
+        self.calculados += 1
+        return fila
+
+    def matriz(self, serie, analyzer):
+        """Matriz de cuentas (csr, un artículo por fila) en el espacio de todos los términos de la
+        caché, y el array de esos términos. Sin vocabulario ni filtros: eso lo aplica quien la usa."""
+        from scipy import sparse
+        self.precargar(serie)
+        self._sincronizar()
+        filas = [self._fila(doc, analyzer) for doc in serie]
+        indptr = np.cumsum([0] + [len(ids) for ids, _ in filas])
+        ids = np.concatenate([f[0] for f in filas]) if filas else np.empty(0, dtype=np.int32)
+        cuentas = np.concatenate([f[1] for f in filas]) if filas else np.empty(0, dtype=np.int32)
+        X = sparse.csr_matrix((cuentas, ids, indptr), shape=(len(filas), len(self.terminos)))
+        return X, np.array(self.terminos, dtype=object)
+
+    def analizador(self, analyzer):
+        """Analizador con caché para pasar como analyzer= a CountVectorizer / TfidfVectorizer."""
+        terminos = self.terminos
+        def analizar(doc):
+            ids, cuentas = self._fila(doc, analyzer)
+            return [terminos[i] for i, c in zip(ids.tolist(), cuentas.tolist()) for _ in range(c)]
+        return analizar
+
+    @contextmanager
+    def usando(self, vectorizador):
+        """Mientras dura el bloque, `vectorizador` (y cualquier Pipeline que lo contenga) analiza
+        con caché. Al salir recupera su analizador, así que se puede guardar con joblib."""
+        original = vectorizador.get_params()["analyzer"]
+        vectorizador.set_params(analyzer=self.analizador(vectorizador.build_analyzer()))
+        try:
+            with warnings.catch_warnings():
+                # ngram_range, stop_words… ya van dentro del analizador cacheado
+                warnings.filterwarnings("ignore", message=".*will not be used since 'analyzer'")
+                yield vectorizador
+        finally:
+            vectorizador.set_params(analyzer=original)
+            self._volcar()
+
+    # --------------------------------------------------------------
+
+    def resumen(self) -> str:
+        total = self.reutilizados + self.calculados
+        return (f"caché '{self.espacio}': {self.reutilizados} artículos reutilizados, "
+                f"{self.calculados} calculados ({self.reutilizados / max(total, 1):.1%} de caché)")
+
+    def close(self):
+        self._volcar()
+        self.conn.close()
@@ -0,0 +1,102 @@
+# Caché de lemas (LRU acotada, persistida en SQLite) para no lematizar una y otra vez las
+# mismas palabras: el vocabulario de las noticias financieras está muy concentrado y unas
+# pocas miles de palabras son casi todos los tokens.
+#
+# La usan tagClassification.py (tokenize_and_lemmatize, WordNet: clave = token) y
+# preprocesamiento/lematizadorSpacy.py (lemmatizer de spaCy: clave = texto + POS + morfología,
+# la misma con la que spaCy cachea en memoria sus lemas). Cada uso tiene su propio `espacio` en
+# la tabla, así que un lema de WordNet nunca se sirve al camino de spaCy ni al revés.
+#
+# En memoria es un OrderedDict en orden de uso; al pasar de max_entradas se descarta la menos
+# usada recientemente. guardar() escribe las entradas en ese orden y al cargar se leen las
+# max_entradas más recientes, de modo que la tabla se precalienta entre ejecuciones.
+import pathlib, sqlite3
+from collections import OrderedDict
+
+DEFAULT_PATH = pathlib.Path(__file__).resolve().parents[2] / "finnhubAPI" / "data" / "cache_lemas.sqlite"
+MAX_ENTRADAS = 200_000
+
+
+class CacheLemas:
+    def __init__(self, espacio, funcion, path=DEFAULT_PATH, max_entradas=MAX_ENTRADAS):
+        """
+        espacio: nombre del uso ("wordnet", "spacy:en_core_web_sm"…).
+        funcion: calcula el lema en los fallos: funcion(clave), o funcion(*args) si lema()
+                 recibe argumentos además de la clave (p.ej. el Token de spaCy).
+        path: SQLite donde se persiste; None para una caché solo en memoria.
+        """
+        self.espacio = espacio
+        self.funcion = funcion
+        self.max_entradas = max_entradas
+        self.path = pathlib.Path(path) if path else None
+        self.hits = self.misses = self.descartes = 0
+        self.tabla = OrderedDict()
+        if self.path and self.path.exists():
+            conn = sqlite3.connect(str(self.path))
+            self._crear(conn)
+            filas = conn.execute("SELECT clave, lema FROM lemas WHERE espacio = ? ORDER BY orden DESC LIMIT ?",
+                                 (espacio, max_entradas)).fetchall()
+            conn.close()
+            self.tabla.update(reversed(filas))
+        self.cargadas = len(self.tabla)
+
+    @staticmethod
+    def _crear(conn):
+        conn.execute("""CREATE TABLE IF NOT EXISTS lemas (
+            espacio TEXT NOT NULL,
+            clave TEXT NOT NULL,
+            lema TEXT NOT NULL,
+            orden INTEGER NOT NULL,     -- posición en la LRU al guardar (mayor = más reciente)
+            PRIMARY KEY (espacio, clave)) WITHOUT ROWID""")
+
+    def lema(self, clave, *args):
+        tabla = self.tabla
+        lema = tabla.get(clave)
+        if lema is not None:
+            self.hits += 1
+            tabla.move_to_end(clave)
+            return lema
+        self.misses += 1
+        lema = tabla[clave] = self.funcion(*args) if args else self.funcion(clave)
+        if len(tabla) > self.max_entradas:
+            tabla.popitem(last=False)
+            self.descartes += 1
+        return lema
+
+    def anotar(self, clave, lema):
+        """Registra un lema ya calculado fuera (p.ej. por spaCy en otro proceso): cuenta como
+        acierto si la clave ya estaba y como fallo si es nueva."""
+        tabla = self.tabla
+        if clave in tabla:
+            self.hits += 1
+            tabla.move_to_end(clave)
+            return
+        self.misses += 1
+        tabla[clave] = lema
+        if len(tabla) > self.max_entradas:
+            tabla.popitem(last=False)
+            self.descartes += 1
+
+    def lemas(self, claves) -> list:
+        return [self.lema(c) for c in claves]
+
+    def tasa_acierto(self) -> float:
+        return self.hits / max(self.hits + self.misses, 1)
+
+    def resumen(self) -> str:
+        return (f"caché de lemas '{self.espacio}': {self.hits} aciertos / {self.misses} fallos "
+                f"({self.tasa_acierto():.1%}), {len(self.tabla)} entradas "
+                f"({self.cargadas} cargadas de disco, {self.descartes} descartadas)")
+
+    def guardar(self):
+        """Persiste la tabla actual del espacio (sustituye la anterior)."""
+        if not self.path:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path))
+        with conn:
+            self._crear(conn)
+            conn.execute("DELETE FROM lemas WHERE espacio = ?", (self.espacio,))
+            conn.executemany("INSERT INTO lemas VALUES (?, ?, ?, ?)",
+                             ((self.espacio, c, l, i) for i, (c, l) in enumerate(self.tabla.items())))
+        conn.close()
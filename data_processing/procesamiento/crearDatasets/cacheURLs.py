@@ -0,0 +1,91 @@
+# Caché persistente (SQLite) de resolución de URLs.
+# La comparten finnhubAPI/resolve_redirects.py y crearDatasets/modificarURLs.py para no
+# volver a resolver las mismas URLs de finnhub (api/news?id=...) en cada ejecución.
+#
+# Cada entrada guarda la URL final tras redirecciones, la canonical (si se llegó a mirar
+# el HTML), el código HTTP, el tipo de resultado y la fecha. Los fallos también se
+# guardan (caché negativa) pero caducan antes: timeouts y 4xx tienen su propio TTL.
+# Los 5xx y demás errores no se guardan.
+import time, pathlib, sqlite3, threading
+
+DEFAULT_PATH = pathlib.Path(__file__).resolve().parents[2] / "finnhubAPI" / "data" / "cache_urls.sqlite"
+
+TTL_OK = 30 * 86400         # resoluciones correctas
+TTL_TIMEOUT = 6 * 3600      # caché negativa: timeouts
+TTL_4XX = 7 * 86400         # caché negativa: 4xx (404, 403…)
+
+
+class CacheURLs:
+    def __init__(self, path=DEFAULT_PATH, ttl=TTL_OK, ttl_timeout=TTL_TIMEOUT, ttl_4xx=TTL_4XX,
+                 commit_every=100):
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttls = {"ok": ttl, "timeout": ttl_timeout, "4xx": ttl_4xx}
+        self.hits = self.misses = 0
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.commit_every = commit_every
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS resoluciones (
+            url TEXT PRIMARY KEY,
+            url_final TEXT,
+            url_canonical TEXT,      -- NULL: no se miró el HTML; '': se miró y no había
+            http_status INTEGER,
+            tipo TEXT NOT NULL,      -- ok | timeout | 4xx
+            ts REAL NOT NULL)""")
+        self.conn.commit()
+
+    def get(self, url: str, need_canonical: bool = False):
+        """Devuelve la entrada vigente como dict, o None (y cuenta un fallo).
+        Con need_canonical=True, una resolución correcta sin canonical cuenta como fallo."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT url_final, url_canonical, http_status, tipo, ts FROM resoluciones WHERE url = ?",
+                (url,)).fetchone()
+            entry = None
+            if row is not None:
+                url_final, canon, status, tipo, ts = row
+                fresh = time.time() - ts <= self.ttls.get(tipo, 0)
+                usable = not (need_canonical and tipo == "ok" and canon is None)
+                if fresh and usable:
+                    entry = {"url_final": url_final, "url_canonical": canon,
+                             "http_status": status, "tipo": tipo}
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return entry
+
+    def put(self, url: str, url_final=None, url_canonical=None, http_status=None, tipo="ok"):
+        if tipo not in self.ttls:
+            return
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO resoluciones VALUES (?, ?, ?, ?, ?, ?)",
+                (url, url_final, url_canonical, http_status, tipo, time.time()))
+            self._pending += 1
+            if self._pending >= self.commit_every:
+                self.conn.commit()
+                self._pending = 0
+
+    @staticmethod
+    def tipo_de(http_status=None, timeout=False):
+        """Tipo de entrada para un resultado, o None si no se debe cachear."""
+        if timeout:
+            return "timeout"
+        if http_status is None:
+            return None
+        if 400 <= http_status < 500:
+            return "4xx"
+        return "ok" if http_status < 400 else None
+
+    def stats(self) -> str:
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        return f"caché URLs: {self.hits} aciertos / {self.misses} fallos ({rate:.1%})"
+
+    def close(self):
+        with self._lock:
+            self.conn.commit()
+            self.conn.close()
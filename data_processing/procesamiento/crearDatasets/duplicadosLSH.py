@@ -0,0 +1,193 @@
+# Detección de artículos casi duplicados (reimpresiones de Yahoo, Reuters…) con MinHash + LSH.
+# Lo usan unirFinales.py (a través de fusionIndices.FusionIndice), tagClassification.py y los
+# notebooks de preprocesamiento.
+#
+# Cada texto se trocea en shingles de K_SHINGLE palabras, se resume en una firma MinHash de
+# NUM_PERM valores y la firma se parte en bandas: dos artículos son candidatos si coinciden
+# en alguna banda completa, así que solo se comparan los candidatos (no todos contra todos).
+# Entre los candidatos, el que supera UMBRAL de Jaccard estimado y es más parecido da su
+# canonical_id al nuevo artículo; si no hay ninguno, el artículo es su propio canónico.
+#
+# El índice (firmas y cubetas) está en SQLite y es incremental: los artículos nuevos se
+# comparan con los ya indexados sin reconstruir nada. Los canonical_id ya asignados no
+# cambian aunque un artículo nuevo "una" dos grupos.
+#
+#   python data_processing/procesamiento/crearDatasets/duplicadosLSH.py     # informe sobre definitivos
+import re, zlib, hashlib, pathlib, sqlite3, argparse
+import numpy as np
+import pandas as pd
+
+import almacenDatasets
+
+DEFAULT_PATH = almacenDatasets.DEFAULT_ROOT / "_lsh" / "articulos.sqlite"
+
+NUM_PERM = 128
+K_SHINGLE = 5          # palabras por shingle
+UMBRAL = 0.7           # Jaccard estimado mínimo para considerar casi duplicado
+SEED = 42
+
+TOKEN_RE = re.compile(r"\w+")
+_MERSENNE = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_BASE = np.uint32(1_000_003)
+
+
+def bandas_optimas(num_perm, umbral):
+    """(bandas, filas) con bandas * filas = num_perm y umbral (1/b)^(1/r) más cercano."""
+    opciones = [(b, num_perm // b) for b in range(1, num_perm + 1) if num_perm % b == 0]
+    return min(opciones, key=lambda br: abs((1 / br[0]) ** (1 / br[1]) - umbral))
+
+def shingles(texto, k=K_SHINGLE):
+    """Hashes (uint32) de los k-gramas de palabras del texto, sin repetir."""
+    if not isinstance(texto, str):
+        return np.empty(0, dtype=np.uint32)
+    toks = np.fromiter((zlib.crc32(t.encode("utf-8")) for t in TOKEN_RE.findall(texto.lower())),
+                       dtype=np.uint32)
+    if len(toks) < k:
+        return np.unique(toks) if len(toks) else toks
+    n = len(toks) - k + 1
+    h = np.zeros(n, dtype=np.uint32)
+    with np.errstate(over="ignore"):
+        for j in range(k):
+            h = h * _BASE + toks[j:j + n]
+    return np.unique(h)
+
+
+class IndiceLSH:
+    def __init__(self, path=DEFAULT_PATH, num_perm=NUM_PERM, umbral=UMBRAL, k=K_SHINGLE,
+                 seed=SEED, reset=False, commit_every=500):
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if reset:
+            for p in self.path.parent.glob(self.path.name + "*"):
+                p.unlink()
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (k TEXT PRIMARY KEY, v TEXT);
+            CREATE TABLE IF NOT EXISTS firmas (article_id TEXT PRIMARY KEY, canonical_id TEXT NOT NULL, firma BLOB);
+            CREATE TABLE IF NOT EXISTS cubetas (clave BLOB NOT NULL, article_id TEXT NOT NULL);
+            CREATE INDEX IF NOT EXISTS cubetas_clave ON cubetas (clave);""")
+        # los parámetros de un índice existente mandan sobre los del constructor
+        meta = dict(self.conn.execute("SELECT k, v FROM meta"))
+        if meta:
+            num_perm, umbral, k, seed = int(meta["num_perm"]), float(meta["umbral"]), int(meta["k"]), int(meta["seed"])
+        else:
+            self.conn.executemany("INSERT INTO meta VALUES (?, ?)", [("num_perm", num_perm), ("umbral", umbral),
+                                                                    ("k", k), ("seed", seed)])
+            self.conn.commit()
+        self.num_perm, self.umbral, self.k = num_perm, umbral, k
+        self.bandas, self.filas = bandas_optimas(num_perm, umbral)
+        rng = np.random.RandomState(seed)
+        # permutaciones (a·x + b) mod (2^61 - 1), truncadas a 32 bits
+        self.a = rng.randint(1, (1 << 61) - 1, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, (1 << 61) - 1, size=num_perm, dtype=np.uint64)
+        self.commit_every = commit_every
+        self._pending = 0
+
+    # -------------------------------------------------------------- firmas
+
+    def firma(self, texto):
+        """Firma MinHash (uint64[num_perm]) o None si el texto no tiene shingles."""
+        h = shingles(texto, self.k).astype(np.uint64)
+        if not len(h):
+            return None
+        with np.errstate(over="ignore"):
+            perm = ((np.outer(self.a, h) + self.b[:, None]) % _MERSENNE) & _MAX_HASH
+        return perm.min(axis=1)
+
+    def _claves(self, firma):
+        r = self.filas
+        return [hashlib.blake2b(bytes([i]) + firma[i * r:(i + 1) * r].tobytes(), digest_size=8).digest()
+                for i in range(self.bandas)]
+
+    @staticmethod
+    def similitud(f1, f2):
+        return float(np.mean(f1 == f2))
+
+    # -------------------------------------------------------------- consultas
+
+    def candidatos(self, firma):
+        """[(article_id, canonical_id, jaccard estimado)] por encima del umbral, del más parecido al menos."""
+        claves = self._claves(firma)
+        ids = [r[0] for r in self.conn.execute(
+            f"SELECT DISTINCT article_id FROM cubetas WHERE clave IN ({','.join('?' * len(claves))})", claves)]
+        out = []
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            for aid, canon, blob in self.conn.execute(
+                    f"SELECT article_id, canonical_id, firma FROM firmas WHERE article_id IN ({','.join('?' * len(chunk))})",
+                    chunk):
+                sim = self.similitud(firma, np.frombuffer(blob, dtype=np.uint64))
+                if sim >= self.umbral:
+                    out.append((aid, canon, sim))
+        return sorted(out, key=lambda x: -x[2])
+
+    def consultar(self, texto):
+        """Casi duplicados ya indexados de `texto`, sin añadirlo."""
+        f = self.firma(texto)
+        return [] if f is None else self.candidatos(f)
+
+    def canonico(self, article_id):
+        row = self.conn.execute("SELECT canonical_id FROM firmas WHERE article_id = ?", (article_id,)).fetchone()
+        return row[0] if row else None
+
+    # -------------------------------------------------------------- altas
+
+    def anadir(self, article_id, texto) -> str:
+        """Indexa el artículo (si no estaba) y devuelve su canonical_id."""
+        return self.anadir_con_similares(article_id, texto)[0]
+
+    def anadir_con_similares(self, article_id, texto):
+        """Como anadir, pero devuelve también los casi duplicados encontrados
+        ([(article_id, canonical_id, jaccard)], vacío si ya estaba indexado)."""
+        ya = self.canonico(article_id)
+        if ya is not None:
+            return ya, []
+        f = self.firma(texto)
+        canon, similares = article_id, []
+        if f is not None:
+            similares = self.candidatos(f)
+            if similares:
+                canon = similares[0][1]
+            self.conn.executemany("INSERT INTO cubetas VALUES (?, ?)", [(c, article_id) for c in self._claves(f)])
+        self.conn.execute("INSERT INTO firmas VALUES (?, ?, ?)",
+                          (article_id, canon, f.tobytes() if f is not None else None))
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.conn.commit()
+            self._pending = 0
+        return canon, similares
+
+    def anadir_lote(self, ids, textos) -> list:
+        return [self.anadir(i, t) for i, t in zip(ids, textos)]
+
+    def grupos(self) -> pd.DataFrame:
+        """article_id → canonical_id de todo el índice."""
+        return pd.read_sql_query("SELECT article_id, canonical_id FROM firmas", self.conn)
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Informe de casi duplicados de una etapa del almacén")
+    parser.add_argument("--etapa", default="definitivos")
+    parser.add_argument("--umbral", type=float, default=UMBRAL)
+    args = parser.parse_args()
+
+    df = almacenDatasets.leer(args.etapa, columnas=["ticker", "headline", "article_text"])
+    idx = IndiceLSH(DEFAULT_PATH.with_name(f"informe_{args.etapa}.sqlite"), umbral=args.umbral, reset=True)
+    canon = idx.anadir_lote([str(i) for i in range(len(df))], df["article_text"])
+    idx.close()
+    df["canonical_id"] = canon
+    tam = df.groupby("canonical_id").size()
+    print(f"{len(df)} artículos → {len(tam)} grupos ({(tam > 1).sum()} con casi duplicados, "
+          f"{len(df) - len(tam)} filas sobrantes)")
+    for cid in tam.sort_values(ascending=False).head(5).index:
+        g = df[df["canonical_id"] == cid]
+        print(f"  · {len(g)}× {g['headline'].iloc[0][:70]!r}  [{', '.join(sorted(set(g['ticker'].astype(str))))}]")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# Filtro de calidad de artículos (longitud mínima + artefactos de error).
+# Lo usan scrapperTextos.py y pruebaFiltro.py.
+#
+# Todos los artefactos se compilan en una sola expresión regular y se evalúa la
+# columna entera con pyarrow.compute (minúsculas, longitud y búsqueda en C, por
+# bloques para no duplicar en memoria todo el texto a la vez). En lugar de
+# True/False devuelve un motivo por fila:
+#   "ok" | "nulo" | "corto" | "artefacto:<texto encontrado>"
+import re
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+MIN_TEXT_LENGTH = 100
+
+# lista de elementos que hemos encontrado en los errores, y para filtrarlos (la única: la
+# importan scrapperTextos.py y pruebaFiltro.py)
+ERROR_ARTIFACTS = [
+    "oops, something went wrong",
+    "all rights reserved.",
+    "terms and privacy policy",
+    "my portfolio",
+    "watch now",
+    "min read",
+    "scott lehtonen",
+    "patrick seitz",
+    "- my portfolio",
+    "copyright"
+]
+
+
+class FiltroCalidad:
+    def __init__(self, artifacts=ERROR_ARTIFACTS, min_length=MIN_TEXT_LENGTH):
+        self.min_length = min_length
+        # los más largos primero para que el motivo sea el artefacto más específico
+        alternatives = sorted({a.lower() for a in artifacts}, key=len, reverse=True)
+        self.pattern = "|".join(re.escape(a) for a in alternatives) if alternatives else r"(?!x)x"
+        self.regex = re.compile(self.pattern)
+
+    def motivo(self, text) -> str:
+        """Motivo para un único texto."""
+        if pd.isna(text):
+            return "nulo"
+        text = str(text)
+        if len(text) < self.min_length:
+            return "corto"
+        m = self.regex.search(text.lower())
+        return f"artefacto:{m.group(0)}" if m else "ok"
+
+    def motivos(self, texts: pd.Series, chunk_size: int = 20000) -> pd.Series:
+        """Motivo por fila para toda una columna, alineado con su índice."""
+        parts = []
+        for start in range(0, len(texts), chunk_size):
+            chunk = texts.iloc[start:start + chunk_size]
+            null = chunk.isna().to_numpy()
+            try:
+                arr = pa.array(chunk, type=pa.large_string(), from_pandas=True)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                # columna con valores no texto: misma conversión que str(text)
+                arr = pa.array(chunk.where(null, chunk.astype(str)), type=pa.large_string(), from_pandas=True)
+            short = pc.less(pc.utf8_length(arr), self.min_length).fill_null(False).to_numpy(zero_copy_only=False)
+            found = pc.match_substring_regex(pc.utf8_lower(arr), self.pattern).fill_null(False).to_numpy(zero_copy_only=False)
+            out = pd.Series("ok", index=chunk.index, dtype=object)
+            # el texto concreto del artefacto solo se busca en las filas que lo tienen (pocas)
+            hits = found & ~short
+            out[hits] = ["artefacto:" + self.regex.search(str(t).lower()).group(0) for t in chunk[hits]]
+            out[short] = "corto"
+            out[null] = "nulo"
+            parts.append(out)
+        return pd.concat(parts) if parts else pd.Series([], index=texts.index, dtype=object)
+
+    def validos(self, texts: pd.Series) -> pd.Series:
+        """Máscara booleana de filas que pasan el filtro."""
+        return self.motivos(texts) == "ok"
@@ -1,16 +1,23 @@
 # pip install pandas python-dateutil tldextract
-import os, time, pathlib, random, requests
+import os, time, pathlib, random, requests, argparse, threading
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, date
 from dateutil.relativedelta import relativedelta
+import pyarrow.dataset as pads
+from ingestaIncremental import EstadoIngesta, claves_etapa, anadir_dedup
+from almacenDatasets import guardar, compactar
+from fusionIndices import FusionIndice, URL_COLS_RAW
 
 # ============ CONFIG ============
 API = os.getenv("FINNHUB_KEY") or "d3m03tpr01qkjssdop9gd3m03tpr01qkjssdopa0"
 TICKERS_FIJOS = ["AAPL","MSFT","TSLA","META","GOOGL","NVDA","AMZN"]
+FINNHUB_BASE = os.getenv("FINNHUB_BASE_URL") or "https://finnhub.io/api/v1"
 
 PER_TICKER_TARGET = 1000
 WINDOW_DAYS = 7
 MAX_LOOKBACK_DAYS = 365
+VENTANAS_POR_ESCRITURA = 13     # modo incremental: ventanas acumuladas por escritura (≈ un trimestre)
 
 # Aleatorios
 EXCHANGES = ["US"]              
@@ -18,16 +25,68 @@ RANDOM_NUM_TICKERS = 100
 RANDOM_PER_TICKER_TARGET = 50
 SEED = 42
 
+# Modo concurrente
+CALLS_PER_MINUTE = 60           # cuota por minuto del plan de Finnhub
+BURST = 5                       # ráfaga máxima del token bucket
+TICKER_WORKERS = 4              # tickers recolectándose a la vez
+WINDOW_WORKERS = 4              # ventanas en vuelo por ticker
+
 OUT_DIR = pathlib.Path("data_processing/finnhubAPI/data/porEmpresas/raw")
 OUT_DIR.mkdir(parents=True, exist_ok=True)
 
 HEADERS = {"User-Agent": "Mozilla/5.0 (dataset builder)"}
 
+class TokenBucket:
+    """Limitador compartido entre hilos: `per_minute` peticiones por minuto
+    con ráfagas de hasta `capacity`. `pause` bloquea a todos los hilos
+    (p.ej. cuando Finnhub responde 429 con Retry-After)."""
+    def __init__(self, per_minute: int, capacity: int = 1):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._last = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now >= self._paused_until:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                    self._last = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+                else:
+                    wait = self._paused_until - now
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+# Solo se activa en modo concurrente (ver main)
+LIMITER = None
+
+def _retry_after(r, default):
+    try:
+        return max(float(r.headers.get("Retry-After")), 0.0)
+    except (TypeError, ValueError):
+        return default
+
 def _rget(url, params, retries=3, backoff=1.2):
     for i in range(retries):
+        if LIMITER is not None:
+            LIMITER.acquire()
         r = requests.get(url, params=params, headers=HEADERS, timeout=30)
         if r.status_code == 429:
-            time.sleep(backoff * (i+1)); continue
+            wait = _retry_after(r, backoff * (i+1))
+            if LIMITER is not None:
+                LIMITER.pause(wait)
+            time.sleep(wait); continue
         if r.status_code == 401:
             raise RuntimeError("401 Unauthorized: token inválido/no enviado")
         if r.ok:
@@ -37,12 +96,12 @@ def _rget(url, params, retries=3, backoff=1.2):
     return r
 
 def company_news(symbol: str, _from: str, to: str):
-    r = _rget("https://finnhub.io/api/v1/company-news",
+    r = _rget(f"{FINNHUB_BASE}/company-news",
               {"symbol": symbol, "from": _from, "to": to, "token": API})
     return r.json() or []
 
 def list_symbols(exchange: str):
-    r = _rget("https://finnhub.io/api/v1/stock/symbol",
+    r = _rget(f"{FINNHUB_BASE}/stock/symbol",
               {"exchange": exchange, "token": API})
     return r.json() or []
 
@@ -58,18 +117,91 @@ def dedupe_by_url(items):
         seen.add(u); out.append(a)
     return out
 
-def collect_company(symbol: str, target: int):
-    collected = []
+def iter_windows():
+    """Ventanas (from, to) de WINDOW_DAYS días, de la más reciente a la más antigua."""
     end_dt = datetime.combine(date.today(), datetime.min.time())
     start_limit = end_dt - timedelta(days=MAX_LOOKBACK_DAYS)
-    while len(collected) < target and end_dt > start_limit:
+    while end_dt > start_limit:
         start_dt = end_dt - timedelta(days=WINDOW_DAYS)
-        batch = company_news(symbol, _from=start_dt.strftime("%Y-%m-%d"), to=end_dt.strftime("%Y-%m-%d"))
-        collected.extend(batch)
+        yield start_dt.strftime("%Y-%m-%d"), end_dt.strftime("%Y-%m-%d")
         end_dt = start_dt - timedelta(seconds=1)
+
+def collect_company(symbol: str, target: int):
+    collected = []
+    for _from, to in iter_windows():
+        if len(collected) >= target:
+            break
+        batch = company_news(symbol, _from=_from, to=to)
+        collected.extend(batch)
         time.sleep(0.15)
     return dedupe_by_url(collected)[:target]
 
+def collect_company_concurrent(symbol: str, target: int, pool: ThreadPoolExecutor,
+                               window_workers: int = WINDOW_WORKERS):
+    """Como collect_company, pero pide `window_workers` ventanas a la vez en `pool`.
+    Las ventanas se consumen en el mismo orden y se para en cuanto el ticker
+    llega a su objetivo, así que el resultado coincide con el secuencial."""
+    collected = []
+    windows = list(iter_windows())
+    for k in range(0, len(windows), window_workers):
+        futs = [pool.submit(company_news, symbol, _from=f, to=t) for f, t in windows[k:k+window_workers]]
+        for fut in futs:
+            if len(collected) >= target:
+                break
+            collected.extend(fut.result())
+        if len(collected) >= target:
+            for fut in futs:
+                fut.cancel()
+            break
+    return dedupe_by_url(collected)[:target]
+
+def collect_many(tickers, target: int):
+    """Recolecta varios tickers en paralelo. Devuelve {ticker: items o excepción}."""
+    results = {}
+    with ThreadPoolExecutor(max_workers=TICKER_WORKERS * WINDOW_WORKERS) as window_pool, \
+         ThreadPoolExecutor(max_workers=TICKER_WORKERS) as ticker_pool:
+        futs = {ticker_pool.submit(collect_company_concurrent, t, target, window_pool): t for t in tickers}
+        for fut in as_completed(futs):
+            t = futs[fut]
+            try:
+                results[t] = fut.result()
+            except Exception as e:
+                results[t] = e
+    return results
+
+def collect_company_incremental(symbol: str, estado: EstadoIngesta, seen: set, indice: FusionIndice,
+                                ventanas_por_escritura: int = VENTANAS_POR_ESCRITURA):
+    """Descarga solo las ventanas posteriores al high-water mark del ticker y va
+    añadiendo (sin duplicados) a las etapas raw y raw_index. Las filas se acumulan y se
+    escriben cada `ventanas_por_escritura` ventanas y al acabar el ticker (cada escritura es
+    un fichero nuevo por partición); el checkpoint de esas ventanas se guarda después."""
+    added = 0
+    rows, completadas = [], []
+
+    def volcar():
+        nonlocal added, rows, completadas
+        added += anadir_dedup(rows, "raw", "url_redirect", seen)
+        if rows:
+            indice.anadir(pd.DataFrame(rows))
+        indice.escribir()
+        for to, batch in completadas:
+            estado.completar_ventana(symbol, to, batch)
+        rows, completadas = [], []
+
+    try:
+        for _from, to in estado.ventanas_pendientes(symbol, MAX_LOOKBACK_DAYS, WINDOW_DAYS):
+            batch = dedupe_by_url(company_news(symbol, _from=_from, to=to))
+            rows += rows_from_items(batch, ticker=symbol)
+            completadas.append((to, batch))
+            if len(completadas) >= ventanas_por_escritura:
+                volcar()
+            time.sleep(0.15)
+    finally:
+        # también si falla una petición: las ventanas ya completas no se vuelven a pedir
+        if completadas:
+            volcar()
+    return added
+
 def rows_from_items(items, ticker=""):
     rows = []
     for a in items:
@@ -85,11 +217,17 @@ def rows_from_items(items, ticker=""):
         })
     return rows
 
-def save_csv(rows, path: pathlib.Path):
+def save_rows(rows, etapa="raw"):
+    """Sustituye en el almacén Parquet los tickers de `rows` (sin URLs repetidas)."""
     df = pd.DataFrame(rows)
     if not df.empty:
         df.drop_duplicates(subset=["url_redirect"], inplace=True)
-    df.to_csv(path, index=False)
+    guardar(df, etapa)
+
+def nuevo_indice(reset=False):
+    """INDEX_ALL de raw: deduplica por URL de finnhub y por titular + resumen, y guarda
+    la relación artículo↔ticker en raw_index_tickers."""
+    return FusionIndice("raw_index", columnas_url=URL_COLS_RAW, columnas_texto=("headline", "summary"), reset=reset)
 
 def sample_random_tickers(exchanges, n, exclude=set()):
     random.seed(SEED)
@@ -104,20 +242,63 @@ def sample_random_tickers(exchanges, n, exclude=set()):
         n = len(pool)
     return random.sample(pool, n)
 
-def main():
+def main_incremental():
+    estado = EstadoIngesta(OUT_DIR / "_estado_ingesta.json")
+    indice = nuevo_indice()
+
+    for t in TICKERS_FIJOS:
+        print(f"[Fijo] {t}: desde {estado.get(t).get('hwm_published_utc', 'el inicio')}…")
+        seen = claves_etapa("raw", "url_redirect", tickers=[t])
+        n = collect_company_incremental(t, estado, seen, indice)
+        print(f"   ✓ {t}: +{n} artículos → raw")
+
+    print("[Aleatorios] muestreando tickers…")
+    rnd_tickers = sample_random_tickers(EXCHANGES, RANDOM_NUM_TICKERS, exclude=set(TICKERS_FIJOS))
+    rnd_seen = claves_etapa("raw", "url_redirect", filtro=~pads.field("ticker").isin(TICKERS_FIJOS))
+    total = 0
+    for i, t in enumerate(rnd_tickers, 1):
+        try:
+            total += collect_company_incremental(t, estado, rnd_seen, indice)
+        except Exception as e:
+            print(f"     ! {t}: {e}")
+    print(f"   ✓ Aleatorio: +{total} artículos → raw")
+    indice.cerrar()
+    print(f"Índice combinado: {indice.resumen()} → raw_index")
+    # las ejecuciones incrementales van dejando ficheros pequeños: uno por partición
+    for etapa in ("raw", "raw_index", "raw_index_tickers"):
+        compactar(etapa)
+
+def main(mode="secuencial", incremental=False):
     if not API or API == "TU_API_KEY_AQUI":
         raise RuntimeError("Falta la API key. Define FINNHUB_KEY o pega tu token en API.")
 
-    all_rows = []
+    if incremental:
+        return main_incremental()
+
+    global LIMITER
+    concurrent = mode == "concurrente"
+    if concurrent:
+        LIMITER = TokenBucket(CALLS_PER_MINUTE, BURST)
 
-    # 1) Un CSV por empresa fija
+    # el índice combinado se va escribiendo a medida que llegan los tickers
+    indice = nuevo_indice(reset=True)
+
+    # 1) Una partición por empresa fija
+    if concurrent:
+        print(f"[Fijo] {len(TICKERS_FIJOS)} tickers en paralelo…")
+        fixed = collect_many(TICKERS_FIJOS, PER_TICKER_TARGET)
     for t in TICKERS_FIJOS:
-        print(f"[Fijo] {t}: recolectando…")
-        items = collect_company(t, PER_TICKER_TARGET)
+        if concurrent:
+            items = fixed[t]
+            if isinstance(items, Exception):
+                raise items
+        else:
+            print(f"[Fijo] {t}: recolectando…")
+            items = collect_company(t, PER_TICKER_TARGET)
         rows = rows_from_items(items, ticker=t)
-        save_csv(rows, OUT_DIR / f"{t}.csv")
-        print(f"   ✓ {t}: {len(rows)} artículos → {OUT_DIR / f'{t}.csv'}")
-        all_rows.extend(rows)
+        save_rows(rows)
+        print(f"   ✓ {t}: {len(rows)} artículos → raw/ticker={t}")
+        indice.anadir(pd.DataFrame(rows))
 
     # 2) Aleatorios: muestrea tickers y descarga
     print("[Aleatorios] muestreando tickers…")
@@ -125,24 +306,36 @@ def main():
     print(f"   ✓ {len(rnd_tickers)} tickers aleatorios")
 
     rnd_rows = []
-    for i, t in enumerate(rnd_tickers, 1):
-        print(f"   ({i}/{len(rnd_tickers)}) {t}: recolectando…")
-        try:
-            items = collect_company(t, RANDOM_PER_TICKER_TARGET)
-            rnd_rows.extend(rows_from_items(items, ticker=t))
-        except Exception as e:
-            print(f"     ! {t}: {e}")
-        time.sleep(0.2)
+    if concurrent:
+        results = collect_many(rnd_tickers, RANDOM_PER_TICKER_TARGET)
+        for t in rnd_tickers:
+            if isinstance(results[t], Exception):
+                print(f"     ! {t}: {results[t]}")
+            else:
+                rnd_rows.extend(rows_from_items(results[t], ticker=t))
+    else:
+        for i, t in enumerate(rnd_tickers, 1):
+            print(f"   ({i}/{len(rnd_tickers)}) {t}: recolectando…")
+            try:
+                items = collect_company(t, RANDOM_PER_TICKER_TARGET)
+                rnd_rows.extend(rows_from_items(items, ticker=t))
+            except Exception as e:
+                print(f"     ! {t}: {e}")
+            time.sleep(0.2)
 
-    save_csv(rnd_rows, OUT_DIR / "RANDOM.csv")
-    print(f"   ✓ Aleatorio total: {len(rnd_rows)} artículos → {OUT_DIR / 'RANDOM.csv'}")
+    save_rows(rnd_rows)
+    print(f"   ✓ Aleatorio total: {len(rnd_rows)} artículos → raw")
 
     # 3) Índice combinado de todos
-    combined = pd.DataFrame(all_rows + rnd_rows)
-    if not combined.empty:
-        combined.drop_duplicates(subset=["url_redirect"], inplace=True)
-    combined.to_csv(OUT_DIR / "INDEX_ALL.csv", index=False)
-    print(f"Índice combinado: {len(combined)} filas → {OUT_DIR / 'INDEX_ALL.csv'}")
+    indice.anadir(pd.DataFrame(rnd_rows))
+    indice.cerrar()
+    print(f"Índice combinado: {indice.resumen()} → raw_index")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modo", choices=["secuencial", "concurrente"], default="secuencial",
+                        help="concurrente: tickers y ventanas en paralelo con token bucket compartido")
+    parser.add_argument("--incremental", action="store_true",
+                        help="solo descarga lo posterior al último artículo guardado de cada ticker y lo añade al almacén")
+    args = parser.parse_args()
+    main(args.modo, args.incremental)
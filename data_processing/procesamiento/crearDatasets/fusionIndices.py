@@ -0,0 +1,276 @@
+# Fusión por streaming de los índices INDEX_ALL (raw_index y definitivos_index).
+# La usan unirFinales.py y finnhub.py en lugar de concatenar todo en memoria.
+#
+# Las filas llegan por lotes y cada artículo se escribe una sola vez en la etapa índice,
+# con un `article_id`. Un artículo se considera repetido si coincide:
+#   - la URL normalizada (sin www., fragmento ni parámetros de tracking, query ordenada), o
+#   - el hash del contenido (texto en minúsculas y con espacios colapsados).
+# Cuando un artículo aparece bajo varios tickers no se duplica la fila: se apunta el par
+# (article_id, ticker) en la etapa "<índice>_tickers" (relación muchos a muchos).
+# Con un duplicadosLSH.IndiceLSH, cada artículo nuevo lleva además su `canonical_id` (casi
+# duplicados: reimpresiones con el texto ligeramente cambiado) y, con colapsar=True, los
+# casi duplicados se tratan como repetidos: no se escriben y su ticker va al canónico.
+#
+# Las claves vistas viven en un SQLite en disco con un filtro de Bloom delante, así que la
+# memoria no crece con el número de artículos: solo el Bloom (≈1,2 MB por millón de claves)
+# y un búfer de escritura acotado. El SQLite se guarda entre ejecuciones (<root>/_fusion/),
+# de modo que la ingesta incremental sigue deduplicando contra lo ya escrito.
+import re, math, shutil, hashlib, pathlib, sqlite3
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import pandas as pd
+
+import almacenDatasets
+
+FUSION_DIR = almacenDatasets.DEFAULT_ROOT / "_fusion"
+
+# Parámetros de query que no identifican el artículo
+TRACKING_PARAMS = re.compile(r"^(utm_.*|guccounter|guce_.*|fbclid|gclid|ncid|yptr|\.tsrc|cmpid|ref|src|mod|taid|soc_.*)$",
+                             re.IGNORECASE)
+MIN_TEXTO_HASH = 50     # textos más cortos no se deduplican por contenido (vacíos, "N/A"…)
+
+URL_COLS_DEFINITIVOS = ("url_original", "url_final", "url_redirect")
+URL_COLS_RAW = ("url_redirect",)
+
+
+def normalizar_url(url):
+    """URL canónica para comparar: esquema y host en minúsculas, sin www., sin fragmento,
+    sin parámetros de tracking, con la query ordenada y sin barra final."""
+    if not isinstance(url, str) or not url.strip():
+        return ""
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url.strip()
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                   if not TRACKING_PARAMS.match(k))
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower() or "http", host, path, urlencode(query), ""))
+
+def hash_contenido(texto):
+    """Digest del texto normalizado, o None si es demasiado corto para fiarse."""
+    if not isinstance(texto, str):
+        return None
+    t = " ".join(texto.lower().split())
+    if len(t) < MIN_TEXTO_HASH:
+        return None
+    return hashlib.blake2b(t.encode("utf-8"), digest_size=16).digest()
+
+def _digest(texto):
+    return hashlib.blake2b(texto.encode("utf-8"), digest_size=16).digest()
+
+
+class FiltroBloom:
+    """Filtro de Bloom sobre claves que ya son digests uniformes (doble hashing)."""
+    def __init__(self, capacidad=1_000_000, error=0.01):
+        self.m = max(8, int(-capacidad * math.log(error) / math.log(2) ** 2))
+        self.k = max(1, round(self.m / capacidad * math.log(2)))
+        self.bits = bytearray((self.m + 7) // 8)
+
+    def _posiciones(self, clave):
+        h1 = int.from_bytes(clave[-16:-8], "little")
+        h2 = int.from_bytes(clave[-8:], "little") | 1
+        return ((h1 + i * h2) % self.m for i in range(self.k))
+
+    def add(self, clave):
+        for p in self._posiciones(clave):
+            self.bits[p >> 3] |= 1 << (p & 7)
+
+    def __contains__(self, clave):
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._posiciones(clave))
+
+
+class MapaClaves:
+    """clave (bytes) → valor (str) en SQLite, con Bloom delante y búfer de escritura.
+    Con el Bloom, la gran mayoría de claves nuevas no llegan a consultar el disco."""
+    def __init__(self, path, capacidad=1_000_000, max_bufer=50_000):
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS claves (k BLOB PRIMARY KEY, v TEXT) WITHOUT ROWID")
+        self.bloom = FiltroBloom(capacidad)
+        self.bufer = {}
+        self.max_bufer = max_bufer
+        self.consultas_disco = 0
+        for (k,) in self.conn.execute("SELECT k FROM claves"):
+            self.bloom.add(k)
+
+    def get(self, clave):
+        if clave not in self.bloom:
+            return None
+        if clave in self.bufer:
+            return self.bufer[clave]
+        self.consultas_disco += 1
+        row = self.conn.execute("SELECT v FROM claves WHERE k = ?", (clave,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, clave, valor):
+        self.bloom.add(clave)
+        self.bufer[clave] = valor
+        if len(self.bufer) >= self.max_bufer:
+            self.volcar()
+
+    def volcar(self):
+        if self.bufer:
+            self.conn.executemany("INSERT OR IGNORE INTO claves VALUES (?, ?)", self.bufer.items())
+            self.conn.commit()
+            self.bufer.clear()
+
+    def close(self):
+        self.volcar()
+        self.conn.close()
+
+
+class FusionIndice:
+    def __init__(self, etapa, columnas_url=URL_COLS_DEFINITIVOS, columnas_texto=("article_text",),
+                 reset=False, filas_por_escritura=5000, capacidad=1_000_000, lsh=None, colapsar=False,
+                 root=almacenDatasets.DEFAULT_ROOT):
+        """
+        etapa: etapa índice de salida (p.ej. "definitivos_index"); los pares artículo↔ticker
+               van a "<etapa>_tickers".
+        columnas_url: columnas candidatas a URL del artículo, en orden de preferencia.
+        columnas_texto: columnas cuyo contenido (unido) se hashea.
+        reset: borra el índice, la relación y las claves y empieza de cero.
+        lsh: duplicadosLSH.IndiceLSH para asignar canonical_id a los artículos nuevos.
+        colapsar: con lsh, no escribe los casi duplicados (solo su par artículo↔ticker).
+        """
+        self.etapa = etapa
+        self.etapa_tickers = f"{etapa}_tickers"
+        self.columnas_url = columnas_url
+        self.columnas_texto = columnas_texto
+        self.filas_por_escritura = filas_por_escritura
+        self.lsh = lsh
+        self.colapsar = colapsar
+        self.root = pathlib.Path(root)
+        claves_path = self.root / "_fusion" / f"{etapa}.sqlite"
+        if reset:
+            for e in (self.etapa, self.etapa_tickers):
+                shutil.rmtree(self.root / e, ignore_errors=True)
+            for p in claves_path.parent.glob(f"{etapa}.sqlite*"):
+                p.unlink()
+        sembrar = not claves_path.exists() and almacenDatasets.existe(etapa, self.root)
+        self.claves = MapaClaves(claves_path, capacidad)
+        self.pendientes, self.pendientes_tickers = [], []
+        self.stats = {"filas": 0, "articulos": 0, "dup_url": 0, "dup_contenido": 0, "casi_dup": 0,
+                      "pares_ticker": 0}
+        if sembrar:
+            self._sembrar()
+
+    # -------------------------------------------------------------- claves
+
+    def _url(self, row):
+        for c in self.columnas_url:
+            u = row.get(c)
+            if isinstance(u, str) and u.strip():
+                return normalizar_url(u)
+        return ""
+
+    def _texto(self, row):
+        partes = [row.get(c) for c in self.columnas_texto]
+        return "\n".join(p for p in partes if isinstance(p, str))
+
+    def _sembrar(self):
+        """Índice escrito antes de que existiera el SQLite de claves: se registran sus
+        artículos y pares para no volver a añadirlos."""
+        cols = list(dict.fromkeys(["ticker", *self.columnas_url, *self.columnas_texto]))
+        existentes = set(almacenDatasets._leer_esquema(self.root / self.etapa)["columnas"])
+        cols = [c for c in cols if c in existentes] + (["article_id"] if "article_id" in existentes else [])
+        for lote in almacenDatasets.leer_lotes(self.etapa, columnas=cols, root=self.root):
+            for row in lote.to_dict("records"):
+                url = self._url(row)
+                h = hash_contenido(self._texto(row))
+                article_id = row.get("article_id") or (_digest(url) if url else h or b"").hex()
+                if url:
+                    self.claves.put(b"u" + _digest(url), article_id)
+                if h:
+                    self.claves.put(b"c" + h, article_id)
+                self.claves.put(b"t" + _digest(f"{article_id}|{row.get('ticker')}"), "")
+        if almacenDatasets.existe(self.etapa_tickers, self.root):
+            for lote in almacenDatasets.leer_lotes(self.etapa_tickers, columnas=["article_id", "ticker"], root=self.root):
+                for a, t in zip(lote["article_id"], lote["ticker"]):
+                    self.claves.put(b"t" + _digest(f"{a}|{t}"), "")
+
+    # -------------------------------------------------------------- fusión
+
+    def anadir(self, df):
+        """Procesa un lote de filas. Devuelve cuántos artículos nuevos aporta."""
+        nuevos = 0
+        for row in df.to_dict("records"):
+            self.stats["filas"] += 1
+            url = self._url(row)
+            texto = self._texto(row)
+            h = hash_contenido(texto)
+            ku = b"u" + _digest(url) if url else None
+            kc = b"c" + h if h else None
+
+            article_id = self.claves.get(ku) if ku else None
+            if article_id is not None:
+                self.stats["dup_url"] += 1
+            elif kc is not None and (article_id := self.claves.get(kc)) is not None:
+                self.stats["dup_contenido"] += 1
+                if ku:
+                    self.claves.put(ku, article_id)   # otra URL del mismo artículo
+            elif ku or kc:
+                article_id = (ku or kc)[1:].hex()
+                canonical_id = self.lsh.anadir(article_id, texto) if self.lsh else article_id
+                if self.colapsar and canonical_id != article_id:
+                    self.stats["casi_dup"] += 1
+                    article_id = canonical_id
+                else:
+                    extra = {"canonical_id": canonical_id} if self.lsh else {}
+                    self.pendientes.append({**row, "article_id": article_id, **extra})
+                    self.stats["articulos"] += 1
+                    self.stats["casi_dup"] += canonical_id != article_id
+                    nuevos += 1
+                if ku:
+                    self.claves.put(ku, article_id)
+                if kc:
+                    self.claves.put(kc, article_id)
+            else:
+                continue  # sin URL ni texto: no hay forma de identificarla
+
+            ticker = row.get("ticker")
+            kt = b"t" + _digest(f"{article_id}|{ticker}")
+            if self.claves.get(kt) is None:
+                self.claves.put(kt, "")
+                self.pendientes_tickers.append({"article_id": article_id, "ticker": ticker,
+                                                almacenDatasets.DATE_COLUMN: row.get(almacenDatasets.DATE_COLUMN)})
+                self.stats["pares_ticker"] += 1
+
+        if len(self.pendientes) >= self.filas_por_escritura or len(self.pendientes_tickers) >= self.filas_por_escritura:
+            self.escribir()
+        return nuevos
+
+    def escribir(self):
+        """Escribe lo pendiente en las etapas y persiste las claves (checkpoint)."""
+        if self.pendientes:
+            almacenDatasets.anadir(pd.DataFrame(self.pendientes), self.etapa, self.root)
+            self.pendientes = []
+        if self.pendientes_tickers:
+            almacenDatasets.anadir(pd.DataFrame(self.pendientes_tickers), self.etapa_tickers, self.root)
+            self.pendientes_tickers = []
+        self.claves.volcar()
+        if self.lsh:
+            self.lsh.conn.commit()
+
+    def cerrar(self):
+        self.escribir()
+        self.claves.close()
+        if self.lsh:
+            self.lsh.close()
+
+    def resumen(self) -> str:
+        s = self.stats
+        return (f"{s['filas']} filas → {s['articulos']} artículos nuevos "
+                f"({s['dup_url']} repetidos por URL, {s['dup_contenido']} por contenido, "
+                f"{s['casi_dup']} casi duplicados{' colapsados' if self.colapsar else ''}), "
+                f"{s['pares_ticker']} pares artículo↔ticker")
+
+
+def tickers_por_articulo(etapa, root=almacenDatasets.DEFAULT_ROOT) -> pd.Series:
+    """article_id → lista de tickers en los que aparece."""
+    rel = almacenDatasets.leer(f"{etapa}_tickers", columnas=["article_id", "ticker"], root=root)
+    return rel.assign(ticker=rel["ticker"].astype(str)).groupby("article_id", sort=False)["ticker"].agg(list)
@@ -0,0 +1,380 @@
+# Búsqueda de texto completo con BM25 sobre los artículos scrapeados (headline, summary y
+# article_text), para no tener que hacer grep de los CSV de definitivos ni cargarlos en pandas.
+#
+# Índice invertido en disco (<root>/_bm25/), por segmentos como un Lucene pequeño:
+#   - Cada llamada a anadir() escribe un segmento nuevo con los artículos que no estaban
+#     (clave: article_id, o la URL normalizada / hash del texto como en fusionIndices.py). Un
+#     artículo ya indexado que llega con otro ticker solo añade el par (artículo, ticker).
+#   - Postings de cada término: ids de documento en diferencias (gaps) y frecuencias, cada
+#     número en varint (7 bits por byte), en dos ficheros que se leen con mmap; en memoria solo
+#     quedan el diccionario de términos y, por documento, longitud, fecha y tickers.
+#   - Con más de MAX_SEGMENTOS segmentos se fusionan en uno (compactar()).
+#   - indice.json lista los segmentos y se reescribe al final (os.replace): un corte a mitad de
+#     un anadir() deja el índice como estaba.
+# Consultas: mismo analizador que al indexar (palabras de 2+ caracteres en minúsculas, sin
+# stop words en inglés), BM25 con las df y la longitud media de todos los segmentos, filtros
+# por ticker y rango de published_utc [desde, hasta).
+#
+#   idx = IndiceBM25()
+#   idx.anadir(almacenDatasets.leer("definitivos"))
+#   idx.buscar("nvidia export restrictions china", k=10, tickers=["NVDA"], desde="2025-10-01")
+#
+#   python data_processing/procesamiento/crearDatasets/indiceBM25.py indexar [--etapa definitivos | --csv f1.csv …]
+#   python data_processing/procesamiento/crearDatasets/indiceBM25.py buscar "fed rate cut" --ticker AAPL -k 5
+#   python data_processing/procesamiento/crearDatasets/indiceBM25.py info | compactar
+import os, json, shutil, pathlib, argparse
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import CountVectorizer
+
+import almacenDatasets
+from fusionIndices import normalizar_url, hash_contenido, _digest, URL_COLS_DEFINITIVOS
+
+DEFAULT_PATH = almacenDatasets.DEFAULT_ROOT / "_bm25"
+
+CAMPOS = ("headline", "summary", "article_text")
+K1 = 1.2
+B = 0.75
+MAX_SEGMENTOS = 8
+LOTE = 20_000           # filas por segmento al indexar una etapa entera
+
+analizar = CountVectorizer(token_pattern=r"(?u)\b\w\w+\b", stop_words="english").build_analyzer()
+
+
+# ------------------------------------------------------------------ varint
+
+def codificar(valores):
+    """(bytes uint8, bytes por valor) de enteros no negativos en varint: 7 bits por byte,
+    el bit alto a 1 en todos los bytes menos el último de cada número."""
+    v = np.asarray(valores, dtype=np.uint64)
+    nb = np.ones(len(v), dtype=np.int64)
+    x = v >> np.uint64(7)
+    while x.any():
+        nb += x > 0
+        x >>= np.uint64(7)
+    cual = np.repeat(np.arange(len(v)), nb)
+    k = np.arange(nb.sum()) - np.repeat(np.cumsum(nb) - nb, nb)
+    b = (v[cual] >> (7 * k).astype(np.uint64)) & np.uint64(0x7F)
+    b |= np.where(k < nb[cual] - 1, np.uint64(0x80), np.uint64(0))
+    return b.astype(np.uint8), nb
+
+def decodificar(b) -> np.ndarray:
+    """Enteros (uint64) de una secuencia de varints completa."""
+    b = np.asarray(b, dtype=np.uint8)
+    if not len(b):
+        return np.empty(0, dtype=np.uint64)
+    fin = (b & 0x80) == 0
+    inicios = np.concatenate(([0], np.flatnonzero(fin)[:-1] + 1))
+    numero = np.concatenate(([0], np.cumsum(fin[:-1])))
+    k = (np.arange(len(b)) - inicios[numero]).astype(np.uint64)
+    return np.add.reduceat((b & 0x7F).astype(np.uint64) << (np.uint64(7) * k), inicios)
+
+def _a_epoch(fechas) -> np.ndarray:
+    """published_utc (texto ISO, naive = UTC) en segundos; NaT → mínimo de int64."""
+    t = pd.to_datetime(pd.Series(fechas, dtype=object), errors="coerce", utc=True, format="ISO8601")
+    segundos = t.dt.tz_localize(None).to_numpy(dtype="datetime64[s]").astype(np.int64)
+    return np.where(t.isna().to_numpy(), np.iinfo(np.int64).min, segundos)
+
+def _segundos(fecha) -> int:
+    """Una fecha de filtro (texto o fecha; naive = UTC) en segundos."""
+    ts = pd.Timestamp(fecha)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert("UTC").tz_localize(None)
+    return ts.value // 10 ** 9
+
+
+# ------------------------------------------------------------------ segmentos
+
+class Segmento:
+    """Un segmento en disco: términos (diccionario en memoria) y postings (mmap)."""
+
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+        meta = np.load(self.path / "indice.npz")
+        self.base = int(meta["base"])
+        self.df = meta["df"]
+        self.off_docs, self.off_tf = meta["off_docs"], meta["off_tf"]
+        self.longitudes = meta["longitudes"]
+        texto = (self.path / "terminos.txt").read_text(encoding="utf-8")
+        self.terminos = texto.split("\n") if texto else []
+        self.posicion = {t: j for j, t in enumerate(self.terminos)}
+        self.docs_bin = self._mmap("postings.bin")
+        self.tf_bin = self._mmap("tf.bin")
+
+    def _mmap(self, nombre):
+        p = self.path / nombre
+        return np.memmap(p, dtype=np.uint8, mode="r") if p.stat().st_size else np.empty(0, dtype=np.uint8)
+
+    def postings(self, termino):
+        """(docs globales int64, tf) del término, o None si no aparece en el segmento."""
+        j = self.posicion.get(termino)
+        if j is None:
+            return None
+        gaps = decodificar(self.docs_bin[self.off_docs[j]:self.off_docs[j + 1]])
+        tf = decodificar(self.tf_bin[self.off_tf[j]:self.off_tf[j + 1]])
+        return np.cumsum(gaps).astype(np.int64) + self.base, tf.astype(np.float32)
+
+    def todos(self):
+        """(término local, doc global, tf) de todas las postings, en orden de término y doc."""
+        gaps = decodificar(self.docs_bin).astype(np.int64)
+        tf = decodificar(self.tf_bin)
+        indptr = np.concatenate(([0], np.cumsum(self.df)))
+        termino = np.repeat(np.arange(len(self.df)), self.df)
+        acumulado = np.cumsum(gaps)
+        antes = np.concatenate(([0], acumulado))[indptr[:-1]]
+        return termino, acumulado - np.repeat(antes, self.df) + self.base, tf
+
+def _escribir_segmento(path, terminos, termino, docs, tf, base, n_docs, longitudes, docs_df, pares):
+    """Escribe un segmento. termino / docs (globales) / tf: postings ordenadas por término y
+    doc; terminos: nombres de los términos en ese orden; docs_df: una fila por documento
+    (clave, published_utc, headline, url); pares: (doc, ticker)."""
+    path = pathlib.Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    df = np.bincount(termino, minlength=len(terminos)).astype(np.int32)
+    indptr = np.concatenate(([0], np.cumsum(df)))
+    local = np.asarray(docs, dtype=np.int64) - base
+    gaps = local.copy()
+    gaps[1:] -= local[:-1]
+    primeros = indptr[:-1][df > 0]
+    gaps[primeros] = local[primeros]
+    b_docs, nb_docs = codificar(gaps)
+    b_tf, nb_tf = codificar(tf)
+    cum_docs = np.concatenate(([0], np.cumsum(nb_docs)))
+    cum_tf = np.concatenate(([0], np.cumsum(nb_tf)))
+    b_docs.tofile(path / "postings.bin")
+    b_tf.tofile(path / "tf.bin")
+    (path / "terminos.txt").write_text("\n".join(terminos), encoding="utf-8")
+    np.savez(path / "indice.npz", base=base, n_docs=n_docs, df=df, off_docs=cum_docs[indptr],
+             off_tf=cum_tf[indptr], longitudes=np.asarray(longitudes, dtype=np.int32))
+    docs_df.to_parquet(path / "docs.parquet", index=False)
+    pares.to_parquet(path / "tickers.parquet", index=False)
+
+
+# ------------------------------------------------------------------ índice
+
+class IndiceBM25:
+    def __init__(self, path=DEFAULT_PATH, reset=False, max_segmentos=MAX_SEGMENTOS, k1=K1, b=B):
+        self.path = pathlib.Path(path)
+        if reset:
+            shutil.rmtree(self.path, ignore_errors=True)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.max_segmentos, self.k1, self.b = max_segmentos, k1, b
+        meta = self.path / "indice.json"
+        self.meta = json.loads(meta.read_text(encoding="utf-8")) if meta.exists() else {"segmentos": [], "siguiente": 0}
+        self._cargar()
+
+    def _cargar(self):
+        self.segmentos = [Segmento(self.path / s) for s in self.meta["segmentos"]]
+        docs = [pd.read_parquet(self.path / s / "docs.parquet") for s in self.meta["segmentos"]]
+        pares = [pd.read_parquet(self.path / s / "tickers.parquet") for s in self.meta["segmentos"]]
+        columnas = ["clave", "published_utc", "headline", "url"]
+        self.docs = pd.concat(docs, ignore_index=True) if docs else pd.DataFrame(columns=columnas)
+        self.pares = pd.concat(pares, ignore_index=True) if pares else pd.DataFrame({"doc": [], "ticker": []})
+        self.claves = dict(zip(self.docs["clave"], range(len(self.docs))))
+        self.longitudes = (np.concatenate([s.longitudes for s in self.segmentos]) if self.segmentos
+                           else np.empty(0, dtype=np.int32))
+        self.epoch = _a_epoch(self.docs["published_utc"])
+        avgdl = max(float(self.longitudes.mean()), 1.0) if len(self.longitudes) else 1.0
+        # parte de BM25 que solo depende del documento: k1·(1 - b + b·|d|/avgdl)
+        self.norma = (self.k1 * (1 - self.b + self.b * self.longitudes / avgdl)).astype(np.float32)
+        self._por_ticker = {t: np.unique(g.to_numpy(dtype=np.int64))
+                            for t, g in self.pares.groupby("ticker", sort=False)["doc"]}
+        self._tickers_doc = None
+
+    def __len__(self):
+        return len(self.docs)
+
+    # -------------------------------------------------------------- altas
+
+    @staticmethod
+    def _clave(row):
+        if isinstance(row.get("article_id"), str):
+            return row["article_id"]
+        for c in URL_COLS_DEFINITIVOS:
+            u = row.get(c)
+            if isinstance(u, str) and u.strip():
+                return _digest(normalizar_url(u)).hex()
+        h = hash_contenido("\n".join(row.get(c) for c in CAMPOS if isinstance(row.get(c), str)))
+        return h.hex() if h is not None else None
+
+    def anadir(self, df) -> int:
+        """Indexa las filas de `df` (headline, summary, article_text, ticker, published_utc y
+        article_id o URLs) que no estaban; devuelve cuántos artículos nuevos."""
+        if not len(df):
+            return 0
+        filas = df.to_dict("records")
+        claves = [self._clave(r) for r in filas]
+        nuevos, pares, vistos = [], set(), dict(self.claves)
+        for r, clave in zip(filas, claves):
+            if clave is None:
+                continue
+            doc = vistos.get(clave)
+            if doc is None:
+                doc = vistos[clave] = len(vistos)
+                nuevos.append(r | {"clave": clave})
+            if isinstance(r.get("ticker"), str):
+                pares.add((doc, r["ticker"]))
+        pares -= set(zip(self.pares["doc"], self.pares["ticker"]))
+        if not nuevos and not pares:
+            return 0
+
+        base = len(self.docs)
+        textos = ["\n".join(r.get(c) for c in CAMPOS if isinstance(r.get(c), str)) for r in nuevos]
+        terminos, termino, docs, tf, longitudes = [], np.empty(0, np.int64), np.empty(0, np.int64), [], []
+        if nuevos:
+            cv = CountVectorizer(analyzer=analizar, dtype=np.int32)
+            try:
+                X = cv.fit_transform(textos).tocsc()
+            except ValueError:      # ningún término (textos vacíos)
+                X = None
+            if X is not None:
+                X.sort_indices()
+                terminos = cv.get_feature_names_out().tolist()
+                termino = np.repeat(np.arange(X.shape[1]), np.diff(X.indptr))
+                docs, tf = X.indices.astype(np.int64) + base, X.data
+                longitudes = np.asarray(X.sum(axis=1)).ravel()
+            else:
+                longitudes = np.zeros(len(nuevos), dtype=np.int32)
+        docs_df = pd.DataFrame({
+            "clave": [r["clave"] for r in nuevos],
+            "published_utc": [r.get("published_utc") if isinstance(r.get("published_utc"), str) else None for r in nuevos],
+            "headline": [r.get("headline") if isinstance(r.get("headline"), str) else None for r in nuevos],
+            "url": [next((r[c] for c in URL_COLS_DEFINITIVOS if isinstance(r.get(c), str)), None) for r in nuevos],
+        }, columns=["clave", "published_utc", "headline", "url"])
+        pares = pd.DataFrame(sorted(pares), columns=["doc", "ticker"]).astype({"doc": np.int64})
+
+        nombre = f"seg-{self.meta['siguiente']:06d}"
+        _escribir_segmento(self.path / nombre, terminos, termino, docs, tf, base, len(nuevos),
+                           longitudes, docs_df, pares)
+        self._publicar(self.meta["segmentos"] + [nombre], self.meta["siguiente"] + 1)
+        if len(self.segmentos) > self.max_segmentos:
+            self.compactar()
+        return len(nuevos)
+
+    def _publicar(self, segmentos, siguiente):
+        viejos = set(self.meta["segmentos"]) - set(segmentos)
+        self.meta = {"segmentos": segmentos, "siguiente": siguiente}
+        tmp = self.path / "indice.json.tmp"
+        tmp.write_text(json.dumps(self.meta, indent=2), encoding="utf-8")
+        os.replace(tmp, self.path / "indice.json")
+        self.segmentos = None       # cierra los mmap antes de borrar (Windows)
+        for s in viejos:
+            shutil.rmtree(self.path / s, ignore_errors=True)
+        self._cargar()
+
+    def compactar(self):
+        """Fusiona todos los segmentos en uno (mismos resultados, menos búsquedas por término)."""
+        if len(self.segmentos) <= 1:
+            return
+        partes = [s.todos() for s in self.segmentos]
+        nombres = np.array([t for s in self.segmentos for t in s.terminos], dtype=object)
+        terminos, global_ = np.unique(nombres, return_inverse=True)
+        desde = np.cumsum([0] + [len(s.terminos) for s in self.segmentos])
+        termino = np.concatenate([global_[desde[i]:desde[i + 1]][t] for i, (t, _, _) in enumerate(partes)])
+        docs = np.concatenate([d for _, d, _ in partes])
+        tf = np.concatenate([f for _, _, f in partes])
+        orden = np.argsort(termino, kind="stable")      # los docs ya van crecientes por segmento
+        nombre = f"seg-{self.meta['siguiente']:06d}"
+        _escribir_segmento(self.path / nombre, terminos.tolist(), termino[orden], docs[orden], tf[orden], 0,
+                           len(self.docs), self.longitudes, self.docs, self.pares)
+        self._publicar([nombre], self.meta["siguiente"] + 1)
+
+    # -------------------------------------------------------------- consultas
+
+    def _mascara(self, tickers=None, desde=None, hasta=None):
+        if tickers is None and desde is None and hasta is None:
+            return None
+        mascara = np.ones(len(self.docs), dtype=bool)
+        if tickers is not None:
+            en = np.zeros(len(self.docs), dtype=bool)
+            for t in tickers:
+                en[self._por_ticker.get(str(t), [])] = True
+            mascara &= en
+        if desde is not None or hasta is not None:
+            mascara &= self.epoch != np.iinfo(np.int64).min
+        if desde is not None:
+            mascara &= self.epoch >= _segundos(desde)
+        if hasta is not None:
+            mascara &= self.epoch < _segundos(hasta)
+        return mascara
+
+    def puntuaciones(self, consulta, tickers=None, desde=None, hasta=None) -> np.ndarray:
+        """BM25 de la consulta para cada documento (0 si no tiene ningún término o no pasa los filtros)."""
+        n = len(self.docs)
+        scores = np.zeros(n, dtype=np.float32)
+        if not n:
+            return scores
+        terminos = pd.Series(analizar(consulta), dtype=object).value_counts()
+        for termino, veces in terminos.items():
+            postings = [p for p in (s.postings(termino) for s in self.segmentos) if p is not None]
+            if not postings:
+                continue
+            docs = np.concatenate([d for d, _ in postings])
+            tf = np.concatenate([f for _, f in postings])
+            idf = np.log1p((n - len(docs) + 0.5) / (len(docs) + 0.5))
+            scores[docs] += np.float32(veces * idf) * tf * (self.k1 + 1) / (tf + self.norma[docs])
+        mascara = self._mascara(tickers, desde, hasta)
+        if mascara is not None:
+            scores[~mascara] = 0
+        return scores
+
+    def buscar(self, consulta, k=10, tickers=None, desde=None, hasta=None) -> pd.DataFrame:
+        """Los k artículos con más BM25: doc, score, tickers, published_utc, headline, url, clave."""
+        scores = self.puntuaciones(consulta, tickers, desde, hasta)
+        cand = np.flatnonzero(scores)
+        if len(cand) > k:
+            cand = cand[np.argpartition(-scores[cand], k - 1)[:k]]
+        cand = cand[np.lexsort((cand, -scores[cand]))]
+        if self._tickers_doc is None:
+            self._tickers_doc = self.pares.groupby("doc")["ticker"].agg(lambda s: ",".join(sorted(s)))
+        out = self.docs.iloc[cand].reset_index(drop=True)
+        out.insert(0, "doc", cand)
+        out.insert(1, "score", scores[cand])
+        out.insert(2, "tickers", self._tickers_doc.reindex(cand).to_numpy())
+        return out
+
+    def resumen(self) -> str:
+        tam = sum(f.stat().st_size for f in self.path.rglob("*") if f.is_file())
+        return (f"{len(self.docs)} artículos, {sum(len(s.terminos) for s in self.segmentos)} términos "
+                f"en {len(self.segmentos)} segmentos, {len(self._por_ticker)} tickers, {tam / 1e6:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Índice BM25 de los artículos scrapeados")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("indexar", help="añade al índice los artículos que no estaban")
+    p.add_argument("--etapa", default="definitivos", help="etapa del almacén (por defecto definitivos)")
+    p.add_argument("--csv", nargs="*", help="CSV sueltos (p.ej. definitivos/*_scrapped_filtrado.csv)")
+    p.add_argument("--reset", action="store_true", help="borra el índice antes")
+    p = sub.add_parser("buscar", help="consulta BM25")
+    p.add_argument("consulta")
+    p.add_argument("-k", type=int, default=10)
+    p.add_argument("--ticker", nargs="*")
+    p.add_argument("--desde")
+    p.add_argument("--hasta")
+    sub.add_parser("info")
+    sub.add_parser("compactar")
+    parser.add_argument("--indice", default=str(DEFAULT_PATH))
+    args = parser.parse_args()
+
+    idx = IndiceBM25(args.indice, reset=getattr(args, "reset", False))
+    if args.cmd == "indexar":
+        columnas = ["ticker", "published_utc", *CAMPOS, *URL_COLS_DEFINITIVOS]
+        lotes = ((pd.read_csv(p) for p in args.csv) if args.csv else
+                 almacenDatasets.leer_lotes(args.etapa, columnas=columnas, filas_por_lote=LOTE))
+        n = sum(idx.anadir(lote) for lote in lotes)
+        print(f"✓ {n} artículos nuevos. {idx.resumen()}")
+    elif args.cmd == "buscar":
+        res = idx.buscar(args.consulta, k=args.k, tickers=args.ticker, desde=args.desde, hasta=args.hasta)
+        for r in res.itertuples():
+            print(f"{r.score:7.2f}  {str(r.published_utc)[:10]}  [{r.tickers}]  {r.headline}\n         {r.url}")
+        if res.empty:
+            print("Sin resultados")
+    elif args.cmd == "info":
+        print(idx.resumen())
+    elif args.cmd == "compactar":
+        idx.compactar()
+        print(f"✓ {idx.resumen()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# Ingesta incremental con checkpoint por ticker.
+# Lo usan finnhub.py (--incremental) y finnhubAPI/ticker_news.py (--incremental).
+#
+# El estado es un JSON {ticker: {...}} con:
+#   - hwm_epoch / hwm_published_utc / hwm_id: la noticia más reciente vista (high-water mark)
+#   - ultima_ventana: fecha "to" de la última ventana completada
+# Tras cada ventana (finnhub.py: tras cada grupo de ventanas) se añaden las filas nuevas (al
+# almacén Parquet o al CSV) y se guarda el estado, así que una ejecución interrumpida continúa
+# desde la última ventana escrita.
+import os, json, pathlib
+import pandas as pd
+from datetime import datetime, timedelta, date
+import almacenDatasets
+
+
+class EstadoIngesta:
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+        self.data = json.loads(self.path.read_text(encoding="utf-8")) if self.path.exists() else {}
+
+    def get(self, ticker: str) -> dict:
+        return self.data.get(ticker, {})
+
+    def ventanas_pendientes(self, ticker: str, lookback_days: int, window_days: int, hoy: date = None):
+        """Ventanas (from, to) que faltan por descargar, de la más antigua a la más reciente.
+        Sin estado empieza en hoy - lookback_days; con estado, en la última ventana completada
+        (se repite ese día por si llegaron noticias después del checkpoint)."""
+        hoy = hoy or date.today()
+        start = hoy - timedelta(days=lookback_days)
+        st = self.get(ticker)
+        for k in ("ultima_ventana", "hwm_published_utc"):
+            if st.get(k):
+                start = max(start, datetime.fromisoformat(st[k]).date())
+        while start <= hoy:
+            end = min(start + timedelta(days=window_days), hoy)
+            yield start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+            start = end + timedelta(days=1)
+
+    def completar_ventana(self, ticker: str, to: str, items):
+        """Marca la ventana como completada y avanza el high-water mark con `items` (JSON de Finnhub)."""
+        st = self.data.setdefault(ticker, {})
+        st["ultima_ventana"] = to
+        for a in items:
+            ts = a.get("datetime")
+            if isinstance(ts, (int, float)) and ts >= st.get("hwm_epoch", float("-inf")):
+                st["hwm_epoch"] = ts
+                st["hwm_published_utc"] = datetime.utcfromtimestamp(ts).isoformat()
+                st["hwm_id"] = a.get("id") or a.get("url")
+        self.guardar()
+
+    def guardar(self):
+        # escritura atómica: si se corta a mitad no se pierde el estado anterior
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps(self.data, indent=2, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+def claves_guardadas(path, key: str) -> set:
+    """Claves (`url_redirect`, `id`, …) ya presentes en el CSV; vacío si no existe."""
+    path = pathlib.Path(path)
+    if not path.exists() or path.stat().st_size == 0:
+        return set()
+    return set(pd.read_csv(path, usecols=[key])[key].dropna().astype(str))
+
+
+def claves_etapa(etapa: str, key: str, **filtros) -> set:
+    """Como claves_guardadas, pero de una etapa del almacén Parquet (solo lee `key`).
+    `filtros` se pasan a almacenDatasets.leer (tickers=…, filtro=…)."""
+    try:
+        df = almacenDatasets.leer(etapa, columnas=[key], **filtros)
+    except FileNotFoundError:
+        return set()
+    return set(df[key].dropna().astype(str))
+
+
+def _nuevas(rows, key: str, seen: set) -> list:
+    new = []
+    for r in rows:
+        k = r.get(key)
+        if k is None or str(k) in seen:
+            continue
+        seen.add(str(k)); new.append(r)
+    return new
+
+
+def anadir_dedup(rows, etapa: str, key: str, seen: set) -> int:
+    """Añade a la etapa del almacén las filas cuya `key` no esté en `seen` (y actualiza `seen`)."""
+    new = _nuevas(rows, key, seen)
+    if new:
+        almacenDatasets.anadir(pd.DataFrame(new), etapa)
+    return len(new)
+
+
+def append_dedup(rows, path, key: str, seen: set) -> int:
+    """Añade al CSV las filas cuya `key` no esté en `seen` (y actualiza `seen`).
+    Respeta el orden de columnas de la cabecera existente. Devuelve cuántas se añadieron."""
+    path = pathlib.Path(path)
+    new = _nuevas(rows, key, seen)
+    if not new:
+        return 0
+    df = pd.DataFrame(new)
+    exists = path.exists() and path.stat().st_size > 0
+    if exists:
+        df = df.reindex(columns=pd.read_csv(path, nrows=0).columns)
+    df.to_csv(path, mode="a" if exists else "w", header=not exists, index=False)
+    return len(new)
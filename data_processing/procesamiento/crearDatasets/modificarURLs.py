@@ -1,18 +1,37 @@
 # 03_resolver_url_original.py
-import os, time, glob, pathlib, re
+import time, re
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import requests
 from bs4 import BeautifulSoup
+from lxml import etree
 import tldextract
+from cacheURLs import CacheURLs
+from almacenHTML import AlmacenHTML
+import almacenDatasets
 
 # ========= CONFIG =========
-INPUT_GLOB = "data_processing/finnhubAPI/data/porEmpresas/urlsFinales/TSLA.csv" 
+# Etapas del almacén Parquet (almacenDatasets): se lee raw (finnhub.py) y se escribe
+# urlsFinales, un ticker cada vez
+ETAPA_ENTRADA = "raw"
+ETAPA_SALIDA = "urlsFinales"
+TICKERS = None          # None = todos los tickers de la etapa de entrada
 URL_COLS_CANDIDATAS = ["url_redirect", "url", "link"]
 TIMEOUT = 25
 SLEEP_BETWEEN = 0.1
 HEADERS = {"User-Agent": "Mozilla/5.0 (resolver-url-original; +dataset)"}
+SOLO_HEAD = True        # lee la respuesta por trozos y para en </head> (False: descarga y parsea el HTML entero)
+CHUNK_SIZE = 8192
+MAX_HEAD_BYTES = 512 * 1024   # tope por si una página no cierra nunca el <head>
+MAX_WORKERS = 16        # URLs resolviéndose a la vez en process_file
+USAR_CACHE = True   # caché SQLite compartida con resolve_redirects.py (cacheURLs.DEFAULT_PATH)
+GUARDAR_HTML = True     # guarda el HTML completo en almacenHTML para que scrapperTextos no lo vuelva a descargar
+MAX_HTML_BYTES = 5 * 1024 * 1024
 # =========================
 
+CACHE = CacheURLs() if USAR_CACHE else None
+ALMACEN = AlmacenHTML() if GUARDAR_HTML else None
+
 def pick_url_column(df):
     for c in URL_COLS_CANDIDATAS:
         if c in df.columns:
@@ -32,6 +51,8 @@ def fetch_final_url(u: str):
         # algunos sites devuelven 200 pero con bloques de consent
         text = r.text if (r.status_code >= 200 and r.status_code < 400) else None
         return r.url, r.status_code, text
+    except requests.Timeout as e:
+        return None, None, f"timeout: {e}"
     except requests.RequestException as e:
         return None, None, str(e)
 
@@ -55,6 +76,80 @@ def extract_canonical(html: str, base_url: str):
         pass
     return None
 
+class CanonicalPullParser:
+    """Parser incremental (lxml) que busca canonical/og:url con el mismo criterio que
+    extract_canonical, pero solo dentro del <head>. feed() devuelve True cuando ya
+    no hace falta leer más."""
+    def __init__(self):
+        self.parser = etree.HTMLPullParser(events=("start", "end"))
+        self.canonical_link = None   # primer <link rel=...canonical...>
+        self.og = None               # primer <meta property="og:url">
+
+    def feed(self, chunk: bytes) -> bool:
+        self.parser.feed(chunk)
+        for event, el in self.parser.read_events():
+            if event == "start" and el.tag == "body" or event == "end" and el.tag == "head":
+                return True
+            if event != "start":
+                continue
+            if el.tag == "link" and self.canonical_link is None and "canonical" in (el.get("rel") or "").lower():
+                self.canonical_link = el.get("href") or ""
+                if self.canonical_link:
+                    return True  # canonical tiene prioridad sobre og:url
+            elif el.tag == "meta" and self.og is None and el.get("property") == "og:url":
+                self.og = el.get("content") or ""
+        return False
+
+    def result(self, base_url: str):
+        if self.canonical_link:
+            return absolutize(self.canonical_link, base_url)
+        if self.og:
+            return absolutize(self.og, base_url)
+        return None
+
+def fetch_canonical_streaming(u: str, keep_body: bool = False):
+    """Sigue redirecciones y parsea solo hasta </head>. Devuelve
+    (final_url, status_code, canonical, error, bytes_leidos, body).
+    Sin keep_body deja de leer al acabar el <head> y body es None; con keep_body
+    sigue descargando (sin parsear) hasta MAX_HTML_BYTES para guardar la página."""
+    try:
+        with requests.get(u, headers=HEADERS, timeout=TIMEOUT, allow_redirects=True, stream=True) as r:
+            if not (r.status_code >= 200 and r.status_code < 400):
+                return r.url, r.status_code, None, None, 0, None
+            parser = CanonicalPullParser()
+            parsing = True
+            n, chunks = 0, []
+            for chunk in r.iter_content(CHUNK_SIZE):
+                n += len(chunk)
+                if keep_body:
+                    chunks.append(chunk)
+                if parsing:
+                    try:
+                        parsing = not parser.feed(chunk) and n < MAX_HEAD_BYTES
+                    except etree.Error:
+                        parsing = False
+                if not parsing and (not keep_body or n >= MAX_HTML_BYTES):
+                    break
+            body = b"".join(chunks) if keep_body else None
+            return r.url, r.status_code, parser.result(r.url), None, n, body
+    except requests.Timeout as e:
+        return None, None, None, f"timeout: {e}", 0, None
+    except requests.RequestException as e:
+        return None, None, None, str(e), 0, None
+
+def fetch_and_canonical(u: str):
+    """(final_url, status, canonical, error, body) con el modo configurado en SOLO_HEAD.
+    body (bytes) solo viene relleno si hay que guardarlo en el almacén."""
+    if SOLO_HEAD:
+        final_url, status, canon, err, _, body = fetch_canonical_streaming(u, keep_body=ALMACEN is not None)
+        return final_url, status, canon, err, body
+    final_url, status, html_or_err = fetch_final_url(u)
+    if isinstance(html_or_err, str) and final_url is None:
+        return None, status, None, html_or_err, None
+    html = html_or_err if isinstance(html_or_err, str) else ""
+    body = html.encode("utf-8") if html and ALMACEN is not None else None
+    return final_url, status, extract_canonical(html, final_url or u), None, body
+
 def absolutize(href: str, base: str):
     # resuelve URLs relativas simples
     if not href:
@@ -83,54 +178,72 @@ def choose_original(final_url: str, canon_url: str):
         return canon_url
     return final_url
 
-def process_file(path: str):
-    df = pd.read_csv(path)
-    url_col = pick_url_column(df)
-
-    results = []
-    for i, u in enumerate(df[url_col].astype(str).fillna("")):
-        u = u.strip()
-        if not u or not u.startswith("http"):
-            results.append({"url_final": "", "url_canonical": "", "url_original": "", "domain": "", "http_status": None, "error": "no_url"})
-            continue
+def resolve_row(u: str):
+    u = u.strip()
+    if not u or not u.startswith("http"):
+        return {"url_final": "", "url_canonical": "", "url_original": "", "domain": "", "http_status": None, "error": "no_url"}
 
-        final_url, status, html_or_err = fetch_final_url(u)
-        if isinstance(html_or_err, str) and final_url is None:
-            # error de requests
-            results.append({"url_final": "", "url_canonical": "", "url_original": "", "domain": "", "http_status": status, "error": html_or_err[:200]})
-            time.sleep(SLEEP_BETWEEN); 
-            continue
-
-        html = html_or_err if isinstance(html_or_err, str) or html_or_err is None else None  # solo por tipado
-        canon = extract_canonical(html_or_err if isinstance(html_or_err, str) else "", final_url or u)
-        original = choose_original(final_url, canon)
-        results.append({
-            "url_final": final_url or "",
-            "url_canonical": canon or "",
-            "url_original": original or "",
-            "domain": domain_of(original or final_url or u),
-            "http_status": status,
-            "error": "" if final_url else "fetch_failed",
-        })
+    entry = CACHE.get(u, need_canonical=True) if CACHE else None
+    if entry is not None and ALMACEN and entry["tipo"] == "ok" and not ALMACEN.has(entry["url_final"]):
+        entry = None  # resuelta, pero falta su HTML en el almacén
+    body = None
+    if entry is not None:
+        if entry["tipo"] == "timeout":
+            return {"url_final": "", "url_canonical": "", "url_original": "", "domain": "", "http_status": None, "error": "timeout (caché)"}
+        final_url, status, canon = entry["url_final"], entry["http_status"], entry["url_canonical"] or None
+    else:
+        final_url, status, canon, err, body = fetch_and_canonical(u)
         time.sleep(SLEEP_BETWEEN)
+        if err is not None and final_url is None:
+            # error de requests
+            if CACHE and err.startswith("timeout"):
+                CACHE.put(u, tipo="timeout")
+            return {"url_final": "", "url_canonical": "", "url_original": "", "domain": "", "http_status": status, "error": err[:200]}
+        tipo = CacheURLs.tipo_de(status)
+        if CACHE and tipo:
+            CACHE.put(u, url_final=final_url, url_canonical=canon or "", http_status=status, tipo=tipo)
+
+    original = choose_original(final_url, canon)
+    if body:
+        ALMACEN.put(body, [final_url, original])
+    return {
+        "url_final": final_url or "",
+        "url_canonical": canon or "",
+        "url_original": original or "",
+        "domain": domain_of(original or final_url or u),
+        "http_status": status,
+        "error": "" if final_url else "fetch_failed",
+    }
+
+def process_file(ticker: str):
+    df = almacenDatasets.leer(ETAPA_ENTRADA, tickers=[ticker]).reset_index(drop=True)
+    url_col = pick_url_column(df)
+
+    # map conserva el orden de las filas
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+        results = list(ex.map(resolve_row, df[url_col].astype(str).fillna("")))
 
     out = pd.concat([df, pd.DataFrame(results)], axis=1)
-    out_path = pathlib.Path(path).with_name(pathlib.Path(path).stem + "_orig.csv")
-    out.to_csv(out_path, index=False)
-    return str(out_path), len(out)
+    almacenDatasets.guardar(out, ETAPA_SALIDA)   # sustituye las particiones del ticker
+    return len(out)
 
 def main():
-    files = sorted(glob.glob(INPUT_GLOB))
-    if not files:
-        print(f"No encontré ficheros con patrón {INPUT_GLOB}")
+    tickers = TICKERS or almacenDatasets.tickers(ETAPA_ENTRADA)
+    if not tickers:
+        print(f"No hay datos en la etapa {ETAPA_ENTRADA}")
         return
-    print(f"Procesando {len(files)} ficheros…")
+    print(f"Procesando {len(tickers)} tickers…")
     total = 0
-    for f in files:
-        out_path, n = process_file(f)
-        print(f"✓ {f} → {out_path} ({n} filas)")
+    for t in tickers:
+        n = process_file(t)
+        print(f"✓ {ETAPA_ENTRADA}/{t} → {ETAPA_SALIDA}/ticker={t} ({n} filas)")
         total += n
     print(f"Terminado. Filas totales procesadas: {total}")
+    if CACHE:
+        print(CACHE.stats())
+        CACHE.close()
+    if ALMACEN:
+        ALMACEN.close()
 
 if __name__ == "__main__":
     main()
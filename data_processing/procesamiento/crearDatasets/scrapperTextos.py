@@ -1,136 +1,256 @@
-import pandas as pd
 import trafilatura
 from tqdm import tqdm
 import time
-import pathlib
 import os
+import json
+import queue
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from almacenHTML import AlmacenHTML
+from filtroCalidad import FiltroCalidad, ERROR_ARTIFACTS, MIN_TEXT_LENGTH
+import almacenDatasets
 
 tqdm.pandas()
 
 # --- CONFIGURACIÓN DE RUTAS Y PARÁMETROS ---
 
-# Directorio donde se encuentran los archivos CSV originales (ej. AMZN_orig.csv, AAPL_orig.csv)
-# Se asume que la ruta es relativa a donde ejecutas el script.
-ROOT_DIR = 'PRUEBABuena/FINNHUB/data' 
+# Etapas del almacén Parquet (almacenDatasets): se lee urlsFinales y se escribe definitivos,
+# un ticker cada vez
+ETAPA_ENTRADA = 'urlsFinales'
+ETAPA_SALIDA = 'definitivos'
 
-# Subdirectorio donde se guardarán los resultados limpios
-OUTPUT_SUBDIR = 'scrappedData' 
-OUTPUT_DIR = pathlib.Path(ROOT_DIR) / OUTPUT_SUBDIR 
+# Directorio de los journals del modo paralelo
+JOURNAL_DIR = almacenDatasets.DEFAULT_ROOT / '_journals'
 
 URL_COLUMN = 'url_original'
 NEW_COLUMN = 'article_text'
 
-#Desechar textos de menos de 100 caracteres, hemos tenido errores con ello.
-MIN_TEXT_LENGTH = 100 
-
-#lista de elementos que he encontrado en los errores, y para filtrarlos
-ERROR_ARTIFACTS = [
-    "oops, something went wrong",
-    "all rights reserved.",
-    "terms and privacy policy",
-    "my portfolio",
-    "watch now",
-    "min read",
-    "scott lehtonen", 
-    "patrick seitz",
-    "- my portfolio",
-    "copyright"
-]
+# Longitud mínima (100 caracteres, hemos tenido errores con textos más cortos) + artefactos de
+# error, de filtroCalidad.py, compilados en un solo regex y aplicados a toda la columna
+FILTRO = FiltroCalidad(ERROR_ARTIFACTS, MIN_TEXT_LENGTH)
+
+# Parámetros de trafilatura.extract (se pueden cambiar y re-extraer desde el almacén sin red)
+TRAFILATURA_KWARGS = dict(favor_recall=True, include_comments=False, output_format='txt')
+
+# HTML guardado por modificarURLs.py. Con SOLO_LOCAL no se toca la red: si una URL
+# no está en el almacén, la fila se descarta.
+ALMACEN = AlmacenHTML()
+SOLO_LOCAL = False
+
+# Modo paralelo: hilos de descarga → cola acotada → procesos de extracción (trafilatura)
+FETCH_WORKERS = 8
+EXTRACT_WORKERS = os.cpu_count() or 2
+QUEUE_SIZE = 64
 
 # --- FUNCIÓN DE EXTRACCIÓN CON FILTRADO ---
 
-def extract_main_text(url):
+def get_html(url):
+    """HTML de la URL: primero del almacén local y, si no está, de la red."""
+    html = ALMACEN.get(url)
+    if html is not None or SOLO_LOCAL:
+        return html
+    time.sleep(0.5)
+    return trafilatura.fetch_url(url)
+
+def extract_from_html(url, downloaded):
     """
-    Extrae el texto del artículo, valida su calidad (longitud y artefactos de error),
-    y devuelve el texto limpio o None si la fila debe ser eliminada.
+    Parte de CPU de extract_main_text: analiza el HTML ya descargado y devuelve el
+    texto principal o None. El filtro de calidad se aplica después a toda la columna.
     """
-    time.sleep(0.5) 
-    
+    if not downloaded:
+        return None
     try:
-        # 1. Descargar el contenido de la URL
-        downloaded = trafilatura.fetch_url(url)
-        
-        if not downloaded:
-            return None
-            
         # 2. Analizar el contenido y extraer solo el texto principal
-        extracted_text = trafilatura.extract(
-            downloaded, 
-            favor_recall=True, 
-            include_comments=False, 
-            output_format='txt'
-        )
-        
-        # Si no hay texto o es muy corto, fallamos
-        if not extracted_text or len(extracted_text) < MIN_TEXT_LENGTH:
-            return None
-        
-        # 3. Validación de Artefactos de Error
-        text_lower = extracted_text.lower()
-        for artifact in ERROR_ARTIFACTS:
-            if artifact in text_lower:
-                return None # Eliminamos si se encuentra un artefacto
-        
-        # Si pasa todas las validaciones, el texto es válido
-        return extracted_text
+        return trafilatura.extract(downloaded, **TRAFILATURA_KWARGS)
     
     except Exception as e:
-        # Captura cualquier error de red o librería y lo marca para eliminación
+        # Captura cualquier error de la librería y lo marca para eliminación
         print(f"Error al procesar {url}: {e}", flush=True) # flush=True para imprimir inmediatamente
         return None
 
-# --- EJECUCIÓN DEL PROCESAMIENTO ---
+def extract_main_text(url):
+    """
+    Extrae el texto del artículo y lo devuelve (o None si no se pudo descargar o
+    analizar). La calidad (longitud y artefactos de error) la valida FILTRO.
+    """
+    try:
+        # 1. Obtener el contenido de la URL (almacén local o red)
+        downloaded = get_html(url)
+    except Exception as e:
+        # Captura cualquier error de red y lo marca para eliminación
+        print(f"Error al procesar {url}: {e}", flush=True)
+        return None
+    return extract_from_html(url, downloaded)
 
-# Crear el directorio de salida si no existe
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-print(f"Directorio de salida creado/verificado: {OUTPUT_DIR}")
+def load_journal(journal_path, urls):
+    """Textos ya extraídos en una ejecución anterior interrumpida: {fila: texto}."""
+    done = {}
+    if journal_path.exists():
+        with open(journal_path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # última línea a medio escribir
+                i = rec["i"]
+                if i < len(urls) and rec["url"] == str(urls[i]):
+                    done[i] = rec["text"]
+    return done
 
-# Buscar todos los archivos que coincidan con el patrón en el ROOT_DIR
-input_files = list(pathlib.Path(ROOT_DIR).glob('*_orig.csv'))
+def extract_parallel(urls, journal_path, fetch_workers=FETCH_WORKERS,
+                     extract_workers=EXTRACT_WORKERS, queue_size=QUEUE_SIZE):
+    """
+    Igual que aplicar extract_main_text a cada URL, pero separando E/S y CPU: un pool de
+    hilos descarga (o lee del almacén) y deja el HTML en una cola acotada, y un pool de
+    procesos ejecuta trafilatura. Cada extracción terminada se apunta en `journal_path`
+    (JSONL), así que si se corta se retoma sin repetir filas; los fallos de descarga o de un
+    proceso de extracción no se apuntan y se reintentan en la siguiente ejecución. Si el pool
+    de procesos se rompe (BrokenProcessPool), se cancelan las descargas pendientes y se relanza
+    la excepción. Devuelve la lista de textos (o None) en el mismo orden que `urls`.
+    """
+    done = load_journal(journal_path, urls)
+    pending = [(i, u) for i, u in enumerate(urls) if i not in done]
+    if done:
+        print(f"Retomando: {len(done)} filas ya extraídas en {journal_path.name}")
+
+    html_queue = queue.Queue(maxsize=queue_size)
+    lock = threading.Lock()
+    bar = tqdm(total=len(urls), initial=len(done))
+
+    def fetch_one(i, u):
+        try:
+            html = get_html(u)
+        except Exception as e:
+            print(f"Error al procesar {u}: {e}", flush=True)
+            html = None
+        html_queue.put((i, u, html))  # se bloquea si la extracción va por detrás
+
+    def record(i, u, text, final=True):
+        with lock:
+            done[i] = text
+            if final:  # los fallos (final=False) no se apuntan: se reintentan al retomar
+                journal.write(json.dumps({"i": i, "url": str(u), "text": text}, ensure_ascii=False) + "\n")
+                journal.flush()
+            bar.update(1)
 
-if not input_files:
-    print(f"\nERROR: No se encontraron archivos *_orig.csv en el directorio: {ROOT_DIR}")
-    exit()
+    def on_extracted(fut, i, u):
+        try:
+            record(i, u, fut.result())
+        except Exception as e:  # p.ej. un proceso de extracción que muere
+            print(f"Error al procesar {u}: {e}", flush=True)
+            record(i, u, None, final=False)
+        in_flight.release()
 
-print(f"\nSe encontraron {len(input_files)} archivos para procesar.")
+    if journal_path.exists() and journal_path.stat().st_size:
+        with open(journal_path, 'rb+') as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")  # cierra la línea que quedó a medias al cortarse
 
-for input_path in input_files:
+    fetchers = ThreadPoolExecutor(max_workers=fetch_workers)
+    extractors = ProcessPoolExecutor(max_workers=extract_workers)
+    in_flight = threading.BoundedSemaphore(extract_workers * 2)
+    fetches = []
+    with open(journal_path, 'a', encoding='utf-8') as journal:
+        try:
+            fetches = [fetchers.submit(fetch_one, i, u) for i, u in pending]
+            for _ in range(len(pending)):
+                i, u, html = html_queue.get()
+                if not html:
+                    record(i, u, None, final=False)
+                    continue
+                in_flight.acquire()
+                try:
+                    fut = extractors.submit(extract_from_html, u, html)
+                except BrokenProcessPool:
+                    in_flight.release()
+                    raise
+                fut.add_done_callback(lambda f, i=i, u=u: on_extracted(f, i, u))
+        finally:
+            # si se corta el bucle, ningún hilo de descarga puede quedarse bloqueado en put:
+            # se cancelan las que no han empezado y se vacía la cola hasta que acaben las demás
+            for f in fetches:
+                f.cancel()
+            while not all(f.done() for f in fetches):
+                try:
+                    html_queue.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            fetchers.shutdown()
+            extractors.shutdown(wait=True, cancel_futures=True)  # con los callbacks ya ejecutados
+            bar.close()
+    return [done.get(i) for i in range(len(urls))]
+
+def process_file(ticker, mode='serie', fetch_workers=FETCH_WORKERS, extract_workers=EXTRACT_WORKERS):
     # 1. Determinar rutas de archivo y nombres
-    input_filename = input_path.name
-    ticker = input_filename.split('_orig')[0] 
-    output_filename = f'{ticker}_scrapped_filtrado.csv'
-    output_path = OUTPUT_DIR / output_filename
+    journal_path = JOURNAL_DIR / f'{ticker}_scrapped.parcial.jsonl'
     
     print("-" * 50)
-    print(f"PROCESANDO: {input_filename}")
+    print(f"PROCESANDO: {ETAPA_ENTRADA}/{ticker}")
     
     try:
         # 2. Cargar el dataset
-        df = pd.read_csv(input_path)
+        df = almacenDatasets.leer(ETAPA_ENTRADA, tickers=[ticker])
     except Exception as e:
-        print(f"Error al cargar {input_filename}: {e}. Saltando archivo.")
-        continue
+        print(f"Error al cargar {ticker}: {e}. Saltando ticker.")
+        return
 
     initial_rows = len(df)
     print(f"Filas iniciales: {initial_rows}")
 
     # 3. Aplicar el web scraping y guardar el resultado
     print("Iniciando extracción de texto...")
-    df[NEW_COLUMN] = df[URL_COLUMN].progress_apply(extract_main_text)
+    if mode == 'paralelo':
+        df[NEW_COLUMN] = extract_parallel(df[URL_COLUMN].tolist(), journal_path, fetch_workers, extract_workers)
+    else:
+        df[NEW_COLUMN] = df[URL_COLUMN].progress_apply(extract_main_text)
 
-    # 4. Limpieza: Eliminar filas donde la extracción falló (valor es None)
+    # 4. Limpieza: Eliminar filas donde la extracción falló o no pasa el filtro de calidad
     print("Aplicando filtros de calidad y artefactos de error...")
-    df_cleaned = df.dropna(subset=[NEW_COLUMN])
+    reasons = FILTRO.motivos(df[NEW_COLUMN])
+    print(reasons.value_counts().to_string())
+    df_cleaned = df[reasons == "ok"]
 
     final_rows = len(df_cleaned)
     rows_dropped = initial_rows - final_rows
 
-    # 5. Guardar el nuevo dataset limpio
-    df_cleaned.to_csv(output_path, index=False)
+    # 5. Guardar el nuevo dataset limpio (sustituye las particiones del ticker)
+    almacenDatasets.guardar(df_cleaned, ETAPA_SALIDA)
+    journal_path.unlink(missing_ok=True)
 
     print(f"PROCESAMIENTO COMPLETO para {ticker}:")
     print(f"  Filas eliminadas: {rows_dropped}")
     print(f"  Filas finales: {final_rows}")
-    print(f"  Guardado en: {output_path}")
+    print(f"  Guardado en: {ETAPA_SALIDA}/ticker={ticker}")
+
+# --- EJECUCIÓN DEL PROCESAMIENTO ---
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modo", choices=["serie", "paralelo"], default="serie",
+                        help="paralelo: descarga con hilos y extracción con procesos, con journal por ticker")
+    parser.add_argument("--fetch-workers", type=int, default=FETCH_WORKERS)
+    parser.add_argument("--extract-workers", type=int, default=EXTRACT_WORKERS)
+    args = parser.parse_args()
+
+    # Crear el directorio de journals si no existe
+    JOURNAL_DIR.mkdir(parents=True, exist_ok=True)
+
+    # Tickers con datos en la etapa de entrada
+    tickers = almacenDatasets.tickers(ETAPA_ENTRADA)
+
+    if not tickers:
+        print(f"\nERROR: No se encontraron datos en la etapa: {ETAPA_ENTRADA}")
+        exit()
+
+    print(f"\nSe encontraron {len(tickers)} tickers para procesar.")
+
+    for ticker in tickers:
+        process_file(ticker, args.modo, args.fetch_workers, args.extract_workers)
+
+    print("\n--- PROCESAMIENTO MASIVO FINALIZADO ---")
 
-print("\n--- PROCESAMIENTO MASIVO FINALIZADO ---")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
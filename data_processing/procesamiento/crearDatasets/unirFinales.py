@@ -1,27 +1,24 @@
-import pandas as pd
-import glob
-import os
+import almacenDatasets
+from fusionIndices import FusionIndice, URL_COLS_DEFINITIVOS
+from duplicadosLSH import IndiceLSH, DEFAULT_PATH as LSH_PATH
 
-# Carpeta donde están los archivos CSV (puedes ajustar la ruta)
-folder_path = r"data_processing/finnhubAPI/data/porEmpresas/definitivos"  # 🔹 CAMBIA esto por la ruta donde están los archivos
+# Etapa con los artículos definitivos de todos los tickers (almacén Parquet, ver almacenDatasets.py)
+ETAPA_ENTRADA = "definitivos"
+ETAPA_SALIDA = "definitivos_index"   # antes INDEX_ALL_scrapped_filtrado.csv
+FILAS_POR_LOTE = 2000                # filas leídas de cada vez
+COLAPSAR_CASI_DUPLICADOS = False     # True: los casi duplicados no se escriben (solo su ticker)
 
-# Buscar todos los CSV que terminen en '_scrapped_filtrado.csv'
-csv_files = glob.glob(os.path.join(folder_path, "*_scrapped_filtrado.csv"))
+# Fusión por lotes: cada artículo una sola vez (por URL normalizada o por contenido) y la
+# relación artículo↔ticker en definitivos_index_tickers. Los casi duplicados (MinHash + LSH,
+# ver duplicadosLSH.py) se marcan con canonical_id
+lsh = IndiceLSH(LSH_PATH.with_name(f"{ETAPA_SALIDA}.sqlite"), reset=True)
+fusion = FusionIndice(ETAPA_SALIDA, columnas_url=URL_COLS_DEFINITIVOS, columnas_texto=("article_text",), reset=True,
+                      lsh=lsh, colapsar=COLAPSAR_CASI_DUPLICADOS)
 
-# Lista para almacenar los DataFrames
-dataframes = []
+print(f"Leyendo: {ETAPA_ENTRADA} ({len(almacenDatasets.tickers(ETAPA_ENTRADA))} tickers)")
+for lote in almacenDatasets.leer_lotes(ETAPA_ENTRADA, filas_por_lote=FILAS_POR_LOTE):
+    fusion.anadir(lote)
+fusion.cerrar()
 
-# Leer y concatenar todos los CSV
-for file in csv_files:
-    print(f"Leyendo: {os.path.basename(file)}")
-    df = pd.read_csv(file)
-    dataframes.append(df)
-
-# Concatenar todo en un solo DataFrame
-combined_df = pd.concat(dataframes, ignore_index=True)
-
-# Guardar en un nuevo archivo
-output_path = os.path.join(folder_path, "INDEX_ALL_scrapped_filtrado.csv")
-combined_df.to_csv(output_path, index=False)
-
-print(f"Archivos combinados correctamente en: {output_path}")
+print(f"Archivos combinados correctamente en: {ETAPA_SALIDA}")
+print(fusion.resumen())
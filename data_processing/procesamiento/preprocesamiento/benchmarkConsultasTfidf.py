@@ -0,0 +1,87 @@
+# Comprobación y benchmark de consultasTfidf frente a lo que hacía la celda de evaluación de
+# 02_BoW_TF-IDF (X[i].toarray() + argsort, cosine_similarity par a par / matriz completa):
+#   1. top términos de todos los artículos: mismos pesos, uno a uno y en lote.
+#   2. similitud coseno de N_PARES pares al azar.
+#   3. vecinos más cercanos de todos los artículos por bloques (MAX_MB) frente a
+#      cosine_similarity(X) entera en denso: mismas similitudes, tiempo y pico de memoria.
+# Ejecuta desde la raíz del repo:
+#   python data_processing/procesamiento/preprocesamiento/benchmarkConsultasTfidf.py
+import sys, time, pathlib, tracemalloc
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1] / "crearDatasets"))
+import almacenDatasets
+from normalizadorTexto import pre_rules_lote
+import consultasTfidf as ct
+
+# ============ CONFIG ============
+ETAPA = "definitivos_index"
+N_TOP = 10
+N_PARES = 2000
+K_VECINOS = 10
+MAX_MB = 64
+TFIDF_CFG = {"ngram_range": (1, 2), "min_df": 3, "max_df": 0.90, "max_features": 120_000, "dtype": np.float32}
+# =================================
+
+def top_terms_for_doc(i, X, terms, n=10):
+    """La versión anterior del notebook."""
+    row = X[i].toarray().ravel()
+    top_idx = row.argsort()[::-1][:n]
+    return list(zip(terms[top_idx], row[top_idx]))
+
+def cronometrar(f):
+    t0 = time.perf_counter()
+    out = f()
+    return out, time.perf_counter() - t0
+
+def pico_mb(f):
+    tracemalloc.start()
+    f()
+    pico = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+    return pico
+
+def main():
+    textos = pre_rules_lote(almacenDatasets.leer(ETAPA, columnas=["article_text"])["article_text"]).tolist()
+    vec = TfidfVectorizer(**TFIDF_CFG)
+    X = vec.fit_transform(textos)
+    terms = vec.get_feature_names_out()
+    n = X.shape[0]
+    print(f"X {X.shape}, nnz {X.nnz}")
+    print(f"{'consulta':<34}{'antes s':>9}{'ahora s':>9}{'x':>8}")
+
+    antes, t_antes = cronometrar(lambda: [top_terms_for_doc(i, X, terms, N_TOP) for i in range(n)])
+    ahora, t_ahora = cronometrar(lambda: [ct.top_terminos(X, i, terms, N_TOP) for i in range(n)])
+    (cols, pesos), t_lote = cronometrar(lambda: ct.top_terminos_lote(X, N_TOP))
+    for i, (a, b) in enumerate(zip(antes, ahora)):
+        esperado = np.array([w for _, w in a if w > 0])
+        assert np.array_equal(esperado, [w for _, w in b]), f"top términos distintos en la fila {i}"
+        assert np.array_equal(esperado, pesos[i][:len(esperado)]), f"top términos en lote distintos en la fila {i}"
+        assert set(cols[i][:len(esperado)]) <= set(X[i].indices)
+    print(f"{'top términos, uno a uno':<34}{t_antes:>9.2f}{t_ahora:>9.2f}{t_antes / t_ahora:>8.1f}")
+    print(f"{'top términos, en lote':<34}{t_antes:>9.2f}{t_lote:>9.2f}{t_antes / t_lote:>8.1f}")
+
+    pares = np.random.default_rng(42).integers(0, n, size=(N_PARES, 2))
+    antes, t_antes = cronometrar(lambda: [cosine_similarity(X[i], X[j])[0, 0] for i, j in pares])
+    ahora, t_ahora = cronometrar(lambda: ct.similitud(X, pares[:, 0], pares[:, 1]))
+    assert np.isclose(ct.similitud(X, *pares[0]), antes[0], atol=1e-6)
+    assert np.allclose(antes, ahora, atol=1e-6), "similitud distinta"
+    print(f"{f'similitud de {N_PARES} pares':<34}{t_antes:>9.2f}{t_ahora:>9.2f}{t_antes / t_ahora:>8.1f}")
+
+    def completa():
+        S = cosine_similarity(X)
+        np.fill_diagonal(S, -np.inf)
+        return -np.sort(-S, axis=1)[:, :K_VECINOS]
+    esperado, t_antes = cronometrar(completa)
+    (idx, sims), t_ahora = cronometrar(lambda: ct.vecinos(X, K_VECINOS, max_mb=MAX_MB))
+    assert np.allclose(esperado, sims, atol=1e-6), "vecinos distintos"
+    assert not (idx == np.arange(n)[:, None]).any(), "un artículo es vecino de sí mismo"
+    print(f"{f'{K_VECINOS} vecinos de todos':<34}{t_antes:>9.2f}{t_ahora:>9.2f}{t_antes / t_ahora:>8.1f}")
+    print(f"pico de memoria de los vecinos: {pico_mb(completa):.0f} MB matriz completa, "
+          f"{pico_mb(lambda: ct.vecinos(X, K_VECINOS, max_mb=MAX_MB)):.0f} MB por bloques (max_mb={MAX_MB})")
+    print("✓ mismos pesos y similitudes")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# Benchmark del modo hashing (vectorizadorHashing.py) frente al camino con vocabulario:
+#   1. TF-IDF del notebook 02 (TFIDF_CFG): tiempo de fit, pico de memoria del fit (tracemalloc),
+#      tamaño y tiempo de carga de los artefactos (joblib + tfidf_idf.csv en el camino con
+#      vocabulario) y cuántos de los 10 vecinos más cercanos (coseno) de N_CONSULTAS artículos
+#      coinciden con los del vocabulario.
+#   2. Temas de tagClassification.py (cuentas + NMF): tiempo de fit, coincidencia de la etiqueta
+#      de tema (adjusted Rand index) y las palabras principales de cada tema en los dos modos.
+#      Aquí el tokenizador no lematiza (tokenize_and_lemmatize sin WordNet), igual en los dos modos.
+# Ejecuta desde la raíz del repo:
+#   python data_processing/procesamiento/preprocesamiento/benchmarkHashing.py
+import re, sys, time, pathlib, tempfile, tracemalloc
+import numpy as np
+import pandas as pd
+from joblib import dump, load
+from sklearn.decomposition import NMF
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+from sklearn.metrics import adjusted_rand_score
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1] / "crearDatasets"))
+import almacenDatasets
+from normalizadorTexto import pre_rules_lote
+from vectorizadorHashing import VectorizadorHashing
+
+# ============ CONFIG ============
+ETAPA = "definitivos_index"
+N_FEATURES = 2 ** 18
+N_CONSULTAS = 300
+N_VECINOS = 10
+N_COMPONENTES = 5
+TFIDF_CFG = {
+    "ngram_range": (1, 2),
+    "min_df": 3,
+    "max_df": 0.90,
+    "max_features": 120_000,
+    "norm": "l2",
+    "use_idf": True,
+    "smooth_idf": True,
+    "sublinear_tf": False,
+    "dtype": np.float32,
+}
+# =================================
+
+def tokenize(text):
+    if pd.isna(text):
+        return []
+    return re.sub(r'[^a-zA-Z\s]', '', str(text)).lower().split()
+
+def medir(crear, textos):
+    """(modelo ajustado, salida, segundos, pico de MB) de crear().fit_transform(textos)."""
+    t0 = time.perf_counter()
+    modelo = crear()
+    X = modelo.fit_transform(textos)
+    t = time.perf_counter() - t0
+    tracemalloc.start()
+    crear().fit_transform(textos)
+    pico = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+    return modelo, X, t, pico
+
+def artefactos(vec, directorio, con_idf_csv):
+    """MB en disco y segundos de carga de lo que guarda el notebook."""
+    dump(vec, directorio / "vec.joblib")
+    if con_idf_csv:
+        pd.DataFrame({"term": vec.get_feature_names_out(), "idf": vec.idf_}).to_csv(directorio / "idf.csv", index=False)
+    t0 = time.perf_counter()
+    load(directorio / "vec.joblib")
+    if con_idf_csv:
+        pd.read_csv(directorio / "idf.csv")
+    t = time.perf_counter() - t0
+    mb = sum(p.stat().st_size for p in directorio.iterdir()) / 2 ** 20
+    for p in directorio.iterdir():
+        p.unlink()
+    return mb, t
+
+def vecinos(X, consultas):
+    sim = (X[consultas] @ X.T).toarray()
+    sim[np.arange(len(consultas)), consultas] = -1
+    return np.argsort(-sim, axis=1)[:, :N_VECINOS]
+
+def palabras(componentes, nombres, n=6):
+    return [", ".join(nombres[np.argsort(-c)[:n]]) for c in componentes]
+
+def main():
+    textos = pre_rules_lote(almacenDatasets.leer(ETAPA, columnas=["article_text"])["article_text"]).tolist()
+    directorio = pathlib.Path(tempfile.mkdtemp())
+    consultas = np.random.default_rng(42).choice(len(textos), N_CONSULTAS, replace=False)
+    print(f"{len(textos)} artículos de '{ETAPA}', n_features={N_FEATURES}")
+
+    print("\n— TF-IDF (02_BoW_TF-IDF) —")
+    print(f"{'modo':<14}{'fit s':>8}{'pico MB':>10}{'columnas':>10}{'disco MB':>10}{'carga s':>9}")
+    hashing_cfg = {k: v for k, v in TFIDF_CFG.items() if k != "max_features"}
+    filas = {}
+    for modo, crear, con_csv in (
+            ("vocabulario", lambda: TfidfVectorizer(**TFIDF_CFG), True),
+            ("hashing", lambda: VectorizadorHashing(n_features=N_FEATURES, **hashing_cfg), False)):
+        vec, X, t, pico = medir(crear, textos)
+        mb, t_carga = artefactos(vec, directorio, con_csv)
+        filas[modo] = (vec, X)
+        print(f"{modo:<14}{t:>8.2f}{pico:>10.0f}{X.shape[1]:>10}{mb:>10.1f}{t_carga:>9.3f}")
+    v_ref, v_hash = vecinos(filas["vocabulario"][1], consultas), vecinos(filas["hashing"][1], consultas)
+    acierto = np.mean([len(set(a) & set(b)) / N_VECINOS for a, b in zip(v_ref, v_hash)])
+    indice = filas["hashing"][0].indice_
+    print(f"vecinos@{N_VECINOS} comunes con el vocabulario: {acierto:.1%}")
+    print(f"índice inverso: {len(indice)} celdas con término")
+
+    print("\n— Temas (tagClassification, cuentas + NMF) —")
+    etiquetas, temas = {}, {}
+    for modo, crear in (
+            ("vocabulario", lambda: CountVectorizer(tokenizer=tokenize, stop_words="english", token_pattern=None)),
+            ("hashing", lambda: VectorizadorHashing(n_features=N_FEATURES, tokenizer=tokenize, stop_words="english",
+                                                    token_pattern=None, use_idf=False, norm=None))):
+        t0 = time.perf_counter()
+        vec = crear()
+        C = vec.fit_transform(textos)
+        nmf = NMF(n_components=N_COMPONENTES, random_state=42)
+        W = nmf.fit_transform(C)
+        t = time.perf_counter() - t0
+        etiquetas[modo] = W.argmax(axis=1)
+        temas[modo] = palabras(nmf.components_, vec.get_feature_names_out())
+        print(f"{modo:<14}{t:>8.2f}s  error de reconstrucción {nmf.reconstruction_err_:.1f}")
+    print(f"ARI de la etiqueta de tema entre modos: {adjusted_rand_score(etiquetas['vocabulario'], etiquetas['hashing']):.3f}")
+    for modo, lista in temas.items():
+        print(f"{modo}:")
+        for i, p in enumerate(lista):
+            print(f"  tema {i}: {p}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# Comprobación y benchmark de lematizadorSpacy frente a la forma anterior del notebook
+# (modelo con disable=["ner", "parser", "textcat"] y nlp(x) fila a fila).
+#   1. La columna text_nc tiene que salir idéntica y en el mismo orden.
+#   2. Artículos/segundo fila a fila y con nlp.pipe para cada combinación de CONFIGURACIONES.
+#   3. Con cachear_lemas, la caché se llena también con n_process > 1 (desde los Doc devueltos)
+#      y una segunda pasada la acierta sin cambiar la salida; después nlp(x) sigue igual.
+# Ejecuta desde la raíz del repo:
+#   python data_processing/procesamiento/preprocesamiento/benchmarkLematizador.py
+import sys, time, pathlib
+import spacy
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1] / "crearDatasets"))
+import almacenDatasets
+import lematizadorSpacy as ls
+from normalizadorTexto import pre_rules_lote
+
+# ============ CONFIG ============
+ETAPA = "definitivos_index"
+N_FILAS = 2000                                      # None = todas
+CONFIGURACIONES = [(64, 1), (256, 1), (256, 2), (256, 4)]   # (batch_size, n_process)
+# =================================
+
+def main():
+    textos = pre_rules_lote(almacenDatasets.leer(ETAPA, columnas=["article_text"])["article_text"])
+    textos = textos.iloc[:N_FILAS] if N_FILAS else textos
+
+    nlp_antes = spacy.load(ls.MODELO, disable=["ner", "parser", "textcat"])
+    t0 = time.perf_counter()
+    esperado = [ls.spacy_clean_strong(nlp_antes(x)) for x in textos]
+    t_antes = time.perf_counter() - t0
+
+    nlp = ls.cargar_nlp()
+    print(f"componentes activos: {nlp.pipe_names}")
+    print(f"{'versión':<30}{'s':>8}{'artículos/s':>14}")
+    print(f"{'nlp(x) fila a fila':<30}{t_antes:>8.2f}{len(textos) / t_antes:>14.0f}")
+    for batch_size, n_process in CONFIGURACIONES:
+        t0 = time.perf_counter()
+        obtenido = ls.lematizar_lote(textos, nlp, batch_size=batch_size, n_process=n_process, progreso=False)
+        t = time.perf_counter() - t0
+        distintos = sum(a != b for a, b in zip(esperado, obtenido))
+        assert distintos == 0 and obtenido.index.equals(textos.index), \
+            f"batch_size={batch_size} n_process={n_process}: {distintos} filas distintas"
+        print(f"{f'nlp.pipe b={batch_size} p={n_process}':<30}{t:>8.2f}{len(textos) / t:>14.0f}")
+    print(f"✓ {len(textos)} filas de text_nc idénticas en todas las configuraciones")
+
+    for n_process in (1, 2):
+        nlp = ls.cargar_nlp()
+        lemas = ls.cachear_lemas(nlp, path=None)
+        for pasada in (1, 2):
+            obtenido = ls.lematizar_lote(textos, nlp, n_process=n_process, progreso=False)
+            assert list(obtenido) == esperado, f"caché, n_process={n_process}, pasada {pasada}"
+            # lematizar_lote deja el lemmatizer como estaba: nlp(x) sigue funcionando igual
+            assert ls.spacy_clean_strong(nlp(textos.iloc[0])) == esperado[0]
+            print(f"p={n_process} pasada {pasada}: {lemas.resumen()}")
+        assert len(lemas.tabla) > 0 and lemas.tasa_acierto() > 0.5
+    print("✓ la caché de lemas se llena con uno y con varios procesos, misma salida")
+
+if __name__ == "__main__":
+    main()
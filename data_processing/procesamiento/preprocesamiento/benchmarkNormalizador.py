@@ -0,0 +1,113 @@
+# Comprobación y benchmark de normalizadorTexto frente a la pre_rules original del notebook
+# 01_preprocesamiento (copiada abajo tal cual, como referencia).
+#   1. Golden: la salida tiene que ser idéntica artículo a artículo en todo el dataset
+#      (article_text de la etapa ETAPA del almacén), en unos casos límite escritos a mano y en
+#      N_FUZZ cadenas al azar hechas con trozos de FUZZ_TOKENS (símbolos, cifras, sufijos,
+#      meses…), que es donde aparecen las combinaciones raras que el dataset no tiene.
+#   2. Rendimiento: artículos/segundo de cada versión (mejor de REPETICIONES).
+# Ejecuta desde la raíz del repo:
+#   python data_processing/procesamiento/preprocesamiento/benchmarkNormalizador.py
+import re, sys, time, random, pathlib
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1] / "crearDatasets"))
+import almacenDatasets
+import normalizadorTexto as nt
+
+# ============ CONFIG ============
+ETAPA = "definitivos"
+REPETICIONES = 3
+CASOS = [
+    "Revenue rose 5% to $3.2bn in Q3 2024, up from 2.5 million on Jan 5.",
+    "Shares of $AAPL fell 1.5 percent; $TSLA gained 12 per cent on 3 March.",
+    "The range was 5%-10% (march 5% and may 7 million) — <b>bold</b> https://x.com/a?b=1",
+    "Read more: nothing here\nStory continues below\nCopyright © 2025 Someone",
+    "Numbers: 1,234.56, 7.5x, abc123, 2020s, 19 sept 2021, €5 m, £3k, +4.2%, -3%.",
+    # contexto que dejan los placeholders de reglas anteriores (casos reales del dataset)
+    "Margin of 46–50% by 2040-50%, below the neutral 50.0 mark; net 10.$30 million.",
+    "Up 5%2020, $5 2020, 5%-10%, q1-5%, 1.2020 and $5 $AAPL.",
+    # el símbolo de moneda delante de un porcentaje: PERCENT iba antes que MONEY
+    "costs $5% more", "a €3 percent fee", "£ 7.5 per cent, $19%. and (€2020%)",
+    # orden entre "%", "percent" y "per cent", y entre las dos reglas de fecha
+    "5 percent-5%, 12%-1,5percent, 1,5%+519per cent", "12 jan 5, 7 sept  5, 1,5 march 0",
+    "", None, "   ",
+]
+N_FUZZ = 200_000
+FUZZ_TOKENS = ["$", "€", "£", "5", "12", "2020", "1,5", "3.2", "%", "percent", "per cent", " ", "  ", "-", "+",
+               ".", ",", "bn", "m", "k", "b", "million", "billion", "q1", "q5", "jan", "march", "may", "sept",
+               "$aapl", "a", "x", "_", "__", "(", ")", "/", "19", "7", "0", "cent", "per"]
+# =================================
+
+# ---- pre_rules original (01_preprocesamiento.ipynb) ----
+URL_RE = re.compile(r"https?://\S+|www\.\S+")
+HTML_TAG_RE = re.compile(r"<[^>]+>")
+BOILERPLATE_RE = re.compile(
+    r"(^read more:.*$|^story continues.*$|copyright\s*©.*$)",
+    flags=re.IGNORECASE | re.MULTILINE,
+)
+CASHTAG_RE = re.compile(r"\$([A-Za-z]{1,10})\b")
+
+def pre_rules_original(text: str) -> str:
+    if not isinstance(text, str) or not text.strip():
+        return ""
+    text = (text.replace("’", "'").replace("“", '"').replace("”", '"')
+                 .replace("–", "-").replace("—", "-")).lower()
+    t = BOILERPLATE_RE.sub("", text)
+    t = HTML_TAG_RE.sub(" ", t)
+    t = URL_RE.sub(" ", t)
+    t = re.sub(CASHTAG_RE, "__TICKER__", t)
+
+    # placeholders financieros
+    t = re.sub(r'\bQ([1-4])\b', r'__QTR\1__', t, flags=re.IGNORECASE)
+    t = re.sub(r'\b[+-]?\d[\d,\.]*\s*%(?=\W|$)', '__PERCENT__', t)
+    t = re.sub(r'\b[+-]?\d[\d,\.]*\s*percent(?=\W|$)', '__PERCENT__', t, flags=re.IGNORECASE)
+    t = re.sub(r'\b[+-]?\d[\d,\.]*\s*per\s+cent(?=\W|$)', '__PERCENT__', t, flags=re.IGNORECASE)
+    t = re.sub(r'(\$|€|£)\s*\d[\d,\.]*\s*(?:bn|b|m|k)?\b', '__MONEY__', t, flags=re.IGNORECASE)
+    t = re.sub(r'\b\d[\d,\.]*\s*(million|billion|trillion|bn|m)\b', '__AMOUNT__', t, flags=re.IGNORECASE)
+    t = re.sub(r'\b(19|20)\d{2}\b', '__YEAR__', t)
+    t = re.sub(r'\b((jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\s+\d{1,2})\b',
+               '__DATE__', t, flags=re.IGNORECASE)
+    t = re.sub(r'\b(\d{1,2}\s+(jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*)\b',
+               '__DATE__', t, flags=re.IGNORECASE)
+    # números genéricos al final
+    t = re.sub(r'(?<![A-Za-z_])\b\d[\d,\.]*\b(?![A-Za-z_])', '__NUM__', t)
+    t = re.sub(r'\s+', ' ', t).strip()
+    return t
+# --------------------------------------------------------
+
+def best_of(fn):
+    best = float("inf")
+    for _ in range(REPETICIONES):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+def main():
+    for caso in CASOS:
+        assert nt.pre_rules(caso) == pre_rules_original(caso), (caso, nt.pre_rules(caso), pre_rules_original(caso))
+    print(f"✓ {len(CASOS)} casos límite idénticos")
+
+    rng = random.Random(0)
+    for _ in range(N_FUZZ):
+        caso = "".join(rng.choice(FUZZ_TOKENS) for _ in range(rng.randint(1, 12)))
+        assert nt.pre_rules(caso) == pre_rules_original(caso), (caso, nt.pre_rules(caso), pre_rules_original(caso))
+    print(f"✓ {N_FUZZ} cadenas al azar idénticas")
+
+    textos = almacenDatasets.leer(ETAPA, columnas=["article_text"])["article_text"]
+    t_orig, esperado = best_of(lambda: [pre_rules_original(t) for t in textos])
+    t_nuevo, obtenido = best_of(lambda: nt.pre_rules_lote(textos))
+    distintos = [i for i, (a, b) in enumerate(zip(esperado, obtenido)) if a != b]
+    for i in distintos[:5]:
+        a, b = esperado[i], obtenido[i]
+        k = next(j for j in range(min(len(a), len(b)) + 1) if a[j:j + 1] != b[j:j + 1])
+        print(f"  ✗ fila {i}: original …{a[max(0, k - 60):k + 60]!r}\n{'':>12}nuevo    …{b[max(0, k - 60):k + 60]!r}")
+    assert not distintos, f"{len(distintos)} de {len(textos)} artículos distintos"
+    print(f"✓ {len(textos)} artículos de '{ETAPA}' idénticos a la pre_rules original")
+
+    print(f"{'versión':<24}{'s':>8}{'artículos/s':>14}")
+    print(f"{'pre_rules original':<24}{t_orig:>8.2f}{len(textos) / t_orig:>14.0f}")
+    print(f"{'normalizadorTexto':<24}{t_nuevo:>8.2f}{len(textos) / t_nuevo:>14.0f}")
+    print(f"x{t_orig / t_nuevo:.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# Benchmark de similaresANN: k artículos más parecidos por LSH sobre el TF-IDF reducido con SVD
+# frente a la búsqueda exacta (coseno contra todo el corpus: TF-IDF disperso o vectores SVD en
+# denso). Informa latencia por consulta (p50 / p99) y recall@K frente al exacto en el mismo
+# espacio SVD, y cuánto se parecen los vecinos SVD a los del TF-IDF completo. Escalas > 1:
+# corpus sintético con copias ruidosas de los vectores SVD, insertadas con anadir_vectores;
+# después, el mismo índice con reconstruir(bits=BITS + log2(escala)).
+# Comprueba además que insertar por partes da el mismo índice que de una vez y que
+# guardar / cargar no cambia los resultados.
+# Ejecuta desde la raíz del repo:
+#   python data_processing/procesamiento/preprocesamiento/benchmarkSimilares.py
+import sys, time, pathlib, tempfile
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1] / "crearDatasets"))
+import almacenDatasets
+from normalizadorTexto import pre_rules_lote
+from consultasTfidf import vecinos
+from similaresANN import IndiceSimilares
+
+# ============ CONFIG ============
+ETAPA = "definitivos_index"
+K = 10
+N_CONSULTAS = 500
+ESCALAS = [1, 10, 40]
+RUIDO = 0.3             # norma del ruido de cada copia sintética (antes de normalizar)
+TFIDF_CFG = {"ngram_range": (1, 2), "min_df": 3, "max_df": 0.90, "max_features": 120_000, "dtype": np.float32}
+# =================================
+
+def percentiles(tiempos):
+    ms = np.array(tiempos) * 1000
+    return f"p50 {np.percentile(ms, 50):7.3f} ms  p99 {np.percentile(ms, 99):7.3f} ms"
+
+def medir(funcion, consultas):
+    t, out = [], []
+    for i in consultas:
+        t0 = time.perf_counter()
+        out.append(funcion(i))
+        t.append(time.perf_counter() - t0)
+    return percentiles(t), out
+
+def top_k(sims, i, k):
+    sims = sims.copy()
+    sims[i] = -np.inf
+    sel = np.argpartition(-sims, k - 1)[:k]
+    return sel[np.argsort(-sims[sel], kind="stable")]
+
+def recall(aprox, exacto):
+    return np.mean([len(set(a) & set(e)) / len(e) for a, e in zip(aprox, exacto)])
+
+def main():
+    textos = pre_rules_lote(almacenDatasets.leer(ETAPA, columnas=["article_text"])["article_text"].dropna())
+    X = TfidfVectorizer(**TFIDF_CFG).fit_transform(textos)
+    print(f"TF-IDF {X.shape}")
+
+    t0 = time.perf_counter()
+    indice = IndiceSimilares.construir(X)
+    print(f"construir (SVD {indice.planos.shape[1]} + LSH {indice.tablas}×{indice.bits} bits): "
+          f"{time.perf_counter() - t0:.1f}s")
+
+    # insertar por partes = de una vez; guardar / cargar
+    partes = IndiceSimilares(indice.svd, indice.planos, indice.umbrales, indice.bits)
+    for trozo in np.array_split(np.arange(X.shape[0]), 4):
+        partes.anadir(X[trozo], trozo)
+    assert np.array_equal(partes.claves, indice.claves) and np.array_equal(partes.articulos, indice.articulos)
+    directorio = pathlib.Path(tempfile.mkdtemp())
+    indice.guardar(directorio)
+    cargado = IndiceSimilares.cargar(directorio)
+    for i in range(0, X.shape[0], 97):
+        a, b = indice.similares(i, K), cargado.similares(str(i), K)
+        assert np.array_equal(a[0], b[0]) and np.allclose(a[1], b[1])
+    print("✓ inserción por partes = de una vez; guardar / cargar sin cambios")
+
+    # SVD frente al TF-IDF completo (exacto en los dos espacios)
+    rng = np.random.default_rng(0)
+    exacto_tfidf, _ = vecinos(X, k=K)
+    V = indice.vectores
+    exacto_svd = [top_k(V @ V[i], i, K) for i in range(len(V))]
+    print(f"vecinos exactos SVD vs TF-IDF completo: recall@{K} {recall(exacto_svd, exacto_tfidf):.3f}")
+
+    base = np.asarray(indice.vectores)
+    for escala in ESCALAS:
+        if escala > 1:
+            indice = IndiceSimilares(indice.svd, indice.planos, indice.umbrales, indice.bits).anadir_vectores(base)
+            t0 = time.perf_counter()
+            for _ in range(escala - 1):
+                ruido = rng.standard_normal(base.shape).astype(np.float32)
+                ruido *= RUIDO / np.linalg.norm(ruido, axis=1, keepdims=True)
+                indice.anadir_vectores(normalize(base + ruido))
+            print(f"\n=== escala {escala}: {len(indice)} artículos "
+                  f"(anadir_vectores {time.perf_counter() - t0:.2f}s)")
+        else:
+            print(f"\n=== escala 1: {len(indice)} artículos")
+        V = np.asarray(indice.vectores)
+        consultas = rng.choice(len(V), size=min(N_CONSULTAS, len(V)), replace=False)
+        t_svd, exacto = medir(lambda i: top_k(V @ V[i], i, K), consultas)
+        variantes = [(f"LSH {indice.bits} bits + reordenar", indice)]
+        if escala > 1:
+            bits = indice.bits + int(np.log2(escala))
+            variantes.append((f"LSH {bits} bits + reordenar", indice.reconstruir(bits=bits)))
+        for nombre, ind in variantes:
+            t_ann, ann = medir(lambda i: ind.similares_posicion(i, K)[0], consultas)
+            print(f"{nombre:<32}{t_ann}   recall@{K} {recall(ann, exacto):.3f}   "
+                  f"{np.mean([len(ind.candidatos(V[i])) for i in consultas[:100]]):.0f} candidatos")
+        print(f"{'exacto, SVD en denso':<32}{t_svd}")
+        if escala == 1:
+            t_x, _ = medir(lambda i: top_k((X @ X[i].T).toarray().ravel(), i, K), consultas)
+            print(f"{'exacto, TF-IDF disperso':<32}{t_x}")
+
+if __name__ == "__main__":
+    main()
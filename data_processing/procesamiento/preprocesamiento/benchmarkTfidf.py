@@ -0,0 +1,89 @@
+# Comprobación y benchmark de tfidfIncremental frente a reajustar TfidfVectorizer en batch.
+#   1. El corpus llega en N_LOTES lotes. Tras cada lote: tiempo de partial_fit + matriz() frente
+#      a fit_transform sobre todo lo visto, y la matriz, el vocabulario y el IDF tienen que salir
+#      idénticos.
+#   2. retener() (quitar el primer lote) y guardar() / cargar() dan también lo mismo que el batch.
+# Ejecuta desde la raíz del repo:
+#   python data_processing/procesamiento/preprocesamiento/benchmarkTfidf.py
+import sys, time, pathlib, tempfile
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1] / "crearDatasets"))
+import almacenDatasets
+from normalizadorTexto import pre_rules_lote
+from tfidfIncremental import TfidfIncremental
+
+# ============ CONFIG ============
+ETAPA = "definitivos_index"
+N_LOTES = 5
+TFIDF_CFG = {
+    "ngram_range": (1, 2),
+    "min_df": 3,
+    "max_df": 0.90,
+    "max_features": 120_000,
+    "norm": "l2",
+    "use_idf": True,
+    "smooth_idf": True,
+    "sublinear_tf": False,
+    "dtype": np.float32,
+}
+# =================================
+
+def comprobar(tfidf, textos, nombre):
+    """Ajuste batch de `textos` y comparación exacta con el estado incremental."""
+    t0 = time.perf_counter()
+    vec = TfidfVectorizer(**TFIDF_CFG)
+    esperado = vec.fit_transform(textos)
+    t_batch = time.perf_counter() - t0
+    X = tfidf.matriz(textos)
+    inc = tfidf.vectorizador()
+    esperado.sort_indices()     # el batch deja las columnas desordenadas dentro de cada fila
+    iguales = (X.shape == esperado.shape and X.dtype == esperado.dtype
+               and np.array_equal(X.indptr, esperado.indptr) and np.array_equal(X.indices, esperado.indices)
+               and np.array_equal(X.data, esperado.data)
+               and np.array_equal(inc.get_feature_names_out(), vec.get_feature_names_out())
+               and np.array_equal(inc.idf_, vec.idf_))
+    assert iguales, f"{nombre}: distinto del ajuste batch"
+    nuevos = textos[:50]
+    assert (inc.transform(nuevos) != vec.transform(nuevos)).nnz == 0, f"{nombre}: transform distinto"
+    return t_batch
+
+def main():
+    textos = pre_rules_lote(almacenDatasets.leer(ETAPA, columnas=["article_text"])["article_text"]).tolist()
+    lotes = np.array_split(np.arange(len(textos)), N_LOTES)
+    print(f"TF-IDF de {len(textos)} artículos de '{ETAPA}' en {N_LOTES} lotes")
+    print(f"{'artículos':>10}{'batch s':>10}{'incremental s':>15}{'x':>7}{'términos':>10}{'vocabulario':>13}")
+
+    tfidf = TfidfIncremental(**TFIDF_CFG)
+    t_batch_total = t_inc_total = 0.0
+    for lote in lotes:
+        t0 = time.perf_counter()
+        tfidf.partial_fit([textos[i] for i in lote])
+        vistos = textos[:lote[-1] + 1]
+        tfidf.matriz(vistos)
+        t_inc = time.perf_counter() - t0
+        t_batch = comprobar(tfidf, vistos, f"tras {len(vistos)} artículos")
+        t_batch_total += t_batch
+        t_inc_total += t_inc
+        print(f"{len(vistos):>10}{t_batch:>10.2f}{t_inc:>15.2f}{t_batch / t_inc:>7.1f}"
+              f"{len(tfidf.terminos):>10}{len(tfidf.vectorizador().vocabulary_):>13}")
+    print(f"{'total':>10}{t_batch_total:>10.2f}{t_inc_total:>15.2f}{t_batch_total / t_inc_total:>7.1f}")
+
+    t0 = time.perf_counter()
+    tfidf.partial_fit(textos)       # mismo corpus otra vez: no añade nada
+    print(f"partial_fit del corpus ya visto: {time.perf_counter() - t0:.2f}s, {tfidf.n_docs} artículos")
+    assert tfidf.n_docs == len(textos)
+
+    path = pathlib.Path(tempfile.mkdtemp()) / "tfidf_incremental.joblib"
+    tfidf.guardar(path)
+    cargado = TfidfIncremental.cargar(path, **TFIDF_CFG)
+    comprobar(cargado, textos, "cargado de disco")
+
+    resto = textos[len(lotes[0]):]
+    cargado.retener(resto)
+    comprobar(cargado, resto, "retener")
+    print("✓ matriz, vocabulario, IDF y transform idénticos al ajuste batch en todos los casos")
+
+if __name__ == "__main__":
+    main()
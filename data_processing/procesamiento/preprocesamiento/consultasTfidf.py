@@ -0,0 +1,87 @@
+# Consultas sobre la matriz TF-IDF guardada (tfidf_X.npz, csr) sin pasarla a denso.
+#
+#   - top_terminos(X, i, terminos, n): los n términos de más peso del artículo i, sacados de los
+#     data / indices de su fila con argpartition (solo sus no nulos, no las ~100k columnas).
+#   - top_terminos_lote(X, n): lo mismo para todas las filas, en dos arrays (n_filas, n).
+#   - similitud(X, i, j): coseno entre dos artículos, o entre muchos pares de una vez.
+#   - bloques_similitud(X, Y, max_mb): similitud coseno de X contra Y por bloques de filas, con
+#     cada bloque (producto disperso + su versión densa) por debajo de max_mb; X normalizada y
+#     su traspuesta, que se guardan aparte, no cuentan.
+#   - vecinos(X, k, max_mb): los k artículos más parecidos a cada uno, sobre esos bloques.
+# Las filas se normalizan (l2) antes del producto, así que también sirve con norm=None.
+#
+#   X = sparse.load_npz(SAVE_DIR / "tfidf_X.npz")
+#   top_terminos(X, 0, vec.get_feature_names_out(), n=10)
+#   idx, sims = vecinos(X, k=5, max_mb=256)
+import numpy as np
+from scipy import sparse
+from sklearn.preprocessing import normalize
+
+MAX_MB = 256
+
+
+def _top_fila(X, i, n):
+    """(columnas, pesos) de los n no nulos de más peso de la fila i, de mayor a menor."""
+    inicio, fin = X.indptr[i], X.indptr[i + 1]
+    data, indices = X.data[inicio:fin], X.indices[inicio:fin]
+    if len(data) > n:
+        sel = np.argpartition(-data, n - 1)[:n]
+        data, indices = data[sel], indices[sel]
+    orden = np.argsort(-data, kind="stable")
+    return indices[orden], data[orden]
+
+def top_terminos(X, i, terminos, n=10) -> list:
+    """[(término, peso)] de la fila i, de mayor a menor peso."""
+    columnas, pesos = _top_fila(X, i, n)
+    return list(zip(terminos[columnas], pesos))
+
+def top_terminos_lote(X, n=10):
+    """(columnas, pesos) de forma (n_filas, n) con los n términos de más peso de cada fila, de
+    mayor a menor; -1 / 0 donde la fila tiene menos de n no nulos."""
+    X = sparse.csr_matrix(X)
+    columnas = np.full((X.shape[0], n), -1, dtype=np.int64)
+    pesos = np.zeros((X.shape[0], n), dtype=X.dtype)
+    for i in range(X.shape[0]):
+        c, p = _top_fila(X, i, n)
+        columnas[i, :len(c)] = c
+        pesos[i, :len(p)] = p
+    return columnas, pesos
+
+def similitud(X, i, j):
+    """Coseno entre las filas i y j; con arrays de índices, el de cada par (i[p], j[p])."""
+    a, b = normalize(X[np.atleast_1d(i)]), normalize(X[np.atleast_1d(j)])
+    s = np.asarray(a.multiply(b).sum(axis=1)).ravel()
+    return float(s[0]) if np.ndim(i) == 0 else s
+
+def filas_por_bloque(n_columnas, max_mb=MAX_MB, itemsize=4) -> int:
+    """Filas de un bloque denso (filas × n_columnas) que caben en max_mb."""
+    return max(1, int(max_mb * 2 ** 20 // (max(n_columnas, 1) * itemsize)))
+
+def bloques_similitud(X, Y=None, max_mb=MAX_MB, bytes_extra=0):
+    """Genera (inicio, S) con S = coseno(X[inicio:inicio + b], Y) en denso, bloque a bloque.
+    bytes_extra: lo que gasta por celda quien consume los bloques (para que quepa en max_mb)."""
+    X = normalize(sparse.csr_matrix(X))
+    Yt = X.T.tocsr() if Y is None else normalize(sparse.csr_matrix(Y)).T.tocsr()
+    # por celda, en el peor caso: el bloque denso + el producto disperso (dato + índice)
+    por_celda = np.dtype(X.dtype).itemsize * 2 + Yt.indices.itemsize + bytes_extra
+    b = filas_por_bloque(Yt.shape[1], max_mb, por_celda)
+    for inicio in range(0, X.shape[0], b):
+        yield inicio, (X[inicio:inicio + b] @ Yt).toarray()
+
+def vecinos(X, k=10, max_mb=MAX_MB):
+    """(índices, similitudes) de forma (n_filas, k): los k artículos más parecidos a cada uno,
+    sin contarse a sí mismo, de mayor a menor similitud."""
+    n = X.shape[0]
+    k = min(k, n - 1)
+    indices = np.empty((n, k), dtype=np.int64)
+    sims = np.empty((n, k), dtype=X.dtype)
+    # argpartition devuelve un índice int64 por celda del bloque
+    for inicio, S in bloques_similitud(X, max_mb=max_mb, bytes_extra=8):
+        filas = np.arange(S.shape[0])
+        S[filas, inicio + filas] = -np.inf
+        sel = np.argpartition(S, -k, axis=1)[:, -k:]
+        valores = np.take_along_axis(S, sel, axis=1)
+        orden = np.argsort(-valores, axis=1, kind="stable")
+        indices[inicio:inicio + len(S)] = np.take_along_axis(sel, orden, axis=1)
+        sims[inicio:inicio + len(S)] = np.take_along_axis(valores, orden, axis=1)
+    return indices, sims
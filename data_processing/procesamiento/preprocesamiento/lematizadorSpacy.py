@@ -0,0 +1,138 @@
+# Lematización con spaCy para la columna text_nc (01_preprocesamiento, embeddings no contextuales).
+#
+# Antes el notebook hacía nlp(x) fila a fila dentro de progress_apply: un solo núcleo y sin
+# aprovechar el batching de spaCy. Aquí los textos pasan por nlp.pipe (batch_size y n_process
+# configurables) y cada Doc se filtra con spacy_clean_strong, igual que antes. nlp.pipe devuelve
+# los Doc en el mismo orden de entrada, también con varios procesos.
+#
+# De la pipeline solo se deja lo que usa spacy_clean_strong: el lemma_ (lemmatizer, que en los
+# modelos en_core_web_* depende de las etiquetas de tagger + attribute_ruler, y estos de
+# tok2vec); is_punct / is_space / text son del tokenizador. parser, ner, senter… se excluyen.
+#
+# Con cachear_lemas(nlp) lematizar_lote usa la caché persistida de cacheLemas.py. La clave es
+# texto + POS + morfología, la misma que usa el lemmatizer por reglas de spaCy para su caché en
+# memoria, y como spaCy no se guardan los tokens que is_base_form da por forma base (eso depende
+# de la morfología, y el lema sería el texto en minúsculas de todos modos):
+#   - n_process == 1: durante la llamada, el lemmatizer consulta la caché antes de calcular; al
+#     terminar se le devuelve su lemmatize original (es un atributo de instancia en spaCy).
+#   - n_process > 1: el lemmatizer se queda tal cual (los procesos hijos no ven la caché, y con
+#     spawn una función puesta sobre el pipe no se podría serializar); la caché se rellena en el
+#     proceso principal con la clave y el lemma_ de los tokens de los Doc devueltos.
+#
+#   from lematizadorSpacy import cargar_nlp, cachear_lemas, lematizar_lote
+#   nlp = cargar_nlp()
+#   lemas = cachear_lemas(nlp)
+#   df["text_nc"] = lematizar_lote(df["text_nc_step1"], nlp, batch_size=256, n_process=4)
+#   lemas.guardar()
+import re, sys, pathlib, weakref
+import pandas as pd
+import spacy
+from spacy.lang.en.stop_words import STOP_WORDS
+from tqdm import tqdm
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1] / "crearDatasets"))
+from cacheLemas import CacheLemas
+
+MODELO = "en_core_web_sm"
+COMPONENTES_NECESARIOS = ("tok2vec", "tagger", "attribute_ruler", "lemmatizer")
+BATCH_SIZE = 256
+N_PROCESS = 1
+
+STOPWORDS = set(STOP_WORDS)     # = nlp.Defaults.stop_words del modelo inglés
+STOPWORDS.discard("us")  # mantener "US" como país
+
+KEEP_TERMS = {
+    "uk", "us", "eu", "ai", "ceo", "cfo", "ipo", "esg", "gdp", "cpi", "pmi", "ppi",
+    "eps", "roi", "ebitda", "fx", "irr", "yoy", "qoq", "bps", "ev", "iot", "ml",
+    "nyse", "nasdaq", "dow", "sp500", "ftse", "dax", "cac", "nikkei", "tsx",
+    "hk", "jp", "cn", "in", "br", "mx", "de", "fr", "it", "sg", "za", "kr",
+    "gm", "ge", "bp", "ibm", "aapl", "tsla", "msft", "meta", "googl",
+    "ons", "imf", "oecd", "ecb", "boe", "fed", "sec", "bis", "opec", "wto", "un"
+}
+
+_CACHES = weakref.WeakKeyDictionary()     # nlp → CacheLemas de cachear_lemas
+
+ACRONYM_RE = re.compile(r"^[A-Z]{2,5}$")       # UK, ONS, GDP
+MIXED_CASE_RE = re.compile(r"^[A-Z0-9&]{2,6}$")  # 5G, S&P, AT&T
+
+
+def cargar_nlp(modelo=MODELO):
+    """Carga el modelo con solo los componentes que necesita spacy_clean_strong."""
+    componentes = spacy.util.get_model_meta(spacy.util.get_package_path(modelo))["components"]
+    return spacy.load(modelo, exclude=[c for c in componentes if c not in COMPONENTES_NECESARIOS])
+
+def cachear_lemas(nlp, **kwargs) -> CacheLemas:
+    """Asocia a `nlp` una caché de lemas (la usa lematizar_lote) y la devuelve (para guardar())."""
+    calcular = nlp.get_pipe("lemmatizer").lemmatize
+    # ":morph": las claves de antes (texto + POS) quedan en otro espacio y no se cargan
+    cache = CacheLemas(f"spacy:{nlp.meta['lang']}_{nlp.meta['name']}:morph", lambda token: calcular(token)[0], **kwargs)
+    _CACHES[nlp] = cache
+    return cache
+
+def _clave(token) -> str:
+    # = (orth, pos, morph.key) de Lemmatizer.rule_lemmatize, en texto para poder persistirla
+    return f"{token.text}\t{token.pos_}\t{token.morph}"
+
+def spacy_clean_strong(doc) -> str:
+    out = []
+    for tok in doc:
+        text_tok = tok.text
+        lemma = tok.lemma_.lower()
+
+        # --- Placeholders (ej: __MONEY__) ---
+        if text_tok.startswith("__") and text_tok.endswith("__"):
+            out.append(text_tok)
+            continue
+
+        # --- Espacios o puntuación ---
+        if tok.is_punct or tok.is_space:
+            continue
+
+        # --- Stopwords primero ---
+        if lemma in STOPWORDS:
+            continue
+
+        # --- Siglas importantes ---
+        if lemma in KEEP_TERMS:
+            out.append(lemma)
+            continue
+
+        # --- Detectar acrónimos por patrón ---
+        if ACRONYM_RE.match(text_tok) or MIXED_CASE_RE.match(text_tok):
+            out.append(text_tok.lower())
+            continue
+
+        # --- Palabras normales ---
+        if lemma.isalpha() and len(lemma) >= 3:
+            out.append(lemma)
+
+    return " ".join(out)
+
+def lematizar_lote(textos, nlp=None, batch_size=BATCH_SIZE, n_process=N_PROCESS, progreso=True) -> pd.Series:
+    """spacy_clean_strong(nlp(x)) para cada texto, con nlp.pipe. Conserva orden e índice."""
+    nlp = nlp or cargar_nlp()
+    textos = textos if isinstance(textos, pd.Series) else pd.Series(list(textos), dtype=object)
+    entrada = ("" if not isinstance(t, str) else t for t in textos)
+    cache = _CACHES.get(nlp)
+    lemmatizer = nlp.get_pipe("lemmatizer")
+    original = lemmatizer.lemmatize
+    if cache is not None and n_process == 1:
+        def lemmatize(token):
+            if lemmatizer.is_base_form(token):
+                return original(token)
+            return [cache.lema(_clave(token), token)]
+        lemmatizer.lemmatize = lemmatize
+    try:
+        docs = nlp.pipe(entrada, batch_size=batch_size, n_process=n_process)
+        if progreso:
+            docs = tqdm(docs, total=len(textos), desc="spaCy")
+        out = []
+        for doc in docs:
+            if cache is not None and n_process != 1:
+                for tok in doc:
+                    if not lemmatizer.is_base_form(tok):
+                        cache.anotar(_clave(tok), tok.lemma_)
+            out.append(spacy_clean_strong(doc))
+    finally:
+        lemmatizer.lemmatize = original
+    return pd.Series(out, index=textos.index, dtype=object)
@@ -0,0 +1,134 @@
+# Normalizador de textos financieros: versión en una pasada de `pre_rules` (01_preprocesamiento).
+#
+# pre_rules hacía ~15 re.sub seguidos, varios con el patrón sin compilar. Aquí la limpieza
+# (boilerplate, HTML, URLs) sigue siendo un paso por regla, porque se pisan entre sí, pero todos
+# los placeholders (__TICKER__, __QTR1__, __PERCENT__, __MONEY__, __AMOUNT__, __YEAR__, __DATE__,
+# __NUM__) salen de UN único escaneo con una alternancia compilada. La alternancia respeta el
+# orden de pre_rules: las reglas van en el mismo orden y con lookaheads para que una regla
+# posterior no "robe" el texto que se habría llevado una anterior.
+#
+# La salida es idéntica a pre_rules (lo comprueba benchmarkNormalizador.py sobre el dataset, unos
+# casos límite y cadenas al azar).
+#
+#   from normalizadorTexto import pre_rules, pre_rules_lote
+#   df["text_nc_step1"] = pre_rules_lote(df["article_text"])
+import re
+import pandas as pd
+
+TIPOGRAFIA = str.maketrans({"’": "'", "“": '"', "”": '"', "–": "-", "—": "-"})
+
+URL_RE = re.compile(r"https?://\S+|www\.\S+")
+HTML_TAG_RE = re.compile(r"<[^>]+>")
+BOILERPLATE_RE = re.compile(
+    r"(^read more:.*$|^story continues.*$|copyright\s*©.*$)",
+    flags=re.IGNORECASE | re.MULTILINE,
+)
+_PALABRA_RE = re.compile(r"\w")
+
+# pre_rules aplicaba una regla detrás de otra, y cada sustitución cambia lo que ven las reglas
+# siguientes: el placeholder empieza y acaba en "_", que cuenta como letra para \b y para los
+# lookarounds. Para dar lo mismo en una sola pasada, cada regla comprueba al final si lo que
+# viene detrás lo habría sustituido antes una regla anterior (_fin), y el bucle de _sustituir
+# trata aparte la posición justo después de un placeholder.
+_MES = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*"
+_SUFIJO_PCT = r"\s*(?:%|percent|per\s+cent)(?=\W|$)"
+
+def _fin(*anteriores):
+    """\b tal como lo veía la regla si detrás hubiera un placeholder de `anteriores`."""
+    if not anteriores:
+        return r"\b"
+    x = "|".join(anteriores)
+    return rf"(?:(?<=\w)(?!\w)(?!{x})|(?<!\w)(?=\w|{x}))"
+
+# reglas anteriores que empiezan por un carácter que no es de palabra ($, signo)
+_TICKER = r"\$[a-z]{1,10}\b"
+_PCT_SIGNO = rf"\b[+-]\d[\d,\.]*{_SUFIJO_PCT}(?!{_TICKER})"
+# "%", "percent" y "per cent" eran tres re.sub seguidos: uno posterior no casa si justo detrás
+# empieza uno anterior (que lo habría dejado pegado a un "_")
+_CIFRA_PCT = r"\b[+-]?\d[\d,\.]*\s*"
+_PCT_SIMBOLO = rf"{_CIFRA_PCT}%(?=\W|$)(?!{_TICKER})"
+_PCT_PALABRA = rf"{_CIFRA_PCT}percent(?=\W|$)(?!{_TICKER}|{_PCT_SIMBOLO})"
+_PCT_PER_CENT = rf"{_CIFRA_PCT}per\s+cent(?=\W|$)(?!{_TICKER}|{_PCT_SIMBOLO}|{_PCT_PALABRA})"
+_PERCENT = rf"{_PCT_SIMBOLO}|{_PCT_PALABRA}|{_PCT_PER_CENT}"
+# el escaneo encuentra antes el símbolo que la cifra: si la cifra empieza un porcentaje, en
+# pre_rules ya era __PERCENT__ cuando llegaba la regla de MONEY ("$5%" → "$__PERCENT__")
+_MONEY = rf"[\$€£]\s*(?!{_PERCENT})\d[\d,\.]*\s*(?:bn|b|m|k)?{_fin(_TICKER, _PCT_SIGNO)}"
+_ANTES_NUMERO = (_TICKER, _PCT_SIGNO, _MONEY)
+
+_AMOUNT = rf"\b\d[\d,\.]*\s*(?:million|billion|trillion|bn|m){_fin(*_ANTES_NUMERO)}"
+_YEAR = rf"\b(?:19|20)\d{{2}}{_fin(*_ANTES_NUMERO)}"
+_DATE_MES_NUM = rf"\b{_MES}\s+(?!{_PERCENT}|{_AMOUNT})\d{{1,2}}{_fin(*_ANTES_NUMERO)}"
+# "12 jan 5": la regla mes + número iba antes, así que el mes ya era parte de "jan 5"
+_DATE_NUM_MES = rf"\b\d{{1,2}}\s+(?!{_DATE_MES_NUM}){_MES}{_fin(*_ANTES_NUMERO)}"
+
+# Una alternativa por placeholder, en el orden en que pre_rules aplicaba las reglas
+REGLAS = [
+    ("TICKER", _TICKER),
+    ("QTR", rf"\bq(?P<trimestre>[1-4]){_fin(_TICKER)}"),
+    ("PERCENT", _PERCENT),
+    ("MONEY", _MONEY),
+    ("AMOUNT", _AMOUNT),
+    ("YEAR", _YEAR),
+    # el número de la fecha no puede ser el inicio de un porcentaje o una cantidad
+    ("DATE", rf"{_DATE_MES_NUM}|{_DATE_NUM_MES}"),
+    # un número no se come un año o una fecha que empiece tras su "." o ","
+    ("NUM", rf"(?<![A-Za-z_])\b\d(?:\d|[,\.](?!{_YEAR}|{_DATE_NUM_MES}))*{_fin(*_ANTES_NUMERO)}"
+            rf"(?![A-Za-z_])(?!{'|'.join(_ANTES_NUMERO)}|{_AMOUNT}|{_YEAR}|{_DATE_NUM_MES})"),
+]
+# Filtro rápido delante de la alternancia: solo se prueban las 8 reglas donde puede empezar
+# alguna (símbolo, signo, cifra, "q1"… o un mes seguido de número)
+_INICIO = rf"(?=[\$€£+\-\d]|q[1-4]\b|{_MES}\s+\d)"
+
+def _alternancia(reglas):
+    return re.compile(_INICIO + "(?:" + "|".join(f"(?P<{nombre}>{patron})" for nombre, patron in reglas) + ")")
+
+PLACEHOLDER_RE = _alternancia(REGLAS)
+# Justo después de un placeholder que en el original acababa en "%" o en espacio, las reglas
+# posteriores veían "_" delante: las que exigen \b antes de una cifra o letra ya no casan ahí
+TRAS_PLACEHOLDER_RE = _alternancia(REGLAS[:4])
+# ...y tras un "…%", "percent" / "per cent" con signo sí casaban: veían "_" delante del signo
+TRAS_PCT_SIMBOLO_RE = re.compile(rf"(?P<PERCENT>[+-]\d[\d,\.]*\s*(?:percent|per\s+cent)(?=\W|$)(?!{_TICKER}))")
+# Las reglas de limpieza solo pueden casar si aparece su literal: se evita escanear el resto
+_BOILERPLATE_LITERALES = ("read more:", "story continues", "copyright")
+
+
+def _placeholder(m):
+    nombre = m.lastgroup
+    if nombre == "QTR":
+        return f"__QTR{m.group('trimestre')}__"
+    return f"__{nombre}__"
+
+def _sustituir(t):
+    partes, pos, tras, tras_pct = [], 0, False, False
+    while True:
+        m = TRAS_PCT_SIMBOLO_RE.match(t, pos) if tras_pct else None
+        if m is None and tras:
+            m = TRAS_PLACEHOLDER_RE.match(t, pos)
+        if m is None:
+            m = PLACEHOLDER_RE.search(t, pos + tras)
+            if m is None:
+                break
+        partes += (t[pos:m.start()], _placeholder(m))
+        pos = m.end()
+        tras = not _PALABRA_RE.match(t, pos - 1)
+        tras_pct = m.lastgroup == "PERCENT" and t[pos - 1] == "%"
+    partes.append(t[pos:])
+    return "".join(partes)
+
+def pre_rules(text: str) -> str:
+    """Limpia el texto y sustituye cifras, fechas, tickers… por placeholders."""
+    if not isinstance(text, str) or not text.strip():
+        return ""
+    t = text.translate(TIPOGRAFIA).lower()
+    if any(lit in t for lit in _BOILERPLATE_LITERALES):
+        t = BOILERPLATE_RE.sub("", t)
+    t = HTML_TAG_RE.sub(" ", t)
+    if "http" in t or "www." in t:
+        t = URL_RE.sub(" ", t)
+    t = _sustituir(t)
+    return " ".join(t.split())   # = re.sub(r"\s+", " ", t).strip()
+
+def pre_rules_lote(textos) -> pd.Series:
+    """pre_rules sobre una columna entera (Series o iterable), conservando el índice."""
+    textos = textos if isinstance(textos, pd.Series) else pd.Series(list(textos), dtype=object)
+    return pd.Series([pre_rules(t) for t in textos], index=textos.index, dtype=object)
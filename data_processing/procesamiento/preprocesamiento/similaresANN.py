@@ -0,0 +1,218 @@
+# Artículos parecidos aproximados (ANN) sobre el TF-IDF, sin comparar cada consulta con todo el
+# corpus como cosine_similarity / consultasTfidf.vecinos.
+#
+#   - Reducción: TruncatedSVD del TF-IDF a N_COMPONENTES dimensiones y normalización l2, así
+#     que el coseno es un producto escalar denso y pequeño.
+#   - LSH de hiperplanos aleatorios: TABLAS tablas de BITS bits; cada bit dice si la proyección
+#     del vector sobre un hiperplano pasa de la mediana de las del corpus (los vectores del
+#     TF-IDF no están centrados: con el umbral en 0 casi todos caerían en pocos códigos).
+#     Vectores con coseno alto caen con probabilidad alta en el mismo código en alguna tabla.
+#   - Todas las tablas van en un único array ordenado de claves (tabla << BITS | código), con
+#     el artículo de cada una: buscar un código es un searchsorted. Consulta multi-sonda: en
+#     cada tabla se mira el código de la consulta y los BITS códigos a un bit de distancia.
+#   - Los candidatos se reordenan con el coseno exacto en el espacio reducido y se devuelven
+#     los k mejores.
+#   - anadir() inserta artículos nuevos (con el SVD ya ajustado, sin reajustarlo): se calculan
+#     sus códigos y se intercalan en el array ordenado. BITS fija el tamaño de las cubetas
+#     (≈ artículos / 2^BITS): si el corpus crece mucho, reconstruir(bits=BITS + 1) por cada ×2.
+#   - guardar() / cargar(): carpeta con los vectores, las claves (.npy, vectores con mmap), el
+#     SVD y los hiperplanos, junto a los artefactos de pruebasEmb/repTrad.
+#   - El SVD solo vale para el espacio TF-IDF (vocabulario + idf) con el que se ajustó: el índice
+#     guarda ese vectorizador (congelado) y su firma_tfidf(). Los artículos nuevos se transforman
+#     con él, no con el TF-IDF del día, para que todos los vectores estén en el mismo espacio.
+#     construidos = artículos de la última construcción; quien lo usa decide cuándo el corpus ha
+#     cambiado tanto que conviene reconstruir con el TF-IDF actual (ver 02_BoW_TF-IDF).
+#
+#   indice = IndiceSimilares.construir(X, ids=article_ids, vectorizador=vec)   # X = vec.transform(…)
+#   indice.similares(article_id, k=10)         # (ids, cosenos) de los parecidos a ese artículo
+#   indice.consultar(indice.vectorizador.transform([texto]))     # de un texto nuevo
+#   indice.anadir(indice.vectorizador.transform(textos_nuevos), ids_nuevos)
+#   indice.guardar()
+import os, json, pathlib, hashlib
+import joblib
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+from sklearn.preprocessing import normalize
+
+DEFAULT_PATH = pathlib.Path(__file__).resolve().parent / "pruebasEmb" / "repTrad" / "similares"
+
+N_COMPONENTES = 256
+TABLAS = 32
+BITS = 12
+SEED = 42
+
+
+def firma_tfidf(vectorizador) -> str:
+    """Hash del espacio de entrada del SVD: términos e idf del vectorizador TF-IDF."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update("\n".join(vectorizador.get_feature_names_out()).encode("utf-8"))
+    h.update(np.asarray(vectorizador.idf_, dtype=np.float64).tobytes())
+    return h.hexdigest()
+
+
+class IndiceSimilares:
+    def __init__(self, svd, planos, umbrales, bits=BITS, firma=None, vectorizador=None):
+        """Índice vacío; normalmente se crea con construir() o cargar(). vectorizador: el TF-IDF
+        con el que se calculó X (se guarda con el índice); firma: identificador de ese espacio,
+        por defecto firma_tfidf(vectorizador)."""
+        self.svd = svd
+        self.vectorizador = vectorizador
+        self.firma = firma if firma is not None or vectorizador is None else firma_tfidf(vectorizador)
+        self.construidos = 0                    # artículos indexados en construir() / reconstruir()
+        self.planos = planos                    # (tablas * bits, dimensión)
+        self.umbrales = umbrales                # (tablas * bits,) medianas de las proyecciones
+        self.bits = bits
+        self.tablas = planos.shape[0] // bits
+        d = planos.shape[1]
+        self.vectores = np.empty((0, d), dtype=np.float32)
+        self.ids = np.empty(0, dtype=str)
+        self.claves = np.empty(0, dtype=np.int64)     # ordenadas
+        self.articulos = np.empty(0, dtype=np.int64)  # posición del artículo de cada clave
+        self._pesos = np.int64(1) << np.arange(bits, dtype=np.int64)
+        self._tabla = np.arange(self.tablas, dtype=np.int64) << bits
+        # sondas: el código tal cual y con cada bit cambiado
+        self._vuelta = np.concatenate(([0], self._pesos))
+        self._posicion = None                   # id → posición, se crea en la primera consulta por id
+
+    @classmethod
+    def construir(cls, X, ids=None, n_componentes=N_COMPONENTES, tablas=TABLAS, bits=BITS, seed=SEED,
+                  firma=None, vectorizador=None):
+        """Ajusta el SVD sobre X (TF-IDF, disperso; = vectorizador.transform de los textos) e indexa
+        todas sus filas."""
+        n_componentes = min(n_componentes, X.shape[1] - 1, max(X.shape[0] - 1, 1))
+        svd = TruncatedSVD(n_components=n_componentes, random_state=seed).fit(X)
+        V = normalize(svd.transform(X)).astype(np.float32)
+        return cls._desde_vectores(svd, V, ids, tablas, bits, seed, firma, vectorizador)
+
+    @classmethod
+    def _desde_vectores(cls, svd, V, ids, tablas, bits, seed, firma, vectorizador=None):
+        planos = np.random.default_rng(seed).standard_normal((tablas * bits, V.shape[1])).astype(np.float32)
+        umbrales = np.median(V @ planos.T, axis=0).astype(np.float32)
+        indice = cls(svd, planos, umbrales, bits, firma, vectorizador).anadir_vectores(V, ids)
+        indice.construidos = len(indice)
+        return indice
+
+    def reconstruir(self, tablas=None, bits=None, seed=SEED):
+        """Índice nuevo con los mismos vectores, ids y SVD, y otros hiperplanos / umbrales."""
+        return self._desde_vectores(self.svd, np.asarray(self.vectores), self.ids, tablas or self.tablas,
+                                    bits or self.bits, seed, self.firma, self.vectorizador)
+
+    def __len__(self):
+        return len(self.ids)
+
+    # -------------------------------------------------------------- vectores y códigos
+
+    def reducir(self, X) -> np.ndarray:
+        """Filas de TF-IDF → vectores reducidos de norma 1 (float32)."""
+        return normalize(self.svd.transform(X)).astype(np.float32)
+
+    def _codigos(self, V) -> np.ndarray:
+        """(n, tablas) códigos de BITS bits de cada vector en cada tabla."""
+        signos = (V @ self.planos.T > self.umbrales).reshape(len(V), self.tablas, self.bits)
+        return signos.astype(np.int64) @ self._pesos
+
+    def anadir(self, X, ids=None):
+        """Inserta filas de TF-IDF (ids: por defecto su posición en el índice)."""
+        return self.anadir_vectores(self.reducir(X), ids)
+
+    def anadir_vectores(self, V, ids=None):
+        V = np.asarray(V, dtype=np.float32)
+        inicio = len(self.ids)
+        ids = np.arange(inicio, inicio + len(V)) if ids is None else np.asarray(ids)
+        if len(ids) != len(V):
+            raise ValueError(f"{len(ids)} ids para {len(V)} vectores")
+        nuevas = (self._codigos(V) | self._tabla).ravel()
+        articulos = np.repeat(np.arange(inicio, inicio + len(V), dtype=np.int64), self.tablas)
+        # intercalar en el array ordenado (estable: a igual clave, los antiguos primero)
+        orden = np.argsort(nuevas, kind="stable")
+        nuevas, articulos = nuevas[orden], articulos[orden]
+        pos = np.searchsorted(self.claves, nuevas, side="right")
+        self.claves = np.insert(self.claves, pos, nuevas)
+        self.articulos = np.insert(self.articulos, pos, articulos)
+        self.vectores = np.concatenate([self.vectores, V])
+        self.ids = np.concatenate([self.ids.astype(str), ids.astype(str)])
+        self._posicion = None
+        return self
+
+    # -------------------------------------------------------------- consultas
+
+    def candidatos(self, v) -> np.ndarray:
+        """Posiciones de los artículos que comparten código (o a un bit) en alguna tabla."""
+        sondas = ((self._codigos(v[None])[0][:, None] ^ self._vuelta) | self._tabla[:, None]).ravel()
+        ini = np.searchsorted(self.claves, sondas, side="left")
+        fin = np.searchsorted(self.claves, sondas, side="right")
+        largos = fin - ini
+        total = largos.sum()
+        if not total:
+            return np.empty(0, dtype=np.int64)
+        desplaz = np.repeat(ini - np.cumsum(largos) + largos, largos)
+        return np.unique(self.articulos[desplaz + np.arange(total)])
+
+    def _mejores(self, v, k, excluir=None):
+        cand = self.candidatos(v)
+        if excluir is not None:
+            cand = cand[cand != excluir]
+        sims = self.vectores[cand] @ v
+        if len(cand) > k:
+            sel = np.argpartition(-sims, k - 1)[:k]
+            cand, sims = cand[sel], sims[sel]
+        orden = np.argsort(-sims, kind="stable")
+        return cand[orden], sims[orden]
+
+    def similares_posicion(self, i, k=10):
+        """(posiciones, cosenos) de los k más parecidos al artículo en la posición i, sin él."""
+        return self._mejores(self.vectores[i], k, excluir=i)
+
+    def similares(self, id_, k=10):
+        """(ids, cosenos) de los k artículos más parecidos al artículo `id_` ya indexado."""
+        if self._posicion is None:
+            self._posicion = {a: i for i, a in enumerate(self.ids.tolist())}
+        if str(id_) not in self._posicion:
+            raise KeyError(f"artículo {id_!r} no indexado")
+        cand, sims = self.similares_posicion(self._posicion[str(id_)], k)
+        return self.ids[cand], sims
+
+    def consultar(self, X, k=10):
+        """(ids, cosenos) de los k más parecidos a una fila de TF-IDF (un texto nuevo)."""
+        cand, sims = self._mejores(self.reducir(X)[0], k)
+        return self.ids[cand], sims
+
+    # -------------------------------------------------------------- disco
+
+    def guardar(self, path=DEFAULT_PATH):
+        path = pathlib.Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        arrays = {"vectores": self.vectores, "ids": self.ids.astype(str), "claves": self.claves,
+                  "articulos": self.articulos, "planos": self.planos, "umbrales": self.umbrales}
+        for nombre, array in arrays.items():
+            # a un temporal y os.replace: los vectores pueden ser un mmap de ese mismo fichero
+            tmp = path / f"{nombre}.npy.tmp"
+            with open(tmp, "wb") as f:
+                np.save(f, array)
+            os.replace(tmp, path / f"{nombre}.npy")
+        joblib.dump(self.svd, path / "svd.joblib")
+        if self.vectorizador is not None:
+            joblib.dump(self.vectorizador, path / "vectorizador.joblib")
+        else:
+            (path / "vectorizador.joblib").unlink(missing_ok=True)
+        (path / "config.json").write_text(json.dumps({"bits": self.bits, "tablas": self.tablas,
+                                                      "n_componentes": self.planos.shape[1],
+                                                      "articulos": len(self), "construidos": self.construidos,
+                                                      "firma": self.firma},
+                                                     indent=2), encoding="utf-8")
+
+    @classmethod
+    def cargar(cls, path=DEFAULT_PATH, mmap=True):
+        """Índice guardado; con mmap los vectores se leen del disco bajo demanda (hasta el
+        primer anadir(), que los copia a memoria)."""
+        path = pathlib.Path(path)
+        config = json.loads((path / "config.json").read_text(encoding="utf-8"))
+        vectorizador = joblib.load(path / "vectorizador.joblib") if (path / "vectorizador.joblib").exists() else None
+        indice = cls(joblib.load(path / "svd.joblib"), np.load(path / "planos.npy"),
+                     np.load(path / "umbrales.npy"), config["bits"], config.get("firma"), vectorizador)
+        indice.vectores = np.load(path / "vectores.npy", mmap_mode="r" if mmap else None)
+        indice.ids = np.load(path / "ids.npy")
+        indice.claves = np.load(path / "claves.npy")
+        indice.articulos = np.load(path / "articulos.npy")
+        indice.construidos = config.get("construidos", len(indice))
+        return indice
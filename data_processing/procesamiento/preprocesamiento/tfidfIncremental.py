@@ -0,0 +1,243 @@
+# TF-IDF incremental para 02_BoW_TF-IDF: cuando llegan artículos nuevos no hace falta volver a
+# tokenizar y contar todo el corpus con TfidfVectorizer.fit_transform.
+#
+# Se guarda, para cada artículo visto, su fila de cuentas (salida del analizador del
+# TfidfVectorizer con TFIDF_CFG: tokens + n-gramas) en un espacio de términos que solo crece, y
+# por término su document frequency (df) y su frecuencia total (tf). partial_fit(textos) solo
+# analiza los artículos nuevos y suma sus cuentas a df / tf.
+#
+# Vocabulario, min_df / max_df / max_features e IDF se recalculan a partir de df y tf (O(nº de
+# términos), sin pasar por los textos) la primera vez que hacen falta después de un partial_fit.
+# Las filas ya guardadas no se reponderan al llegar artículos: se ponderan al pedir matriz().
+# El resultado es el mismo que un ajuste en batch sobre todos los artículos vistos: mismas
+# reglas que CountVectorizer (vocabulario en orden alfabético, _limit_features con el mismo
+# argsort para max_features) y la misma fórmula de TfidfTransformer, en el mismo dtype.
+#
+# Cada artículo se identifica por el hash de su texto y el nº de veces que ese texto aparece en
+# la llamada: volver a pasar el corpus entero no añade nada, y dos artículos con el mismo texto
+# cuentan dos veces, como en el batch. retener(textos) quita los que ya no están en el corpus.
+#
+#   tfidf = TfidfIncremental.cargar(SAVE_DIR / "tfidf_incremental.joblib", **TFIDF_CFG)
+#   tfidf.partial_fit(texts)
+#   tfidf.retener(texts)
+#   X = tfidf.matriz(texts)          # = TfidfVectorizer(**TFIDF_CFG).fit_transform(texts)
+#   vec = tfidf.vectorizador()       # TfidfVectorizer ajustado (vocabulary_, idf_)
+#   tfidf.guardar(SAVE_DIR / "tfidf_incremental.joblib")
+import sys, pathlib
+from numbers import Integral
+from collections import Counter
+import numpy as np
+import joblib
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer, TfidfTransformer
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1] / "crearDatasets"))
+from cacheArtefactos import hash_config, _clave
+
+
+def claves_documentos(textos) -> list:
+    """(hash del texto, nº de aparición de ese texto en `textos`) para cada artículo."""
+    vistos = Counter()
+    claves = []
+    for t in textos:
+        k = _clave(t)
+        claves.append((k, vistos[k]))
+        vistos[k] += 1
+    return claves
+
+
+class TfidfIncremental:
+    def __init__(self, cache=None, **cfg):
+        """
+        cfg: los parámetros de TfidfVectorizer (TFIDF_CFG).
+        cache: CacheArtefactos opcional; si se pasa, el analizador lee / guarda ahí las filas.
+        """
+        self.cfg = cfg
+        self.vec = TfidfVectorizer(**cfg)
+        self.cache = cache
+        self.terminos = []                      # id → término (solo crece)
+        self.ids = {}                           # término → id
+        self.df = np.zeros(0, dtype=np.int64)   # nº de artículos con el término
+        self.tf = np.zeros(0, dtype=np.int64)   # nº total de apariciones del término
+        self.claves = {}                        # clave del artículo → posición en self.filas
+        self.filas = []                         # (ids, cuentas) de cada artículo, int32
+        self._ajuste = None                     # (vectorizador, columna de cada id) hasta el próximo cambio
+
+    @property
+    def n_docs(self):
+        return len(self.filas)
+
+    # -------------------------------------------------------------- actualización
+
+    def partial_fit(self, textos):
+        """Añade los artículos que no estaban. Solo se analizan esos."""
+        analyzer = self.vec.build_analyzer()
+        if self.cache is not None:
+            analyzer = self.cache.analizador(analyzer)
+            self.cache.precargar(textos)
+        nuevos = [(k, t) for k, t in zip(claves_documentos(textos), textos) if k not in self.claves]
+        if not nuevos:
+            return self
+        ids = self.ids
+        for k, doc in nuevos:
+            cuentas = Counter(analyzer(doc))
+            for t in cuentas:
+                if t not in ids:
+                    ids[t] = len(self.terminos)
+                    self.terminos.append(t)
+            self.claves[k] = len(self.filas)
+            self.filas.append((np.array([ids[t] for t in cuentas], dtype=np.int32),
+                               np.array(list(cuentas.values()), dtype=np.int32)))
+        self._sumar(self.filas[-len(nuevos):], +1)
+        if self.cache is not None:
+            self.cache.conn.commit()
+        return self
+
+    def retener(self, textos):
+        """Quita los artículos que no están en `textos` (borrados o cambiados en el corpus)."""
+        quedan = set(claves_documentos(textos))
+        fuera = [k for k in self.claves if k not in quedan]
+        if not fuera:
+            return self
+        self._sumar([self.filas[self.claves[k]] for k in fuera], -1)
+        conservar = [k for k in self.claves if k in quedan]
+        self.filas = [self.filas[self.claves[k]] for k in conservar]
+        self.claves = {k: i for i, k in enumerate(conservar)}
+        return self
+
+    def _sumar(self, filas, signo):
+        n = len(self.terminos)
+        if len(self.df) < n:
+            self.df = np.concatenate([self.df, np.zeros(n - len(self.df), dtype=np.int64)])
+            self.tf = np.concatenate([self.tf, np.zeros(n - len(self.tf), dtype=np.int64)])
+        if filas:
+            ids = np.concatenate([f[0] for f in filas])
+            cuentas = np.concatenate([f[1] for f in filas])
+            self.df += signo * np.bincount(ids, minlength=n)
+            self.tf += signo * np.bincount(ids, weights=cuentas, minlength=n).astype(np.int64)
+        self._ajuste = None
+
+    # -------------------------------------------------------------- vocabulario e IDF
+
+    def _ajustar(self):
+        """Vocabulario podado e IDF a partir de df / tf, igual que CountVectorizer + TfidfTransformer."""
+        if self._ajuste is not None:
+            return self._ajuste
+        vec = self.vec
+        n = self.n_docs
+        max_doc_count = vec.max_df if isinstance(vec.max_df, Integral) else vec.max_df * n
+        min_doc_count = vec.min_df if isinstance(vec.min_df, Integral) else vec.min_df * n
+        if max_doc_count < min_doc_count:
+            raise ValueError("max_df corresponds to < documents than min_df")
+
+        vistos = np.flatnonzero(self.df > 0)    # términos de artículos ya retirados no cuentan
+        orden = vistos[np.argsort(np.array(self.terminos, dtype=object)[vistos], kind="stable")]
+        dfs = self.df[orden]
+        mask = (dfs <= max_doc_count) & (dfs >= min_doc_count)
+        if vec.max_features is not None and mask.sum() > vec.max_features:
+            # mismo array (orden alfabético, dtype de la matriz) y mismo argsort que _limit_features
+            tfs = self.tf[orden].astype(vec.dtype)
+            mask_inds = (-tfs[mask]).argsort()[:vec.max_features]
+            nueva = np.zeros(len(dfs), dtype=bool)
+            nueva[np.where(mask)[0][mask_inds]] = True
+            mask = nueva
+        if not mask.any():
+            raise ValueError("After pruning, no terms remain. Try a lower min_df or a higher max_df.")
+
+        elegidos = orden[mask]
+        columnas = np.full(len(self.terminos), -1, dtype=np.int64)
+        columnas[elegidos] = np.arange(len(elegidos))
+
+        ajustado = TfidfVectorizer(**self.cfg)
+        ajustado.vocabulary_ = {self.terminos[i]: j for j, i in enumerate(elegidos.tolist())}
+        ajustado.fixed_vocabulary_ = False
+        ajustado._tfidf = TfidfTransformer(norm=vec.norm, use_idf=vec.use_idf,
+                                           smooth_idf=vec.smooth_idf, sublinear_tf=vec.sublinear_tf)
+        ajustado._tfidf.n_features_in_ = len(elegidos)
+        if vec.use_idf:
+            # TfidfTransformer.fit: idf = ln((n + smooth) / (df + smooth)) + 1, en el dtype de X
+            dtype = vec.dtype if np.dtype(vec.dtype) in (np.float64, np.float32) else np.float64
+            df = self.df[elegidos].astype(dtype) + float(vec.smooth_idf)
+            idf = np.full_like(df, fill_value=n + int(vec.smooth_idf), dtype=dtype)
+            idf /= df
+            np.log(idf, out=idf)
+            idf += 1.0
+            ajustado._tfidf.idf_ = idf
+        self._ajuste = (ajustado, columnas)
+        return self._ajuste
+
+    def vectorizador(self) -> TfidfVectorizer:
+        """TfidfVectorizer ajustado con el estado actual (para joblib.dump o transform de textos nuevos)."""
+        return self._ajustar()[0]
+
+    # -------------------------------------------------------------- matrices
+
+    def _cuentas(self, filas):
+        vec, columnas = self._ajustar()
+        indptr = np.zeros(len(filas) + 1, dtype=np.int64)
+        ids, cuentas = [], []
+        for i, (f_ids, f_cuentas) in enumerate(filas):
+            cols = columnas[f_ids]
+            dentro = cols >= 0
+            ids.append(cols[dentro])
+            cuentas.append(f_cuentas[dentro])
+            indptr[i + 1] = indptr[i] + dentro.sum()
+        X = sparse.csr_matrix((np.concatenate(cuentas) if cuentas else np.empty(0, dtype=np.int32),
+                               np.concatenate(ids) if ids else np.empty(0, dtype=np.int64),
+                               indptr),
+                              shape=(len(filas), len(vec.vocabulary_)), dtype=vec.dtype)
+        X.sort_indices()
+        return X
+
+    def matriz(self, textos=None):
+        """Matriz TF-IDF de `textos` (ya vistos en partial_fit) o de todos los artículos, en orden
+        de llegada. Se pondera ahora con el IDF actual."""
+        if textos is None:
+            filas = self.filas
+        else:
+            faltan = [k for k in claves_documentos(textos) if k not in self.claves]
+            if faltan:
+                raise KeyError(f"{len(faltan)} artículos no vistos: partial_fit antes, o transform()")
+            filas = [self.filas[self.claves[k]] for k in claves_documentos(textos)]
+        vec = self._ajustar()[0]
+        return vec._tfidf.transform(self._cuentas(filas), copy=False)
+
+    def transform(self, textos):
+        """TF-IDF de textos nuevos con el vocabulario e IDF actuales (no los añade)."""
+        return self.vectorizador().transform(textos)
+
+    # -------------------------------------------------------------- persistencia
+
+    def guardar(self, path):
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        indptr = np.cumsum([0] + [len(f[0]) for f in self.filas])
+        estado = {
+            "config": hash_config(self.cfg),
+            "cfg": self.cfg,
+            "terminos": self.terminos,
+            "claves": list(self.claves),
+            "indptr": indptr,
+            "ids": np.concatenate([f[0] for f in self.filas]) if self.filas else np.empty(0, dtype=np.int32),
+            "cuentas": np.concatenate([f[1] for f in self.filas]) if self.filas else np.empty(0, dtype=np.int32),
+        }
+        joblib.dump(estado, path)
+
+    @classmethod
+    def cargar(cls, path, cache=None, **cfg):
+        """Estado guardado si existe y es de esta misma configuración; si no, uno vacío."""
+        path = pathlib.Path(path)
+        nuevo = cls(cache=cache, **cfg)
+        if not path.exists():
+            return nuevo
+        estado = joblib.load(path)
+        if estado["config"] != hash_config(cfg):
+            print(f"⚠️ {path.name} es de otra configuración de TF-IDF: se empieza de cero")
+            return nuevo
+        nuevo.terminos = estado["terminos"]
+        nuevo.ids = {t: i for i, t in enumerate(nuevo.terminos)}
+        p = estado["indptr"]
+        nuevo.filas = [(estado["ids"][p[i]:p[i + 1]], estado["cuentas"][p[i]:p[i + 1]]) for i in range(len(p) - 1)]
+        nuevo.claves = {k: i for i, k in enumerate(estado["claves"])}
+        nuevo._sumar(nuevo.filas, +1)
+        return nuevo
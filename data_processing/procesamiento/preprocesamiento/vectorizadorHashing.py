@@ -0,0 +1,197 @@
+# Modo hashing para BoW / TF-IDF (02_BoW_TF-IDF y tagClassification.py) cuando el corpus crece:
+# en vez de un vocabulario (dict de todos los términos durante el fit, 120k términos en el
+# joblib, get_feature_names_out, tfidf_idf.csv…) cada término va a una celda fija de n_features
+# por su hash (lo mismo que HashingVectorizer). Sin estado por término: memoria y tamaño del
+# artefacto acotados por n_features, no por el corpus.
+#
+# Para poder leer los temas y los top términos, fit mantiene al lado un índice inverso pequeño:
+# un término por celda, el mayoritario entre los que caen en ella (voto de mayoría de
+# Boyer-Moore por lotes, vectorizado con numpy: si un término tiene más de la mitad de las
+# apariciones de su celda, es el que queda). Al acabar el fit solo se conservan las celdas que
+# pasan min_df / max_df, así que el índice es del tamaño del vocabulario útil, no del corpus.
+#
+# VectorizadorHashing = analizador de sklearn (mismos parámetros que CountVectorizer) +
+# FeatureHasher + TfidfTransformer, con la misma interfaz: fit / transform / build_analyzer /
+# get_params / get_feature_names_out / idf_, así que sirve en make_topic_pipeline y dentro de
+# CacheArtefactos.usando(). min_df / max_df se aplican a las celdas (su df es la de todos los
+# términos que colisionan en ella) poniendo a 0 las columnas que no pasan; max_features no hace
+# falta, el tope es n_features. use_idf=False y norm=None dan las cuentas en bruto (temas).
+# Con partial_fit se ajusta por lotes: el espacio no cambia de tamaño, así que el modelo de
+# temas que va detrás (MiniBatchNMF) también puede aprender por lotes.
+#
+#   vec = VectorizadorHashing(n_features=2**18, ngram_range=(1, 2), min_df=3, dtype=np.float32)
+#   X = vec.fit_transform(texts)
+#   vec.get_feature_names_out()[X[0].indices]
+from numbers import Integral
+from collections import Counter
+import numpy as np
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.feature_extraction import FeatureHasher
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+
+N_FEATURES = 2 ** 18
+LOTE = 1000
+
+
+class IndiceInverso:
+    """celda → término mayoritario de los que caen en ella."""
+
+    def __init__(self, n_features=N_FEATURES):
+        self.n_features = n_features
+        self.terminos = np.full(n_features, None, dtype=object)
+        self.votos = np.zeros(n_features, dtype=np.int64)
+        self._hasher = FeatureHasher(n_features=n_features, input_type="string", alternate_sign=False)
+
+    def celdas_de(self, terminos) -> np.ndarray:
+        """Celda de cada término (la misma que le da HashingVectorizer)."""
+        return self._hasher.transform([t] for t in terminos).indices
+
+    def actualizar(self, cuentas: Counter):
+        if not cuentas:
+            return
+        if self.votos is None:      # tras un fit completo: las celdas siguen, los votos empiezan de 0
+            self.votos = np.zeros(self.n_features, dtype=np.int64)
+        terminos = np.array(list(cuentas), dtype=object)
+        n = np.fromiter(cuentas.values(), dtype=np.int64, count=len(cuentas))
+        celdas = self.celdas_de(terminos)
+        # el más frecuente del lote en cada celda…
+        orden = np.lexsort((-n, celdas))
+        primero = np.r_[True, celdas[orden][1:] != celdas[orden][:-1]]
+        orden = orden[primero]
+        c, t, n = celdas[orden], terminos[orden], n[orden]
+        # …vota contra el que ya tenía la celda
+        igual = self.terminos[c] == t
+        self.votos[c[igual]] += n[igual]
+        c, t, n = c[~igual], t[~igual], n[~igual]
+        gana = n > self.votos[c]
+        self.terminos[c[gana]] = t[gana]
+        self.votos[c] = np.abs(self.votos[c] - n)
+
+    def conservar(self, mascara):
+        """Fin del fit: solo quedan las celdas de `mascara`; los votos ya no hacen falta."""
+        self.terminos[~mascara] = None
+        self.votos = None
+
+    def nombres(self) -> np.ndarray:
+        return np.where(self.terminos == None, "", self.terminos)   # noqa: E711 (elemento a elemento)
+
+    def __len__(self):
+        return int((self.terminos != None).sum())   # noqa: E711
+
+
+class VectorizadorHashing(TransformerMixin, BaseEstimator):
+    def __init__(self, n_features=N_FEATURES, analyzer="word", ngram_range=(1, 1), lowercase=True,
+                 tokenizer=None, token_pattern=r"(?u)\b\w\w+\b", stop_words=None, norm="l2",
+                 use_idf=True, smooth_idf=True, sublinear_tf=False, min_df=1, max_df=1.0,
+                 dtype=np.float64):
+        self.n_features = n_features
+        self.analyzer = analyzer
+        self.ngram_range = ngram_range
+        self.lowercase = lowercase
+        self.tokenizer = tokenizer
+        self.token_pattern = token_pattern
+        self.stop_words = stop_words
+        self.norm = norm
+        self.use_idf = use_idf
+        self.smooth_idf = smooth_idf
+        self.sublinear_tf = sublinear_tf
+        self.min_df = min_df
+        self.max_df = max_df
+        self.dtype = dtype
+
+    def build_analyzer(self):
+        return HashingVectorizer(analyzer=self.analyzer, ngram_range=self.ngram_range,
+                                 lowercase=self.lowercase, tokenizer=self.tokenizer,
+                                 token_pattern=self.token_pattern, stop_words=self.stop_words).build_analyzer()
+
+    def _cuentas(self, textos, indice=None):
+        """Cuentas hasheadas (csr), por lotes de LOTE textos; si se pasa `indice`, lo actualiza."""
+        from scipy import sparse
+        analyzer = self.build_analyzer()
+        hasher = FeatureHasher(n_features=self.n_features, input_type="string",
+                               dtype=self.dtype, alternate_sign=False)
+        bloques, lote = [], []
+        for doc in textos:
+            lote.append(analyzer(doc))
+            if len(lote) == LOTE:
+                bloques.append(self._bloque(hasher, lote, indice))
+                lote = []
+        if lote or not bloques:
+            bloques.append(self._bloque(hasher, lote, indice))
+        X = sparse.vstack(bloques, format="csr")
+        X.sort_indices()
+        return X
+
+    @staticmethod
+    def _bloque(hasher, lote, indice):
+        if indice is not None:
+            indice.actualizar(Counter(t for doc in lote for t in doc))
+        return hasher.transform(lote)
+
+    def _filtrar(self, cuentas):
+        """Pone a 0 las columnas (celdas) que no pasan min_df / max_df."""
+        if not self.columnas_.all():
+            cuentas.data[~self.columnas_[cuentas.indices]] = 0
+            cuentas.eliminate_zeros()
+        return cuentas
+
+    def _sumar(self, textos):
+        """Cuentas de `textos`, actualizando índice inverso y df de las celdas."""
+        cuentas = self._cuentas(textos, self.indice_)
+        self.df_ += np.bincount(cuentas.indices, minlength=self.n_features)
+        self.n_docs_ += cuentas.shape[0]
+        return cuentas
+
+    def _ajustar(self):
+        """min_df / max_df e idf a partir de df_ (la fórmula de TfidfTransformer.fit)."""
+        n = self.n_docs_
+        max_doc_count = self.max_df if isinstance(self.max_df, Integral) else self.max_df * n
+        min_doc_count = self.min_df if isinstance(self.min_df, Integral) else self.min_df * n
+        self.columnas_ = (self.df_ >= max(min_doc_count, 1)) & (self.df_ <= max_doc_count)
+        self.tfidf_ = TfidfTransformer(norm=self.norm, use_idf=self.use_idf,
+                                       smooth_idf=self.smooth_idf, sublinear_tf=self.sublinear_tf)
+        self.tfidf_.n_features_in_ = self.n_features
+        if self.use_idf:
+            dtype = self.dtype if np.dtype(self.dtype) in (np.float64, np.float32) else np.float64
+            df = np.where(self.columnas_, self.df_, 0).astype(dtype) + float(self.smooth_idf)
+            idf = np.full_like(df, fill_value=n + int(self.smooth_idf), dtype=dtype)
+            idf /= df
+            np.log(idf, out=idf)
+            idf += 1.0
+            self.tfidf_.idf_ = idf
+
+    def _reiniciar(self):
+        self.indice_ = IndiceInverso(self.n_features)
+        self.df_ = np.zeros(self.n_features, dtype=np.int32)
+        self.n_docs_ = 0
+
+    def fit_transform(self, X, y=None):
+        self._reiniciar()
+        cuentas = self._sumar(X)
+        self._ajustar()
+        self.indice_.conservar(self.columnas_)
+        return self.tfidf_.transform(self._filtrar(cuentas), copy=False)
+
+    def fit(self, X, y=None):
+        self.fit_transform(X)
+        return self
+
+    def partial_fit(self, X, y=None):
+        """Suma un lote al ajuste anterior (entrenamiento por lotes, p.ej. con MiniBatchNMF):
+        índice inverso, df, min_df / max_df e idf pasan a ser los de todos los lotes vistos. Las
+        celdas que aún no pasan min_df no se borran del índice: pueden pasarlo más adelante."""
+        if not hasattr(self, "indice_"):
+            self._reiniciar()
+        self._sumar(X)
+        self._ajustar()
+        return self
+
+    def transform(self, X):
+        return self.tfidf_.transform(self._filtrar(self._cuentas(X)))
+
+    @property
+    def idf_(self):
+        return self.tfidf_.idf_
+
+    def get_feature_names_out(self, input_features=None):
+        return self.indice_.nombres()
@@ -0,0 +1,62 @@
+# Benchmark de la caché de lemas (cacheLemas.py) en el ajuste de temas de tagClassification.py:
+# tiempo de topic_pipeline.fit (CountVectorizer con tokenize_and_lemmatize + NMF) sin caché,
+# con la caché vacía y con la caché ya persistida de una ejecución anterior. Comprueba que el
+# vocabulario y los temas salen iguales en los tres casos.
+# make_topic_pipeline de topicwizard construye un Pipeline de sklearn con estos dos pasos (solo
+# añade la salida en pandas), así que aquí se usa make_pipeline directamente.
+# Ejecuta desde la raíz del repo:
+#   python data_processing/tagClassification/benchmarkLemas.py
+import re, sys, time, pathlib, tempfile
+import numpy as np
+import pandas as pd
+from nltk.stem import WordNetLemmatizer
+from sklearn.decomposition import NMF
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.pipeline import make_pipeline
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1] / "procesamiento" / "crearDatasets"))
+import almacenDatasets
+from cacheLemas import CacheLemas
+
+# ============ CONFIG ============
+ETAPA = "definitivos_index"
+N_COMPONENTES = 5
+# =================================
+
+lemmatizer = WordNetLemmatizer()
+
+def tokenizador(lematizar):
+    def tokenize_and_lemmatize(text):
+        if pd.isna(text):
+            return []
+        text = re.sub(r'[^a-zA-Z\s]', '', str(text))
+        tokens = text.lower().split()
+        return lematizar(tokens)
+    return tokenize_and_lemmatize
+
+def ajustar(texts, lematizar):
+    cv = CountVectorizer(tokenizer=tokenizador(lematizar), stop_words='english', token_pattern=None)
+    pipeline = make_pipeline(cv, NMF(n_components=N_COMPONENTES, random_state=42))
+    t0 = time.perf_counter()
+    pipeline.fit(texts)
+    return time.perf_counter() - t0, cv.get_feature_names_out(), pipeline[-1].components_
+
+def main():
+    texts = almacenDatasets.leer(ETAPA, columnas=["article_text"])["article_text"].dropna().tolist()
+    lemmatizer.lemmatize("warmup")   # la primera llamada carga WordNet
+    path = pathlib.Path(tempfile.mkdtemp()) / "cache_lemas.sqlite"
+
+    print(f"topic_pipeline.fit sobre {len(texts)} artículos de '{ETAPA}'")
+    t_sin, vocab, comp = ajustar(texts, lambda tokens: [lemmatizer.lemmatize(t) for t in tokens])
+    print(f"{'sin caché':<22}{t_sin:>8.2f}s")
+
+    for nombre in ("caché vacía", "caché persistida"):
+        cache = CacheLemas("wordnet", lemmatizer.lemmatize, path=path)
+        t, v, c = ajustar(texts, cache.lemas)
+        cache.guardar()
+        assert np.array_equal(v, vocab) and np.allclose(c, comp), f"{nombre}: resultado distinto"
+        print(f"{nombre:<22}{t:>8.2f}s  x{t_sin / t:.2f}  · {cache.resumen()}")
+    print("✓ mismo vocabulario y mismos temas")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# Benchmark de servicioTemas.py: latencia de inferencia de temas de artículos sueltos con el
+# modelo ya cargado, frente a rehacer lo que haría tagClassification.py para etiquetarlos.
+#   - Se ajusta un pipeline batch (CountVectorizer + NMF, como tagClassification.py) sobre el
+#     corpus y se guarda en un fichero temporal; el servicio lo carga una vez y se calienta.
+#   - API Python: inferir() de un artículo y de lotes, y enviar() desde CLIENTES hilos.
+#   - HTTP: CLIENTES clientes concurrentes con POST /temas de un artículo cada vez, con
+#     micro-lotes (MAX_LOTE) y sin ellos (max_lote=1). p50 / p99 y peticiones por segundo.
+#   - Comprobación: los pesos del servicio coinciden con pipeline.transform de topicwizard,
+#     también con lotes {"textos": [...]} desde varios clientes a la vez, y un error en la
+#     inferencia llega como 500 con JSON.
+# El tokenizador no lematiza (los datos de WordNet no están siempre instalados).
+# Ejecuta desde la raíz del repo:
+#   python data_processing/tagClassification/benchmarkServicio.py
+import re, sys, json, time, pathlib, tempfile, threading, urllib.request, urllib.error
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from sklearn.decomposition import NMF
+from sklearn.feature_extraction.text import CountVectorizer
+from topicwizard.pipeline import make_topic_pipeline
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1] / "procesamiento" / "crearDatasets"))
+import almacenDatasets
+import temasOnline
+from servicioTemas import ServicioTemas, crear_servidor, MAX_LOTE
+
+# ============ CONFIG ============
+ETAPA = "definitivos_index"
+N_PETICIONES = 2000
+CLIENTES = 16
+# =================================
+
+def tokenize(text):
+    if pd.isna(text):
+        return []
+    return re.sub(r'[^a-zA-Z\s]', '', str(text)).lower().split()
+
+def percentiles(tiempos):
+    ms = np.array(tiempos) * 1000
+    return f"p50 {np.percentile(ms, 50):7.2f} ms  p99 {np.percentile(ms, 99):7.2f} ms"
+
+def concurrente(funcion, textos):
+    """(latencias, peticiones/s) de `funcion(texto)` desde CLIENTES hilos."""
+    def medir(texto):
+        t0 = time.perf_counter()
+        funcion(texto)
+        return time.perf_counter() - t0
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(CLIENTES) as pool:
+        latencias = list(pool.map(medir, textos))
+    return latencias, len(textos) / (time.perf_counter() - t0)
+
+def post(puerto, campo="texto"):
+    def funcion(texto):
+        peticion = urllib.request.Request(f"http://127.0.0.1:{puerto}/temas",
+                                          data=json.dumps({campo: texto}).encode("utf-8"),
+                                          headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(peticion) as r:
+            return json.loads(r.read())
+    return funcion
+
+def main():
+    textos = almacenDatasets.leer(ETAPA, columnas=["article_text"])["article_text"].dropna().tolist()
+    rng = np.random.default_rng(0)
+    peticiones = [textos[i] for i in rng.integers(0, len(textos), N_PETICIONES)]
+    path = pathlib.Path(tempfile.mkdtemp()) / "temas.joblib"
+
+    t0 = time.perf_counter()
+    pipeline = make_topic_pipeline(CountVectorizer(tokenizer=tokenize, stop_words="english", token_pattern=None),
+                                   NMF(n_components=temasOnline.N_COMPONENTES, random_state=42), pandas_out=True)
+    pipeline.fit(textos)
+    temasOnline.guardar(pipeline, set(), path=path)
+    print(f"Ajuste batch de referencia: {time.perf_counter() - t0:.1f}s ({len(textos)} artículos)")
+
+    t0 = time.perf_counter()
+    servicio = ServicioTemas(path, tokenizer=tokenize).calentar()
+    print(f"Servicio cargado y calentado en {time.perf_counter() - t0:.2f}s")
+
+    # mismos pesos que topicwizard
+    muestra = peticiones[:200]
+    esperado = pipeline.transform(muestra)
+    obtenido = pd.DataFrame([r["pesos"] for r in servicio.inferir(muestra)])
+    assert list(obtenido.columns) == list(esperado.columns)
+    assert np.allclose(obtenido.to_numpy(), esperado.to_numpy(), atol=1e-6)
+    assert [r["tema"] for r in servicio.inferir(muestra)] == esperado.idxmax(axis=1).tolist()
+    print("✓ pesos y temas iguales que pipeline.transform")
+
+    # topicwizard recalcula los nombres de los temas en cada transform
+    t = []
+    for texto in peticiones[:200]:
+        t0 = time.perf_counter()
+        pipeline.transform([texto])
+        t.append(time.perf_counter() - t0)
+    print(f"{'pipeline.transform, 1 artículo':<40}{percentiles(t)}")
+    t = []
+    for texto in peticiones[:500]:
+        t0 = time.perf_counter()
+        servicio.inferir([texto])
+        t.append(time.perf_counter() - t0)
+    print(f"{'inferir, 1 artículo':<40}{percentiles(t)}")
+    for n in (8, 32, 128):
+        t0 = time.perf_counter()
+        for i in range(0, 512, n):
+            servicio.inferir(peticiones[i:i + n])
+        print(f"{f'inferir, lotes de {n}':<40}{(time.perf_counter() - t0) / 512 * 1000:7.2f} ms/artículo")
+
+    latencias, rps = concurrente(lambda x: servicio.enviar(x).result(), peticiones)
+    print(f"{f'enviar, {CLIENTES} hilos':<40}{percentiles(latencias)}  {rps:7.0f} art/s")
+
+    for max_lote in (1, MAX_LOTE):
+        servicio = ServicioTemas(path, tokenizer=tokenize, max_lote=max_lote).calentar()
+        servidor = crear_servidor(servicio, puerto=0)
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        funcion = post(servidor.server_address[1])
+        assert funcion(peticiones[0])["resultados"][0]["tema"] == esperado.idxmax(axis=1).iloc[0]
+        # lotes desde varios clientes: pasan por la cola, mismo resultado que inferir
+        lotes = [muestra[i:i + 8] for i in range(0, len(muestra), 8)]
+        with ThreadPoolExecutor(CLIENTES) as pool:
+            respuestas = list(pool.map(post(servidor.server_address[1], "textos"), lotes))
+        obtenido = pd.DataFrame([r["pesos"] for resp in respuestas for r in resp["resultados"]])
+        # NMF.transform converge sobre el lote entero: según cómo se junten, ~1e-5 de diferencia
+        assert np.allclose(obtenido.to_numpy(), esperado.to_numpy(), atol=1e-3)
+        # un fallo en la inferencia es un 500 con JSON, no una conexión cortada
+        inferir = servicio.inferir
+        servicio.inferir = lambda textos: 1 / 0
+        try:
+            post(servidor.server_address[1], "textos")(muestra[:2])
+            raise AssertionError("se esperaba un 500")
+        except urllib.error.HTTPError as e:
+            assert e.code == 500 and "ZeroDivisionError" in json.loads(e.read())["error"]
+        servicio.inferir = inferir
+        print(f"✓ max_lote={max_lote}: lotes HTTP concurrentes iguales que inferir, errores como 500")
+        latencias, rps = concurrente(funcion, peticiones)
+        print(f"{f'HTTP, {CLIENTES} clientes, max_lote={max_lote}':<40}{percentiles(latencias)}  {rps:7.0f} art/s")
+        servidor.shutdown()
+        servidor.server_close()
+
+if __name__ == "__main__":
+    main()
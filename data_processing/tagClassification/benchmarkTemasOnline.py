@@ -0,0 +1,121 @@
+# Benchmark del modo online de temas (temasOnline.py) frente al modo batch de tagClassification.py
+# simulando lotes diarios: el corpus empieza con FRACCION_INICIAL de los artículos y el resto
+# llega en N_DIAS lotes.
+#   - batch: cada día CountVectorizer + NMF sobre todo lo visto y se etiqueta todo otra vez.
+#   - online: cada día se carga el modelo guardado, partial_fit solo con los nuevos, se etiquetan
+#     solo los nuevos y se guarda.
+# Cada modo corre en su propio proceso para medir su pico de RSS. Calidad de los temas:
+#   - error de reconstrucción relativo ||X - WH|| / ||X|| del modelo final sobre todo el corpus
+#     (cada modo en su espacio: vocabulario o hashing);
+#   - coincidencia (ARI) de las etiquetas online (cada artículo con el modelo de su día, y todo
+#     reetiquetado con el modelo final) con las del último batch. NMF no tiene solución única:
+#     un ARI bajo con un error parecido son temas distintos, no peores.
+# Comprueba además que en online todos los días etiquetan con los mismos N_COMPONENTES nombres
+# (los fijados en el primer fit), aunque las palabras principales de cada tema cambien.
+# El tokenizador no lematiza (los datos de WordNet no están siempre instalados), igual en los dos.
+# Ejecuta desde la raíz del repo:
+#   python data_processing/tagClassification/benchmarkTemasOnline.py
+import re, sys, json, time, pathlib, argparse, resource, subprocess, tempfile
+import numpy as np
+import pandas as pd
+from sklearn.decomposition import NMF
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.metrics import adjusted_rand_score
+from topicwizard.pipeline import make_topic_pipeline
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1] / "procesamiento" / "crearDatasets"))
+import almacenDatasets
+import temasOnline
+
+# ============ CONFIG ============
+ETAPA = "definitivos_index"
+FRACCION_INICIAL = 0.5
+N_DIAS = 5
+N_COMPONENTES = 5
+# =================================
+
+def tokenize(text):
+    if pd.isna(text):
+        return []
+    return re.sub(r'[^a-zA-Z\s]', '', str(text)).lower().split()
+
+def dias(n):
+    inicial = int(n * FRACCION_INICIAL)
+    return [0, inicial] + [int(x) for x in np.linspace(inicial, n, N_DIAS + 1)[1:]]
+
+def error_relativo(pipeline, textos):
+    """||X - WH|| / ||X|| sin formar WH en denso."""
+    X = pipeline.steps[0][1].transform(textos)
+    modelo = pipeline.steps[-1][1]
+    W, H = modelo.transform(X), modelo.components_
+    x2 = X.multiply(X).sum()
+    cruzado = (np.asarray(X @ H.T) * W).sum()
+    return float(np.sqrt(max(x2 - 2 * cruzado + ((W.T @ W) * (H @ H.T)).sum(), 0) / x2))
+
+def rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def correr(modo, salida):
+    textos = almacenDatasets.leer(ETAPA, columnas=["article_text"])["article_text"].dropna().tolist()
+    base = rss_mb()
+    cortes = dias(len(textos))
+    etiquetas = np.empty(len(textos), dtype=object)
+    tiempos = []
+    path = pathlib.Path(salida).with_suffix(".joblib")
+    for a, b in zip(cortes[:-1], cortes[1:]):
+        t0 = time.perf_counter()
+        if modo == "batch":
+            pipeline = make_topic_pipeline(CountVectorizer(tokenizer=tokenize, stop_words="english", token_pattern=None),
+                                           NMF(n_components=N_COMPONENTES, random_state=42), pandas_out=True)
+            pipeline.fit(textos[:b])
+            etiquetas[:b] = pipeline.transform(textos[:b]).idxmax(axis=1).to_numpy()
+        else:
+            pipeline, vistos = temasOnline.cargar(tokenize, path=path, n_components=N_COMPONENTES)
+            temasOnline.ajustar_por_lotes(pipeline, textos[a:b])
+            etiquetas[a:b] = temasOnline.etiquetar(pipeline, textos[a:b]).to_numpy()
+            temasOnline.guardar(pipeline, vistos | set(range(a, b)), path=path)
+            nombres = nombres if a else temasOnline.nombres_temas(pipeline)
+            assert temasOnline.nombres_temas(pipeline) == nombres and set(etiquetas[a:b]) <= set(nombres)
+        tiempos.append(time.perf_counter() - t0)
+    rss = rss_mb()
+    final = etiquetas
+    if modo == "online":
+        final = temasOnline.etiquetar(pipeline, textos).to_numpy()
+        assert set(final) <= set(nombres)
+        print(f"nombres fijados: {nombres}; topicwizard ahora: {pipeline.topic_names}", file=sys.stderr)
+    pd.DataFrame({"dia": etiquetas, "final": final}).to_parquet(salida)
+    print(json.dumps({"tiempos": tiempos, "rss": rss, "base": base, "articulos": np.diff(cortes).tolist(),
+                      "error": error_relativo(pipeline, textos)}))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modo", choices=["batch", "online"])
+    parser.add_argument("--salida")
+    args = parser.parse_args()
+    if args.modo:
+        return correr(args.modo, args.salida)
+
+    directorio = pathlib.Path(tempfile.mkdtemp())
+    res = {}
+    for modo in ("batch", "online"):
+        salida = directorio / f"{modo}.parquet"
+        out = subprocess.run([sys.executable, __file__, "--modo", modo, "--salida", str(salida)],
+                             capture_output=True, text=True, check=True).stdout
+        res[modo] = json.loads(out.strip().splitlines()[-1]) | {"etiquetas": pd.read_parquet(salida)}
+
+    print(f"{'día':<6}{'nuevos':>8}{'batch s':>10}{'online s':>10}")
+    for d, (n, tb, to) in enumerate(zip(res["batch"]["articulos"], res["batch"]["tiempos"], res["online"]["tiempos"])):
+        print(f"{d:<6}{n:>8}{tb:>10.2f}{to:>10.2f}")
+    tb, to = sum(res["batch"]["tiempos"]), sum(res["online"]["tiempos"])
+    print(f"{'total':<14}{tb:>10.2f}{to:>10.2f}  x{tb / to:.1f}")
+    for modo in ("batch", "online"):
+        r = res[modo]
+        print(f"pico de RSS {modo:<7}{r['rss']:>8.0f} MB ({r['rss'] - r['base']:.0f} MB sobre la carga de datos), "
+              f"error de reconstrucción relativo {r['error']:.4f}")
+    ref = res["batch"]["etiquetas"]["final"]
+    for col, nombre in (("dia", "con el modelo de su día"), ("final", "reetiquetado con el modelo final")):
+        print(f"ARI online ({nombre}) vs último batch: "
+              f"{adjusted_rand_score(ref, res['online']['etiquetas'][col]):.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+# Servicio de inferencia de temas para artículos recién ingeridos, sin volver a ejecutar
+# tagClassification.py sobre todo el corpus.
+#
+# Un proceso de larga duración carga una sola vez los artefactos guardados:
+#   - el pipeline de temas (vectorizador + NMF / MiniBatchNMF) de temasOnline.MODELO_PATH o
+#     MODELO_BATCH_PATH, con el tokenizador de tokenizadorTemas.py;
+#   - opcionalmente el TF-IDF del notebook 02 (tfidf_vectorizer.joblib) para los top términos.
+#     Ese TF-IDF se ajustó sobre preprocessed_text (pre_rules + lemas de spaCy): aquí el texto
+#     pasa por pre_rules (normalizadorTexto.py) pero no por spaCy, así que los términos con
+#     lema distinto de la forma original no puntúan; para unos top términos basta.
+# y responde con los pesos de cada tema, el tema principal y los top términos.
+#
+# Las peticiones se agrupan en micro-lotes: un hilo recoge hasta MAX_LOTE textos o lo que llegue
+# en ESPERA_MS y los pasa juntos por vectorizador y modelo (una multiplicación de matrices por
+# lote en vez de una por artículo). Los nombres de los temas y de los términos se calculan una
+# vez al cargar; calentar() hace una inferencia de prueba antes de aceptar peticiones.
+# Toda la inferencia del servicio (también los lotes de {"textos": [...]}) pasa por ese hilo:
+# la caché de lemas de tokenizadorTemas (un OrderedDict) no admite varios hilos a la vez.
+#
+# API Python:
+#   servicio = ServicioTemas()
+#   servicio.inferir(["texto 1", "texto 2"])      # lote, síncrono (desde un solo hilo)
+#   servicio.enviar("texto").result()             # un artículo, a través del micro-lote
+#   servicio.enviar_lote(["t1", "t2"]).result()   # un lote, por el mismo hilo
+# HTTP (python data_processing/tagClassification/servicioTemas.py --puerto 8765):
+#   POST /temas  {"texto": "..."} o {"textos": ["...", "..."]}  →  {"resultados": [...]}
+#   GET  /salud
+import sys, json, time, queue, pathlib, argparse, threading
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import joblib
+import numpy as np
+from scipy import sparse
+from sklearn.preprocessing import normalize
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1] / "procesamiento" / "preprocesamiento"))
+import temasOnline
+from consultasTfidf import top_terminos
+from normalizadorTexto import pre_rules
+
+MAX_LOTE = 32
+ESPERA_MS = 5
+TOP_N = 10
+TFIDF_PATH = pathlib.Path(__file__).resolve().parents[1] / "procesamiento" / "preprocesamiento" / "embeddings_tfidf" / "tfidf_vectorizer.joblib"
+
+
+class ServicioTemas:
+    def __init__(self, modelo_path=None, tfidf_path=TFIDF_PATH, tokenizer=None,
+                 max_lote=MAX_LOTE, espera_ms=ESPERA_MS, top_n=TOP_N):
+        """
+        modelo_path: pipeline de temas guardado (por defecto el online si existe, si no el batch).
+        tfidf_path: TfidfVectorizer para los top términos; si no existe, se usan las cuentas del
+                    vectorizador de temas.
+        tokenizer: el del ajuste (por defecto tokenize_and_lemmatize).
+        """
+        if tokenizer is None:
+            from tokenizadorTemas import tokenize_and_lemmatize as tokenizer
+        if modelo_path is None:
+            modelo_path = temasOnline.MODELO_PATH if temasOnline.MODELO_PATH.exists() else temasOnline.MODELO_BATCH_PATH
+        pipeline, _ = temasOnline.cargar(tokenizer, path=modelo_path)
+        if not temasOnline.ajustado(pipeline):
+            raise FileNotFoundError(f"No hay modelo de temas en {modelo_path}: ejecuta tagClassification.py")
+        self.vectorizador, self.modelo = pipeline.steps[0][1], pipeline.steps[-1][1]
+        self.norm_row = getattr(pipeline, "norm_row", True)
+        self.temas = np.array(temasOnline.nombres_temas(pipeline), dtype=object)
+        self.tfidf = joblib.load(tfidf_path) if tfidf_path and pathlib.Path(tfidf_path).exists() else None
+        terminos = self.tfidf if self.tfidf is not None else self.vectorizador
+        self.terminos = np.asarray(terminos.get_feature_names_out(), dtype=object)
+        self.top_n = top_n
+        self.max_lote = max_lote
+        self.espera = espera_ms / 1000
+        self._cola = queue.Queue()
+        self._hilo = threading.Thread(target=self._bucle, daemon=True)
+        self._hilo.start()
+
+    # -------------------------------------------------------------- inferencia
+
+    def inferir(self, textos) -> list:
+        """[{"tema", "pesos": {tema: peso}, "top_terminos": [[término, peso]]}] por texto. No se
+        puede llamar desde varios hilos a la vez: para eso, enviar() / enviar_lote()."""
+        textos = ["" if not isinstance(t, str) else t for t in textos]
+        if not textos:
+            return []
+        cuentas = self.vectorizador.transform(textos)
+        W = self.modelo.transform(cuentas)
+        if self.norm_row:
+            W = normalize(W, norm="l1")
+        if self.tfidf is not None:
+            X = self.tfidf.transform([pre_rules(t) for t in textos])
+        else:
+            X = sparse.csr_matrix(cuentas)
+        out = []
+        for i, w in enumerate(W):
+            out.append({
+                "tema": self.temas[int(w.argmax())] if w.any() else None,
+                "pesos": {t: round(float(p), 6) for t, p in zip(self.temas, w)},
+                # "" = celda del hashing sin término conocido
+                "top_terminos": [[t, round(float(p), 6)] for t, p in top_terminos(X, i, self.terminos, self.top_n) if t],
+            })
+        return out
+
+    def enviar(self, texto) -> Future:
+        """Encola un artículo para el siguiente micro-lote; el Future da su resultado."""
+        futuro = Future()
+        self._cola.put(([texto], futuro, True))
+        return futuro
+
+    def enviar_lote(self, textos) -> Future:
+        """Encola varios artículos juntos; el Future da la lista de sus resultados."""
+        futuro = Future()
+        self._cola.put((list(textos), futuro, False))
+        return futuro
+
+    def _bucle(self):
+        while True:
+            lote = [self._cola.get()]
+            n = len(lote[0][0])
+            limite = time.perf_counter() + self.espera
+            while n < self.max_lote:
+                restante = limite - time.perf_counter()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(self._cola.get(timeout=restante))
+                except queue.Empty:
+                    break
+                n += len(lote[-1][0])
+            try:
+                resultados = self.inferir([t for textos, _, _ in lote for t in textos])
+                i = 0
+                for textos, futuro, uno in lote:
+                    futuro.set_result(resultados[i] if uno else resultados[i:i + len(textos)])
+                    i += len(textos)
+            except Exception as e:      # que un lote erróneo no tumbe el servicio
+                for _, futuro, _ in lote:
+                    futuro.set_exception(e)
+
+    def calentar(self, textos=None, repeticiones=3):
+        """Inferencias de prueba (primeras llamadas de BLAS, caché de lemas…) antes de servir."""
+        textos = textos or ["Apple shares rose after the company reported record iPhone sales."] * self.max_lote
+        for _ in range(repeticiones):
+            self.enviar_lote(textos).result()
+        return self
+
+
+# ------------------------------------------------------------------ HTTP
+
+def crear_servidor(servicio, host="127.0.0.1", puerto=8765) -> ThreadingHTTPServer:
+    class Manejador(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _responder(self, codigo, cuerpo):
+            datos = json.dumps(cuerpo, ensure_ascii=False).encode("utf-8")
+            self.send_response(codigo)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(datos)))
+            self.end_headers()
+            self.wfile.write(datos)
+
+        def do_GET(self):
+            if self.path == "/salud":
+                self._responder(200, {"ok": True, "temas": list(servicio.temas)})
+            else:
+                self._responder(404, {"error": "ruta desconocida"})
+
+        def do_POST(self):
+            if self.path != "/temas":
+                return self._responder(404, {"error": "ruta desconocida"})
+            try:
+                peticion = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            except (json.JSONDecodeError, UnicodeDecodeError, ValueError):
+                return self._responder(400, {"error": "JSON no válido"})
+            if not isinstance(peticion, dict) or ("texto" not in peticion and "textos" not in peticion):
+                return self._responder(400, {"error": "falta 'texto' o 'textos'"})
+            if "textos" in peticion and not isinstance(peticion["textos"], list):
+                return self._responder(400, {"error": "'textos' tiene que ser una lista"})
+            try:
+                if "texto" in peticion:
+                    resultados = [servicio.enviar(peticion["texto"]).result()]
+                else:
+                    # el lote va entero por la cola: lo infiere el mismo hilo que los micro-lotes
+                    resultados = servicio.enviar_lote(peticion["textos"]).result()
+            except Exception as e:
+                return self._responder(500, {"error": f"{type(e).__name__}: {e}"})
+            self._responder(200, {"resultados": resultados})
+
+        def log_message(self, *args):
+            pass
+
+    class Servidor(ThreadingHTTPServer):
+        daemon_threads = True
+        request_queue_size = 128    # con el de por defecto (5) las conexiones de más se reintentan a 1 s
+
+    return Servidor((host, puerto), Manejador)
+
+def main():
+    parser = argparse.ArgumentParser(description="Servicio HTTP de inferencia de temas")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--modelo", default=None, help="pipeline de temas (joblib)")
+    parser.add_argument("--tfidf", default=str(TFIDF_PATH), help="tfidf_vectorizer.joblib para los top términos")
+    parser.add_argument("--max-lote", type=int, default=MAX_LOTE)
+    parser.add_argument("--espera-ms", type=float, default=ESPERA_MS)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    servicio = ServicioTemas(args.modelo, args.tfidf, max_lote=args.max_lote, espera_ms=args.espera_ms).calentar()
+    print(f"✓ modelo cargado y calentado en {time.perf_counter() - t0:.1f}s: {len(servicio.temas)} temas")
+    servidor = crear_servidor(servicio, args.host, args.puerto)
+    print(f"Escuchando en http://{args.host}:{args.puerto} (POST /temas, GET /salud)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        servidor.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -1,37 +1,91 @@
-import pandas as pd
-from nltk.stem import WordNetLemmatizer
 from sklearn.decomposition import NMF
 from sklearn.feature_extraction.text import CountVectorizer
 from topicwizard.pipeline import make_topic_pipeline
 import topicwizard
-import re
+import sys
+import pathlib
 
-df = pd.read_csv("data_processing/finnhubAPI/data/porEmpresas/definitivos/INDEX_ALL_scrapped_filtrado.csv")
-print(len(df))
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1] / "procesamiento" / "crearDatasets"))
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1] / "procesamiento" / "preprocesamiento"))
+import almacenDatasets
+from cacheArtefactos import CacheArtefactos
+from vectorizadorHashing import VectorizadorHashing
+import temasOnline
+from tokenizadorTemas import LEMAS, tokenize_and_lemmatize
 
-lemmatizer = WordNetLemmatizer()
+# "vocabulario": CountVectorizer. "hashing": VectorizadorHashing, espacio fijo de N_FEATURES
+# celdas sin vocabulario; los nombres de los temas salen de su índice inverso
+FEATURIZACION = "vocabulario"
+N_FEATURES = 2 ** 18
+# "batch": NMF sobre todo el corpus y se reetiqueta todo. "online": MiniBatchNMF guardado en
+# temasOnline.MODELO_PATH, se ajusta por lotes solo con los artículos nuevos y solo se etiquetan
+# esos (siempre en hashing). REETIQUETAR = True vuelve a etiquetar también los ya etiquetados
+MODO_TEMAS = "batch"
+REETIQUETAR = False
 
-def tokenize_and_lemmatize(text):
-    if pd.isna(text):
-        return []
-    text = re.sub(r'[^a-zA-Z\s]', '', str(text))
-    tokens = text.lower().split() # Case Folding + Tokenization
-    lemmas = [lemmatizer.lemmatize(t) for t in tokens]
-    return lemmas
+df = almacenDatasets.leer("definitivos_index")
+print(len(df))
 
 texts = df["article_text"].dropna().tolist()
 
-# CountVectorizer
-cv = CountVectorizer(tokenizer = tokenize_and_lemmatize, stop_words = 'english')
+# Los casi duplicados (canonical_id distinto del propio, ver duplicadosLSH.py) no entran en el
+# ajuste para que las reimpresiones no pesen más en los temas; sí se etiquetan después
+if "canonical_id" in df.columns:
+    canonicos = df.loc[df["canonical_id"] == df["article_id"], "article_text"].dropna().tolist()
+else:
+    canonicos = texts
+print(f"Ajuste sobre {len(canonicos)} artículos canónicos")
+
+# CountVectorizer (o cuentas hasheadas: sin idf ni normalizar, lo mismo que recibe la NMF)
+if MODO_TEMAS == "online":
+    topic_pipeline, vistos = temasOnline.cargar(tokenize_and_lemmatize)
+    cv = topic_pipeline.steps[0][1]
+elif FEATURIZACION == "hashing":
+    cv = VectorizadorHashing(n_features=N_FEATURES, tokenizer=tokenize_and_lemmatize, stop_words='english',
+                             token_pattern=None, use_idf=False, norm=None)
+else:
+    cv = CountVectorizer(tokenizer = tokenize_and_lemmatize, stop_words = 'english')
 
-# NMF
-nmf = NMF(n_components=5, random_state=42)
+if MODO_TEMAS != "online":
+    # NMF
+    nmf = NMF(n_components=5, random_state=42)
 
-# Create a pipeline
-topic_pipeline = make_topic_pipeline(cv, nmf, pandas_out=True)
-topic_pipeline.fit(texts)
+    # Create a pipeline
+    topic_pipeline = make_topic_pipeline(cv, nmf, pandas_out=True)
 
-topic_vectors = topic_pipeline.transform(texts)
-df["topic"] = topic_vectors.idxmax(axis=1)
+# Los tokens de cada artículo se cachean por contenido (ver cacheArtefactos.py): fit y transform
+# no vuelven a tokenizar, y en otra ejecución solo se tokenizan los artículos nuevos o cambiados
+# El espacio depende de todos los parámetros del vectorizador (los callables, como el tokenizer, ya
+# van por su código en `codigo`)
+cv_config = {"clase": type(cv).__name__,
+             **{k: v for k, v in cv.get_params(deep=False).items() if not callable(v)}}
+tokens_cache = CacheArtefactos("tagClassification_cv", cv_config, codigo=(tokenize_and_lemmatize,))
+if MODO_TEMAS == "online":
+    nuevos = df["article_text"].notna() & ~df["article_id"].isin(vistos)
+    canonicos_nuevos = nuevos if "canonical_id" not in df.columns else nuevos & (df["canonical_id"] == df["article_id"])
+    etiquetar = df["article_text"].notna() if REETIQUETAR else nuevos
+    print(f"Modo online: {nuevos.sum()} artículos nuevos ({canonicos_nuevos.sum()} canónicos), "
+          f"{len(vistos)} ya vistos, se etiquetan {etiquetar.sum()}")
+    tokens_cache.precargar(df.loc[etiquetar | canonicos_nuevos, "article_text"])
+    with tokens_cache.usando(cv):
+        temasOnline.ajustar_por_lotes(topic_pipeline, df.loc[canonicos_nuevos, "article_text"])
+        if temasOnline.ajustado(topic_pipeline):
+            if "topic" not in df.columns:
+                df["topic"] = None
+            df.loc[etiquetar, "topic"] = temasOnline.etiquetar(topic_pipeline, df.loc[etiquetar, "article_text"])
+    temasOnline.guardar(topic_pipeline, vistos | set(df.loc[nuevos, "article_id"]))
+else:
+    tokens_cache.precargar(texts)
+    with tokens_cache.usando(cv):
+        topic_pipeline.fit(canonicos)
+        topic_vectors = topic_pipeline.transform(texts)
+    df["topic"] = topic_vectors.idxmax(axis=1)
+    topic_pipeline.nombres_temas = list(topic_vectors.columns)   # los mismos nombres que en df
+    # para servicioTemas.py (inferencia de artículos nuevos sin reajustar)
+    temasOnline.guardar(topic_pipeline, set(df["article_id"]), path=temasOnline.MODELO_BATCH_PATH)
+print(tokens_cache.resumen())
+tokens_cache.close()
+LEMAS.guardar()
+print(LEMAS.resumen())
 
-df.to_csv("data_processing/finnhubAPI/data/porEmpresas/definitivos/INDEX_ALL_scrapped_filtrado.csv", index=False)
\ No newline at end of file
+almacenDatasets.guardar(df, "definitivos_index", completo=True)
\ No newline at end of file
@@ -0,0 +1,100 @@
+# Modo online de los temas de tagClassification.py: en vez de reajustar NMF sobre todo el corpus
+# con cada lote diario y volver a transformar todos los textos, el modelo se guarda y aprende
+# por lotes con partial_fit.
+#
+#   - Vectorizador: VectorizadorHashing en cuentas (use_idf=False, norm=None), un espacio fijo de
+#     N_FEATURES celdas; con CountVectorizer el vocabulario cambiaría en cada lote y la NMF no
+#     podría seguir desde sus componentes anteriores.
+#   - Modelo: MiniBatchNMF. La primera vez (sin modelo guardado) se ajusta con fit sobre todos
+#     los textos, como el batch: con solo partial_fit desde cero, una pasada por lote queda lejos
+#     de converger. Después cada partial_fit es un paso sobre un lote de LOTE artículos nuevos,
+#     así que ya no se carga nunca la matriz de todo el corpus.
+#   - El pipeline (make_topic_pipeline, igual que el modo batch) y los article_id ya etiquetados
+#     se guardan en MODELO_PATH. En cada ejecución solo se ajusta con los artículos nuevos y solo
+#     se etiquetan esos; los antiguos conservan su tema salvo que se pida reetiquetar.
+#   - Los nombres de los temas se fijan en el primer fit (pipeline.nombres_temas, se guarda con
+#     el pipeline): topicwizard los recalcula en cada transform con las palabras principales de
+#     components_, que cambian con cada partial_fit, y los artículos nuevos saldrían con otra
+#     etiqueta para el mismo tema que los ya guardados. etiquetar() usa siempre los fijados.
+#
+#   pipeline, vistos = cargar(tokenize_and_lemmatize)
+#   ajustar_por_lotes(pipeline, textos_nuevos)
+#   df.loc[nuevos, "topic"] = etiquetar(pipeline, df.loc[nuevos, "article_text"])
+#   guardar(pipeline, vistos | set(df.loc[nuevos, "article_id"]))
+import sys, pathlib
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.decomposition import MiniBatchNMF
+from topicwizard.pipeline import make_topic_pipeline
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1] / "procesamiento" / "preprocesamiento"))
+from vectorizadorHashing import VectorizadorHashing
+
+MODELO_PATH = pathlib.Path(__file__).resolve().parents[1] / "finnhubAPI" / "data" / "temas_online.joblib"
+MODELO_BATCH_PATH = MODELO_PATH.with_name("temas_batch.joblib")   # el del modo batch, para servicioTemas.py
+N_COMPONENTES = 5
+N_FEATURES = 2 ** 16     # ~40k términos distintos en las noticias: pocas colisiones y NMF más rápida
+LOTE = 1000
+
+
+def crear_pipeline(tokenizer, n_components=N_COMPONENTES, n_features=N_FEATURES, random_state=42):
+    vectorizador = VectorizadorHashing(n_features=n_features, tokenizer=tokenizer, stop_words='english',
+                                       token_pattern=None, use_idf=False, norm=None)
+    modelo = MiniBatchNMF(n_components=n_components, batch_size=LOTE, random_state=random_state)
+    return make_topic_pipeline(vectorizador, modelo, pandas_out=True)
+
+def cargar(tokenizer, path=MODELO_PATH, **kwargs):
+    """(pipeline, article_ids ya etiquetados) guardados, o un pipeline nuevo y un set vacío."""
+    path = pathlib.Path(path)
+    if not path.exists():
+        return crear_pipeline(tokenizer, **kwargs), set()
+    estado = joblib.load(path)
+    pipeline = estado["pipeline"]
+    pipeline.steps[0][1].set_params(tokenizer=tokenizer)
+    if ajustado(pipeline) and not hasattr(pipeline, "nombres_temas"):
+        # guardado antes de fijar los nombres: se fijan los de ahora
+        pipeline.nombres_temas = list(pipeline.topic_names)
+    return pipeline, estado["vistos"]
+
+def guardar(pipeline, vistos, path=MODELO_PATH):
+    """El tokenizador no se guarda (es una función del script, con su caché de lemas)."""
+    path = pathlib.Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    vectorizador = pipeline.steps[0][1]
+    tokenizer = vectorizador.get_params()["tokenizer"]
+    vectorizador.set_params(tokenizer=None)
+    try:
+        joblib.dump({"pipeline": pipeline, "vistos": set(vistos)}, path)
+    finally:
+        vectorizador.set_params(tokenizer=tokenizer)
+
+def ajustado(pipeline) -> bool:
+    return hasattr(pipeline.steps[-1][1], "components_")
+
+def nombres_temas(pipeline) -> list:
+    """Nombres fijados en el primer fit; los de topicwizard si el pipeline no los tiene (batch)."""
+    return getattr(pipeline, "nombres_temas", None) or list(pipeline.topic_names)
+
+def ajustar_por_lotes(pipeline, textos, lote=LOTE):
+    """fit si el pipeline es nuevo; si no, partial_fit de vectorizador y MiniBatchNMF con cada
+    lote de `lote` textos."""
+    textos = list(textos)
+    if not ajustado(pipeline):
+        if textos:
+            pipeline.fit(textos)
+            pipeline.nombres_temas = list(pipeline.topic_names)
+        return pipeline
+    for i in range(0, len(textos), lote):
+        pipeline.partial_fit(textos[i:i + lote])
+    return pipeline
+
+def etiquetar(pipeline, textos, lote=LOTE) -> pd.Series:
+    """Nombre del tema principal de cada texto (mismo formato que el modo batch), por lotes.
+    El tema es el índice de la componente con más peso, con los nombres de nombres_temas()."""
+    textos = textos if isinstance(textos, pd.Series) else pd.Series(list(textos), dtype=object)
+    vectorizador, modelo = pipeline.steps[0][1], pipeline.steps[-1][1]
+    nombres = np.array(nombres_temas(pipeline), dtype=object)
+    temas = [nombres[modelo.transform(vectorizador.transform(textos.iloc[i:i + lote].tolist())).argmax(axis=1)]
+             for i in range(0, len(textos), lote)]
+    return pd.Series(np.concatenate(temas) if temas else [], index=textos.index, dtype=object)
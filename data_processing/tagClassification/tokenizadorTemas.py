@@ -0,0 +1,23 @@
+# Tokenizador de los temas (tagClassification.py, temasOnline.py, servicioTemas.py): limpieza,
+# minúsculas, split y lema de WordNet de cada token. Está aparte para que el servicio de
+# inferencia tokenice exactamente igual que el ajuste sin ejecutar tagClassification.py.
+import re
+import sys
+import pathlib
+import pandas as pd
+from nltk.stem import WordNetLemmatizer
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1] / "procesamiento" / "crearDatasets"))
+from cacheLemas import CacheLemas
+
+lemmatizer = WordNetLemmatizer()
+# token → lema, persistida entre ejecuciones (ver cacheLemas.py)
+LEMAS = CacheLemas("wordnet", lemmatizer.lemmatize)
+
+def tokenize_and_lemmatize(text):
+    if pd.isna(text):
+        return []
+    text = re.sub(r'[^a-zA-Z\s]', '', str(text))
+    tokens = text.lower().split() # Case Folding + Tokenization
+    lemmas = LEMAS.lemas(tokens)
+    return lemmas